@@ -9,15 +9,146 @@ power: W
 energy: Wh
 """
 
+import argparse
+import csv
 import logging
+import sys
+
+from simulation.benchmark import benchmark_matrix, run_benchmarks, save_baseline, load_baseline, find_regressions, \
+    BenchmarkResult, BENCHMARK_TRACKS, BENCHMARK_VEHICLE_COUNTS, BENCHMARK_SECONDS_PER_TICK, BENCHMARK_ENGINES, \
+    BENCHMARK_RUNTIME_SECONDS, REGRESSION_THRESHOLD
+from simulation.environment import Environment
+from simulation.profiler import TickProfiler
+from simulation.simulation import MAX_RUNTIME_SECONDS, Simulation
+from simulation.sweep import sweep, parameter_grid, SweepResult, ENGINES
+from simulation.track_import import load_track_csv, FIT_TOLERANCE
+from simulation.tracks import TRACKS
+from simulation.vehicle import Vehicle
 
 logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 
+def run_sweep(arguments: argparse.Namespace) -> None:
+    track = arguments.track_file or TRACKS[arguments.track]()
+    base_vehicle = Vehicle("Sweep Car", "red", max_acceleration=2, max_speed=33, energy_stored=10_000, height=1.5,
+                           track_width=1.9, tire_friction_coefficient=0.8)
+    grid = parameter_grid(**{
+        name: values for name, values in (
+            ("max_acceleration", arguments.max_acceleration),
+            ("max_speed", arguments.max_speed),
+            ("tire_friction_coefficient", arguments.tire_friction_coefficient),
+            ("energy_stored", arguments.energy_stored),
+        ) if values
+    })
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(SweepResult.header())
+    for result in sweep(track, base_vehicle, grid, arguments.runtime, arguments.seconds_per_tick, arguments.workers,
+                        arguments.engine):
+        writer.writerow(result.row())
+        sys.stdout.flush()
+
+
+def run_profile(arguments: argparse.Namespace) -> None:
+    vehicle = Vehicle("Profile Car", "red", max_acceleration=2, max_speed=33, energy_stored=10_000, height=1.5,
+                      track_width=1.9, tire_friction_coefficient=0.8)
+    with TickProfiler(track_allocations=arguments.allocations, trace=arguments.trace is not None) as profiler:
+        simulation = Simulation([vehicle], Environment(TRACKS[arguments.track]()), arguments.runtime,
+                                profiler=profiler)
+        simulation.loop(arguments.seconds_per_tick)
+
+    print(profiler.summary())
+    if arguments.trace:
+        profiler.write_chrome_trace(arguments.trace)
+
+
+def run_benchmark(arguments: argparse.Namespace) -> None:
+    cases = benchmark_matrix(arguments.tracks, arguments.vehicles, arguments.seconds_per_tick, arguments.engines)
+    # load first, a broken baseline should not waste a whole benchmark run
+    baseline = load_baseline(arguments.baseline) if arguments.baseline else None
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(BenchmarkResult.header())
+    results = []
+    for result in run_benchmarks(cases, arguments.runtime):
+        results.append(result)
+        writer.writerow(result.row())
+        sys.stdout.flush()
+
+    if arguments.save_baseline:
+        save_baseline(results, arguments.save_baseline)
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, arguments.threshold)
+        for regression in regressions:
+            log.error(f"Regression {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+def run_import_tracks(arguments: argparse.Namespace) -> None:
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["name", "tiles", "total_length"])
+    for path in arguments.paths:
+        track = load_track_csv(path, arguments.tolerance)
+        writer.writerow([track.name, len(track.tiles), f"{track.total_length:.1f}"])
+
+
 def main() -> None:
-    log.info("Currently no default simulation setup.")
+    parser = argparse.ArgumentParser(description="Energy Simulation for Electric Vehicles on Race Tracks")
+    commands = parser.add_subparsers(dest="command")
+
+    sweep_parser = commands.add_parser("sweep", help="Run a grid of vehicle parameters, writes one CSV row per run")
+    sweep_parser.add_argument("--track", choices=TRACKS.keys(), default="hockenheimring-short-2")
+    sweep_parser.add_argument("--track-file", help="Track file, e.g. cached by import-tracks, to use instead of --track")
+    sweep_parser.add_argument("--max-acceleration", type=float, nargs="+")
+    sweep_parser.add_argument("--max-speed", type=float, nargs="+")
+    sweep_parser.add_argument("--tire-friction-coefficient", type=float, nargs="+")
+    sweep_parser.add_argument("--energy-stored", type=float, nargs="+")
+    sweep_parser.add_argument("--runtime", type=int, default=MAX_RUNTIME_SECONDS, help="Simulated seconds per run")
+    sweep_parser.add_argument("--seconds-per-tick", type=int, default=1)
+    sweep_parser.add_argument("--workers", type=int, help="Number of worker processes, defaults to CPU count")
+    sweep_parser.add_argument("--engine", choices=ENGINES, default="scalar",
+                              help="Tick based simulation, with replay of steady laps or analytic phase integration")
+    sweep_parser.set_defaults(handler=run_sweep)
+
+    profile_parser = commands.add_parser("profile", help="Run a single simulation and print the time spent per phase")
+    profile_parser.add_argument("--track", choices=TRACKS.keys(), default="hockenheimring-short-2")
+    profile_parser.add_argument("--runtime", type=int, default=3600, help="Simulated seconds")
+    profile_parser.add_argument("--seconds-per-tick", type=int, default=1)
+    profile_parser.add_argument("--allocations", action="store_true", help="Measure memory allocated per tick")
+    profile_parser.add_argument("--trace", help="Write a Chrome trace of every tick to this file")
+    profile_parser.set_defaults(handler=run_profile)
+
+    benchmark_parser = commands.add_parser("benchmark", help="Measure throughput and memory over a matrix of runs, "
+                                                             "writes one CSV row per run")
+    benchmark_parser.add_argument("--tracks", choices=TRACKS.keys(), nargs="+", default=BENCHMARK_TRACKS)
+    benchmark_parser.add_argument("--vehicles", type=int, nargs="+", default=BENCHMARK_VEHICLE_COUNTS)
+    benchmark_parser.add_argument("--seconds-per-tick", type=int, nargs="+", default=BENCHMARK_SECONDS_PER_TICK)
+    benchmark_parser.add_argument("--engines", choices=BENCHMARK_ENGINES, nargs="+", default=["scalar"])
+    benchmark_parser.add_argument("--runtime", type=int, default=BENCHMARK_RUNTIME_SECONDS,
+                                  help="Simulated seconds per run")
+    benchmark_parser.add_argument("--save-baseline", help="Write the results as baseline to this file")
+    benchmark_parser.add_argument("--baseline", help="Compare with this baseline, exits with 1 on regressions")
+    benchmark_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                  help="Relative change of a metric counting as regression")
+    benchmark_parser.set_defaults(handler=run_benchmark)
+
+    import_parser = commands.add_parser("import-tracks", help="Fit tiles to centerline CSVs of the racetrack-database "
+                                                              "and cache them, writes one CSV row per track")
+    import_parser.add_argument("paths", nargs="+", help="Centerline CSV files with x, y, width right, width left")
+    import_parser.add_argument("--tolerance", type=float, default=FIT_TOLERANCE,
+                               help="Maximum distance of the centerline from the fitted tiles in meters")
+    import_parser.set_defaults(handler=run_import_tracks)
+
+    arguments = parser.parse_args()
+    if arguments.command is None:
+        log.info("Currently no default simulation setup.")
+        return
+
+    arguments.handler(arguments)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ from simulation.environment import Environment
 from simulation.track import TrackLocation
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TickableDelta(ABC):
     speed_delta: float = 0.0
     acceleration: float = 0.0
@@ -17,6 +17,8 @@ class TickableDelta(ABC):
 
 
 class Tickable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def apply(self, environment: Environment, time_delta_second: int) -> Self:
         pass
@@ -0,0 +1,234 @@
+import dataclasses
+import logging
+import math
+from dataclasses import dataclass
+from typing import Self
+
+import numpy as np
+
+from simulation.base import TickableDelta
+from simulation.environment import Environment
+from simulation.physics import power_for_velocity, energy_for_climb, battery_power, VehicleParameters
+from simulation.simulation import Simulation, MAX_RUNTIME_SECONDS
+from simulation.track import Track, TrackLocation
+from simulation.units import convert_seconds_to_hours
+from simulation.vehicle import Vehicle, STANDBY_POWER, LOOKAHEAD_FACTOR, ACCELERATION_SAFETY_FACTOR, \
+    ACCELERATION_SAFETY_DISTANCE
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class VehicleBatch:
+    """
+    State of many vehicles on the same track, one array entry per vehicle. Mirrors the fields of Vehicle, with the
+    location kept as distance on the current lap instead of a TrackLocation.
+    """
+    templates: list[Vehicle]
+    max_acceleration: np.ndarray
+    max_speed: np.ndarray
+    energy_stored: np.ndarray
+    energy_used: np.ndarray
+    speed: np.ndarray
+    distance_driven: np.ndarray
+    lap_counter: np.ndarray
+    lap_distance: np.ndarray
+    tile_index: np.ndarray
+    progress: np.ndarray
+    speed_delta: np.ndarray
+    acceleration: np.ndarray
+    energy_delta: np.ndarray
+    distance_delta: np.ndarray
+    lap_delta: np.ndarray
+    parameters: VehicleParameters  # holding arrays, see VehicleParameters.stacked
+
+    @classmethod
+    def from_vehicles(cls, vehicles: list[Vehicle]) -> Self:
+        def values(extractor, dtype=np.float64):
+            return np.array([extractor(vehicle) for vehicle in vehicles], dtype=dtype)
+
+        return cls(
+            templates=list(vehicles),
+            max_acceleration=values(lambda v: v.max_acceleration),
+            max_speed=values(lambda v: v.max_speed),
+            energy_stored=values(lambda v: v.energy_stored),
+            energy_used=values(lambda v: v.energy_used),
+            speed=values(lambda v: v.current_speed),
+            distance_driven=values(lambda v: v.distance_driven),
+            lap_counter=values(lambda v: v.lap_counter, np.int64),
+            lap_distance=values(lambda v: v.location.distance),
+            tile_index=values(lambda v: v.location.tile_index, np.int64),
+            progress=values(lambda v: v.location.progress),
+            speed_delta=values(lambda v: v.delta_input.speed_delta),
+            acceleration=values(lambda v: v.delta_input.acceleration),
+            energy_delta=values(lambda v: v.delta_input.energy_delta),
+            distance_delta=values(lambda v: v.delta_input.distance_delta),
+            lap_delta=values(lambda v: v.delta_input.delta_lap, np.int64),
+            parameters=VehicleParameters.stacked([vehicle.parameters for vehicle in vehicles]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def rows(self) -> np.ndarray:
+        """
+        :return: one row per vehicle in the order of simulation.history.FIELDS
+        """
+        return np.column_stack((self.speed, self.speed_delta, self.acceleration, self.energy_stored,
+                                self.energy_used, self.energy_delta, self.distance_driven, self.distance_delta,
+                                self.lap_counter, self.lap_delta, self.tile_index, self.progress))
+
+    def to_vehicles(self, track: Track) -> list[Vehicle]:
+        vehicles = []
+        for index, template in enumerate(self.templates):
+            location = TrackLocation(track, track.compiled.tiles[self.tile_index[index]],
+                                     self.progress[index].item())
+            vehicles.append(dataclasses.replace(
+                template,
+                energy_stored=self.energy_stored[index].item(),
+                energy_used=self.energy_used[index].item(),
+                location=location,
+                current_speed=self.speed[index].item(),
+                distance_driven=self.distance_driven[index].item(),
+                lap_counter=self.lap_counter[index].item(),
+                delta_input=TickableDelta(self.speed_delta[index].item(), self.acceleration[index].item(),
+                                          self.energy_delta[index].item(), self.distance_delta[index].item(),
+                                          location, self.lap_delta[index].item()),
+            ))
+        return vehicles
+
+
+class BatchLookahead:
+    """
+    Vectorized equivalent of the speed limit lookahead in Vehicle.calculate_delta. Vehicles sharing the same speed
+    limit profile are grouped, so each group needs a single query per tick.
+    """
+
+    def __init__(self, track: Track, vehicles: list[Vehicle]):
+        groups: dict[tuple[float, float, float], list[int]] = {}
+        for index, vehicle in enumerate(vehicles):
+            key = (vehicle.tire_friction_coefficient, vehicle.height, vehicle.track_width)
+            groups.setdefault(key, []).append(index)
+
+        self.groups = [(track.speed_limit_profile(*key), np.array(indices)) for key, indices in groups.items()]
+
+    def most_relevant_speed_limits(self, lap_distance: np.ndarray, lookahead_distance: np.ndarray) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: tuple of relative distance / speed limit of the lowest upcoming speed limit per vehicle, the
+        nearest one if multiple share the same limit
+        """
+        distances = np.empty_like(lap_distance)
+        speed_limits = np.empty_like(lap_distance)
+
+        for profile, indices in self.groups:
+            position = lap_distance[indices]
+            lookahead = lookahead_distance[indices]
+
+            laps = math.ceil(lookahead.max() / profile.total_length) + 1
+            offsets = np.arange(laps)[:, np.newaxis] * profile.total_length
+            change_distances = (profile.distance_array + offsets).ravel()
+            change_speed_limits = np.tile(profile.speed_limit_array, laps)
+
+            relative = change_distances - position[:, np.newaxis]
+            in_range = (relative > 0) & (relative <= lookahead[:, np.newaxis])
+            current = np.searchsorted(profile.distance_array, position, side="right") - 1
+
+            candidate_distances = np.column_stack((np.zeros_like(position), relative))
+            candidate_speed_limits = np.column_stack((profile.speed_limit_array[current],
+                                                      np.where(in_range, change_speed_limits, np.inf)))
+
+            most_relevant = np.argmin(candidate_speed_limits, axis=1)
+            rows = np.arange(len(indices))
+            distances[indices] = candidate_distances[rows, most_relevant]
+            speed_limits[indices] = candidate_speed_limits[rows, most_relevant]
+
+        return distances, speed_limits
+
+
+def step(batch: VehicleBatch, track: Track, lookahead: BatchLookahead, time_delta_seconds: float):
+    """
+    Advance all vehicles of the batch by one tick, applying the same rules as Vehicle.calculate_delta.
+    """
+    lookahead_distance = batch.max_speed * time_delta_seconds * LOOKAHEAD_FACTOR
+    limit_distance, speed_limit = lookahead.most_relevant_speed_limits(batch.lap_distance, lookahead_distance)
+
+    speed = batch.speed
+    acceleration = batch.max_acceleration.copy()
+
+    ahead = limit_distance > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deceleration = (speed ** 2 - speed_limit ** 2) / (2 * limit_distance)
+    braking = ahead & ((deceleration >= batch.max_acceleration * ACCELERATION_SAFETY_FACTOR)
+                       | (limit_distance < ACCELERATION_SAFETY_DISTANCE))
+    acceleration = np.where(braking, -deceleration, acceleration)
+    acceleration = np.where(~ahead & (speed > speed_limit * ACCELERATION_SAFETY_FACTOR), 0.0, acceleration)
+
+    acceleration = np.minimum(acceleration, batch.max_acceleration)
+    acceleration = np.where(batch.energy_stored > 0, acceleration, -batch.max_acceleration)
+
+    new_speed = np.maximum(np.minimum(speed + acceleration * time_delta_seconds, batch.max_speed), 0)
+    speed_delta = new_speed - speed
+    acceleration = speed_delta / time_delta_seconds
+
+    average_speed = (speed + new_speed) / 2
+    distance_delta = average_speed * time_delta_seconds
+
+    laps, tile_index, progress = track.compiled.resolve_many(batch.lap_distance + distance_delta)
+
+    hours = convert_seconds_to_hours(time_delta_seconds)
+    parameters = batch.parameters
+    energy_delta = np.where(acceleration >= 0, -battery_power(power_for_velocity(average_speed, parameters), parameters)
+                            * hours, -STANDBY_POWER * hours)
+    elevation = track.elevation_profile
+    if not elevation.is_flat:
+        energy_delta -= convert_seconds_to_hours(energy_for_climb(
+            *elevation.climb_many(batch.lap_distance, batch.lap_distance + distance_delta), parameters))
+
+    batch.speed = new_speed
+    batch.speed_delta = speed_delta
+    batch.acceleration = acceleration
+    batch.energy_delta = energy_delta
+    batch.energy_stored = batch.energy_stored + energy_delta
+    batch.energy_used = batch.energy_used - energy_delta
+    batch.distance_delta = distance_delta
+    batch.distance_driven = batch.distance_driven + distance_delta
+    batch.lap_delta = laps
+    batch.lap_counter = batch.lap_counter + laps
+    batch.tile_index = tile_index
+    batch.progress = progress
+    batch.lap_distance = track.compiled.distance_at_many(tile_index, progress)
+
+
+class BatchSimulation(Simulation):
+    """
+    Simulation advancing all vehicles in a single vectorized step per tick instead of one Vehicle.apply each.
+    Vehicle objects are only created when the vehicles are accessed.
+    """
+
+    def __init__(self, vehicles: list[Vehicle], environment: Environment, max_runtime_seconds=MAX_RUNTIME_SECONDS):
+        self.batch: VehicleBatch = None
+        self.lookahead: BatchLookahead = None
+        super().__init__(vehicles, environment, max_runtime_seconds)
+
+    @property
+    def vehicles(self) -> list[Vehicle]:
+        if self._vehicles is None:
+            self._vehicles = self.batch.to_vehicles(self.environment.track)
+        return self._vehicles
+
+    @vehicles.setter
+    def vehicles(self, vehicles: list[Vehicle]):
+        self._vehicles = vehicles
+
+    def setup(self):
+        super().setup()
+        self.batch = VehicleBatch.from_vehicles(self.vehicles)
+        self.lookahead = BatchLookahead(self.environment.track, self.vehicles)
+
+    def tick(self, seconds_per_tick: int = 1):
+        self._advance_time(seconds_per_tick)
+
+        step(self.batch, self.environment.track, self.lookahead, seconds_per_tick)
+        self._vehicles = None
+        self.vehicle_history.append(self.time, self.batch.rows())
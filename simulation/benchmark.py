@@ -0,0 +1,209 @@
+import dataclasses
+import itertools
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterator, Iterable
+
+from simulation.batch import BatchSimulation
+from simulation.environment import Environment
+from simulation.simulation import Simulation
+from simulation.telemetry import telemetry
+from simulation.tracks import TRACKS
+from simulation.vehicle import Vehicle
+
+BENCHMARK_TRACKS = ("basic-oval", "hockenheimring-short-2", "synthetic-1000")
+BENCHMARK_VEHICLE_COUNTS = (1, 4, 16)
+BENCHMARK_SECONDS_PER_TICK = (1, 5)
+BENCHMARK_ENGINES = ("scalar", "batch", "replay")
+BENCHMARK_RUNTIME_SECONDS = 3600
+BASELINE_VERSION = 1
+# relative change of a metric in the worse direction which counts as regression
+REGRESSION_THRESHOLD = 0.2
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    track: str
+    vehicles: int
+    seconds_per_tick: int
+    engine: str = "scalar"
+
+    @property
+    def key(self) -> str:
+        return f"{self.track}/vehicles={self.vehicles}/seconds_per_tick={self.seconds_per_tick}/{self.engine}"
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    case: BenchmarkCase
+    ticks: int
+    seconds: float
+    peak_rss_bytes: int
+    history_bytes_per_tick: float
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds > 0 else float("inf")
+
+    @classmethod
+    def header(cls) -> list[str]:
+        return ["track", "vehicles", "seconds_per_tick", "engine", "ticks", "seconds", "ticks_per_second",
+                "peak_rss_bytes", "history_bytes_per_tick"]
+
+    def row(self) -> list:
+        return [*dataclasses.astuple(self.case), self.ticks, self.seconds, self.ticks_per_second, self.peak_rss_bytes,
+                self.history_bytes_per_tick]
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "BenchmarkResult":
+        return cls(**{**values, "case": BenchmarkCase(**values["case"])})
+
+
+@dataclass(frozen=True)
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """
+        :return: relative change compared to the baseline, e.g. -0.25 for 25% less
+        """
+        return self.current / self.baseline - 1 if self.baseline else float("inf")
+
+    def __str__(self):
+        return f"{self.key}: {self.metric} {self.baseline:.1f} -> {self.current:.1f} ({self.change:+.0%})"
+
+
+def benchmark_matrix(tracks: Iterable[str] = BENCHMARK_TRACKS, vehicle_counts: Iterable[int] = BENCHMARK_VEHICLE_COUNTS,
+                     seconds_per_tick: Iterable[int] = BENCHMARK_SECONDS_PER_TICK,
+                     engines: Iterable[str] = ("scalar",)) -> list[BenchmarkCase]:
+    """
+    :return: every combination of the given tracks, vehicle counts, tick lengths and engines
+    """
+    unknown = [engine for engine in engines if engine not in BENCHMARK_ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines {', '.join(unknown)}, expected any of {', '.join(BENCHMARK_ENGINES)}")
+    return [BenchmarkCase(*combination)
+            for combination in itertools.product(tracks, vehicle_counts, seconds_per_tick, engines)]
+
+
+def create_vehicles(count: int) -> list[Vehicle]:
+    """
+    :return: vehicles with differing parameters, so they do not share a speed limit profile
+    """
+    return [Vehicle(f"Benchmark Car {index}", "red", max_acceleration=2 + index % 3, max_speed=33 + index % 8,
+                    energy_stored=10_000, height=1.5, track_width=1.9,
+                    tire_friction_coefficient=0.8 + (index % 5) / 20)
+            for index in range(count)]
+
+
+def peak_rss_bytes() -> int:
+    """
+    :return: peak resident set size of the current process, 0 where it can't be determined
+    """
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(case: BenchmarkCase, max_runtime_seconds: int = BENCHMARK_RUNTIME_SECONDS) -> BenchmarkResult:
+    """
+    Runs a single case in the current process, its peak RSS includes everything the process did before
+    """
+    environment = Environment(TRACKS[case.track]())
+    vehicles = create_vehicles(case.vehicles)
+    if case.engine == "batch":
+        simulation = BatchSimulation(vehicles, environment, max_runtime_seconds)
+    else:
+        simulation = Simulation(vehicles, environment, max_runtime_seconds, lap_replay=case.engine == "replay")
+
+    with telemetry.silenced():
+        start = time.perf_counter()
+        simulation.loop(case.seconds_per_tick)
+        seconds = time.perf_counter() - start
+
+    history = simulation.vehicle_history
+    return BenchmarkResult(
+        case=case,
+        ticks=simulation.ticks,
+        seconds=seconds,
+        peak_rss_bytes=peak_rss_bytes(),
+        history_bytes_per_tick=history.recorded_nbytes / len(history),
+    )
+
+
+def run_benchmarks(cases: list[BenchmarkCase], max_runtime_seconds: int = BENCHMARK_RUNTIME_SECONDS,
+                   isolated: bool = True) -> Iterator[BenchmarkResult]:
+    """
+    Runs the cases one after the other, so they do not compete for the CPU.
+
+    :param isolated: run each case in a freshly spawned process, otherwise the peak RSS of a case includes all
+    cases before
+    """
+    if not isolated:
+        for case in cases:
+            yield run_case(case, max_runtime_seconds)
+        return
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"), max_tasks_per_child=1) as executor:
+        for case in cases:
+            result = executor.submit(run_case, case, max_runtime_seconds).result()
+            log.info(f"{case.key}: {result.ticks_per_second:.0f} ticks/s")
+            yield result
+
+
+def save_baseline(results: Iterable[BenchmarkResult], path: str | Path):
+    content = {"version": BASELINE_VERSION, "results": [result.to_dict() for result in results]}
+    Path(path).write_text(json.dumps(content, indent=2))
+
+
+def load_baseline(path: str | Path) -> dict[str, BenchmarkResult]:
+    """
+    :return: results of the baseline by key of their case
+    """
+    content = json.loads(Path(path).read_text())
+    if content.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version {content.get('version')}, expected {BASELINE_VERSION}")
+    results = [BenchmarkResult.from_dict(values) for values in content["results"]]
+    return {result.case.key: result for result in results}
+
+
+def find_regressions(results: Iterable[BenchmarkResult], baseline: dict[str, BenchmarkResult],
+                     threshold: float = REGRESSION_THRESHOLD) -> list[Regression]:
+    """
+    Compares each result with the result of the same case in the baseline, cases missing in the baseline are
+    ignored. Lower ticks/second as well as higher peak RSS or history bytes per tick are worse.
+
+    :param threshold: relative change beyond which a metric counts as regression, e.g. 0.2 for 20%
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.case.key)
+        if previous is None:
+            continue
+
+        for metric, higher_is_better in (("ticks_per_second", True), ("peak_rss_bytes", False),
+                                         ("history_bytes_per_tick", False)):
+            regression = Regression(result.case.key, metric, getattr(previous, metric), getattr(result, metric))
+            if (-regression.change if higher_is_better else regression.change) > threshold:
+                regressions.append(regression)
+    return regressions
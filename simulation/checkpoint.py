@@ -0,0 +1,153 @@
+import copy
+import gzip
+import logging
+import math
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from simulation.environment import Environment
+from simulation.history import VehicleHistory
+from simulation.replay import LapReplay
+from simulation.track import Track
+from simulation.vehicle import Vehicle
+
+if TYPE_CHECKING:
+    from simulation.simulation import Simulation
+
+CHECKPOINT_VERSION = 3
+CHECKPOINT_SUFFIX = ".checkpoint.gz"
+
+log = logging.getLogger(__name__)
+
+
+class IncompatibleCheckpointError(Exception):
+    pass
+
+
+@dataclass
+class Checkpoint:
+    """
+    State of a simulation at one point in time, including its history up to that point. Restoring creates an
+    independent simulation each time, so several what-if branches can fork from the same checkpoint.
+    """
+    time: float
+    max_runtime_seconds: float
+    track: Track
+    vehicles: list[Vehicle]
+    history: VehicleHistory
+    simulation_class: type
+    lap_replay: bool = False
+    version: int = field(default=CHECKPOINT_VERSION)
+
+    @staticmethod
+    def of(simulation: "Simulation", time: float = None) -> "Checkpoint":
+        """
+        :param time: any recorded time of the simulation, defaults to its current time
+        """
+        history = simulation.vehicle_history
+        if time is None or time == simulation.time:
+            time = simulation.time
+            vehicles = list(simulation.vehicles)
+        else:
+            vehicles = list(history[time])
+
+        return Checkpoint(
+            time=time,
+            max_runtime_seconds=simulation.max_runtime_seconds,
+            track=simulation.environment.track,
+            vehicles=vehicles,
+            history=history.until(time),
+            simulation_class=type(simulation),
+            lap_replay=simulation.lap_replay is not None,
+        )
+
+    def restore(self, max_runtime_seconds: float = None) -> "Simulation":
+        """
+        :param max_runtime_seconds: to run a restored simulation longer or shorter than the original
+        :return: simulation continuing at the time of the checkpoint, ready to tick
+        """
+        # the track and its tiles are shared, everything else is copied so forks don't influence each other
+        shared = {id(shared): shared for shared in (self.track, *self.track.tiles)}
+        vehicles, history = copy.deepcopy((self.vehicles, self.history), shared)
+
+        simulation = self.simulation_class(vehicles, Environment(self.track),
+                                           max_runtime_seconds or self.max_runtime_seconds)
+        if self.lap_replay:
+            simulation.lap_replay = LapReplay(len(vehicles))
+        simulation.time = self.time
+        simulation.vehicle_history = history
+        simulation.setup()
+        return simulation
+
+    def to_bytes(self) -> bytes:
+        return gzip.compress(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "Checkpoint":
+        try:
+            checkpoint = pickle.loads(gzip.decompress(data))
+        except Exception as e:
+            # checkpoints of older versions may not even unpickle, e.g. once a class gained __slots__
+            raise IncompatibleCheckpointError(f"Checkpoint can't be read: {e}") from e
+        if getattr(checkpoint, "version", None) != CHECKPOINT_VERSION:
+            raise IncompatibleCheckpointError(
+                f"Checkpoint version {getattr(checkpoint, 'version', None)}, expected {CHECKPOINT_VERSION}")
+        return checkpoint
+
+    def save(self, path: Path | str):
+        Path(path).write_bytes(self.to_bytes())
+
+    @staticmethod
+    def load(path: Path | str) -> "Checkpoint":
+        return Checkpoint.from_bytes(Path(path).read_bytes())
+
+
+@dataclass
+class CheckpointWriter:
+    """
+    Writes a checkpoint to the directory at every multiple of interval_seconds of simulated time, keeping only the
+    latest few.
+    """
+    directory: Path
+    interval_seconds: float = 60 * 60
+    keep: int = 3
+    next_time: float = field(default=None, init=False)
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+
+    def maybe_write(self, simulation: "Simulation") -> Path | None:
+        if self.next_time is None:
+            self.next_time = self._following_interval(simulation.time)
+        if simulation.time < self.next_time:
+            return None
+
+        self.next_time = self._following_interval(simulation.time)
+        return self.write(simulation)
+
+    def _following_interval(self, time: float) -> float:
+        return (math.floor(time / self.interval_seconds) + 1) * self.interval_seconds
+
+    def write(self, simulation: "Simulation") -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"checkpoint-{round(simulation.time):09d}{CHECKPOINT_SUFFIX}"
+        Checkpoint.of(simulation).save(path)
+        log.info(f"Wrote checkpoint at {simulation.time}s to {path}")
+
+        for outdated in checkpoint_paths(self.directory)[:-self.keep]:
+            outdated.unlink()
+        return path
+
+
+def checkpoint_paths(directory: Path | str) -> list[Path]:
+    """
+    :return: all checkpoints in the directory, oldest first
+    """
+    return sorted(Path(directory).glob(f"checkpoint-*{CHECKPOINT_SUFFIX}"))
+
+
+def latest_checkpoint(directory: Path | str) -> Checkpoint | None:
+    paths = checkpoint_paths(directory)
+    return Checkpoint.load(paths[-1]) if paths else None
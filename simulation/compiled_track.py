@@ -0,0 +1,247 @@
+import os
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass, astuple
+from functools import cached_property
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from simulation.position import Position
+from simulation.tile import Tile, StraightTile, CornerTile, PolylineTile, Direction
+from simulation.units import DISTANCE_PRECISION, PROGRESS_PERCENTAGE_PRECISION
+
+TRACK_FILE_MAGIC = b"ERSTRACK"
+TRACK_FILE_VERSION = 2
+TRACK_FILE_SUFFIX = ".track"
+# magic, version, tile count, length of the utf-8 encoded name following the header
+TRACK_FILE_HEADER = struct.Struct("<8sIII")
+TRACK_FILE_ALIGNMENT = 8
+STRAIGHT, CORNER, POLYLINE = 0, 1, 2
+TILE_RECORD = np.dtype([
+    ("kind", "<u1"),  # STRAIGHT, CORNER or POLYLINE
+    ("direction", "<i1"),  # value of the Direction of a corner
+    ("origin", "<f8", 4),  # x, y, z, orientation
+    ("destination", "<f8", 4),
+    ("width", "<f8"),
+    ("length", "<f8"),  # of a straight
+    ("alpha", "<f8"),  # of a corner
+    ("inner_radius", "<f8"),  # of a corner
+    ("path_length", "<f8"),
+    ("points_start", "<u8"),  # of a polyline, index of its first point in the points following the distances
+    ("points_count", "<u8"),
+], align=True)
+
+
+class TileNotPartOfTrackError(Exception):
+    pass
+
+
+class InvalidTrackFileError(Exception):
+    pass
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledTrack:
+    """
+    Lookup tables of a track, built once from its tiles so locating a distance on the track does not need to walk
+    the tiles. All distances are measured along the "ideal" path starting at the origin of the first tile.
+    """
+    tiles: tuple[Tile, ...]
+    tile_indices: dict[int, int]
+    path_lengths: tuple[float, ...]
+    cumulative_distances: tuple[float, ...]
+    successors: tuple[int, ...]
+
+    @classmethod
+    def from_tiles(cls, tiles: list[Tile]) -> Self:
+        path_lengths = tuple(tile.path_length() for tile in tiles)
+
+        cumulative_distances = [0.0]
+        for path_length in path_lengths:
+            cumulative_distances.append(round(cumulative_distances[-1] + path_length, DISTANCE_PRECISION))
+
+        return cls(
+            tiles=tuple(tiles),
+            tile_indices={id(tile): index for index, tile in enumerate(tiles)},
+            path_lengths=path_lengths,
+            cumulative_distances=tuple(cumulative_distances),
+            successors=tuple((index + 1) % len(tiles) for index in range(len(tiles))),
+        )
+
+    @classmethod
+    def from_arrays(cls, tiles: list[Tile], path_lengths: np.ndarray, cumulative_distances: np.ndarray) -> Self:
+        """
+        Compiles with already known lengths. The arrays, e.g. memory mapped, become path_length_array and
+        cumulative_distance_array without being copied. The scalar lookups resolve and distance_at work on tuple
+        copies of both instead, private to each process, as indexing a tuple is several times faster than indexing an
+        array for single values.
+        """
+        compiled = cls(
+            tiles=tuple(tiles),
+            tile_indices={id(tile): index for index, tile in enumerate(tiles)},
+            path_lengths=tuple(path_lengths.tolist()),
+            cumulative_distances=tuple(cumulative_distances.tolist()),
+            successors=tuple((index + 1) % len(tiles) for index in range(len(tiles))),
+        )
+        # fill the cached properties, they would otherwise be copied from the tuples
+        compiled.__dict__.update(path_length_array=path_lengths, cumulative_distance_array=cumulative_distances)
+        return compiled
+
+    def write(self, path: str | Path, name: str):
+        """
+        Writes the tiles including their geometry and the lookup tables to a binary track file: a header, the name,
+        one TILE_RECORD per tile, the cumulative distances and the points of all polylines, all little endian and
+        aligned for memory mapping.
+        """
+        records = np.zeros(len(self.tiles), dtype=TILE_RECORD)
+        points = []
+        points_count = 0
+        for record, tile, path_length in zip(records, self.tiles, self.path_lengths):
+            record["origin"] = astuple(tile.origin)
+            record["destination"] = astuple(tile.get_destination())
+            record["width"] = tile.width
+            record["path_length"] = path_length
+            if isinstance(tile, StraightTile):
+                record["kind"], record["length"] = STRAIGHT, tile.length
+            elif isinstance(tile, CornerTile):
+                record["kind"], record["direction"] = CORNER, tile.direction.value
+                record["alpha"], record["inner_radius"] = tile.alpha, tile.inner_radius
+            elif isinstance(tile, PolylineTile):
+                record["kind"] = POLYLINE
+                record["points_start"], record["points_count"] = points_count, len(tile.points)
+                points.append(tile.points)
+                points_count += len(tile.points)
+            else:
+                raise InvalidTrackFileError(f"Tiles of type {type(tile).__name__} can not be written to track files")
+
+        encoded_name = name.encode()
+        with open(path, "wb") as file:
+            file.write(TRACK_FILE_HEADER.pack(TRACK_FILE_MAGIC, TRACK_FILE_VERSION, len(self.tiles), len(encoded_name)))
+            file.write(encoded_name)
+            file.write(bytes(-file.tell() % TRACK_FILE_ALIGNMENT))
+            file.write(records.tobytes())
+            file.write(np.asarray(self.cumulative_distances, dtype="<f8").tobytes())
+            if points:
+                file.write(np.concatenate(points).astype("<f8").tobytes())
+
+    @classmethod
+    def read(cls, path: str | Path) -> tuple[str, Self]:
+        """
+        Reads a track file written by write. Its tables are memory mapped read-only rather than read, so processes
+        loading the same file share a single copy in the page cache. Tiles get their stored geometry, nothing is
+        computed again, polylines use the mapped points as they are.
+
+        :return: tuple of name of the track / compiled track
+        """
+        with open(path, "rb") as file:
+            header = file.read(TRACK_FILE_HEADER.size)
+            if len(header) < TRACK_FILE_HEADER.size or not header.startswith(TRACK_FILE_MAGIC):
+                raise InvalidTrackFileError(f"{path} is no track file")
+            _, version, count, name_length = TRACK_FILE_HEADER.unpack(header)
+            if version != TRACK_FILE_VERSION:
+                raise InvalidTrackFileError(f"Track file version {version}, expected {TRACK_FILE_VERSION}")
+            name = file.read(name_length).decode()
+
+        offset = TRACK_FILE_HEADER.size + name_length
+        offset += -offset % TRACK_FILE_ALIGNMENT
+        size = os.path.getsize(path)
+        tables_size = count * TILE_RECORD.itemsize + (count + 1) * 8
+        if size < offset + tables_size:
+            raise InvalidTrackFileError(f"{path} is truncated, {size} bytes but {count} tiles need at least "
+                                        f"{offset + tables_size}")
+        records = np.memmap(path, dtype=TILE_RECORD, mode="r", offset=offset, shape=(count,))
+        cumulative_distances = np.memmap(path, dtype="<f8", mode="r", offset=offset + records.nbytes,
+                                         shape=(count + 1,))
+        points_count = int((records["points_start"] + records["points_count"]).max(initial=0))
+        if size != offset + tables_size + points_count * 2 * 8:
+            raise InvalidTrackFileError(f"{path} is corrupt, {size} bytes but its tiles need "
+                                        f"{offset + tables_size + points_count * 2 * 8}")
+        if not np.isin(records["kind"], (STRAIGHT, CORNER, POLYLINE)).all():
+            raise InvalidTrackFileError(f"{path} is corrupt, it contains tiles of unknown kind")
+        points = np.memmap(path, dtype="<f8", mode="r", offset=offset + records.nbytes + cumulative_distances.nbytes,
+                           shape=(points_count, 2)) if points_count else None
+
+        tiles = []
+        for record in records.tolist():
+            kind, direction, origin, destination, width, length, alpha, inner_radius, path_length, points_start, \
+                points_length = record
+            rise = destination[2] - origin[2]
+            if kind == STRAIGHT:
+                tile = StraightTile(Position(*origin), length, width, rise)
+            elif kind == POLYLINE:
+                tile = PolylineTile(Position(*origin), points[points_start:points_start + points_length], width, rise)
+            else:
+                tile = CornerTile(Position(*origin), alpha, inner_radius, Direction(direction), width, rise)
+            tile.cache_geometry("get_destination", Position(*destination))
+            tile.cache_geometry("path_length", path_length)
+            tiles.append(tile)
+
+        return name, cls.from_arrays(tiles, records["path_length"], cumulative_distances)
+
+    def __reduce__(self):
+        # tile_indices is keyed by object ids, which are only valid within this process
+        return CompiledTrack.from_tiles, (list(self.tiles),)
+
+    @property
+    def total_length(self) -> float:
+        return self.cumulative_distances[-1]
+
+    @cached_property
+    def cumulative_distance_array(self) -> np.ndarray:
+        return np.array(self.cumulative_distances, dtype=np.float64)
+
+    @cached_property
+    def path_length_array(self) -> np.ndarray:
+        return np.array(self.path_lengths, dtype=np.float64)
+
+    def index_of(self, tile: Tile) -> int:
+        try:
+            return self.tile_indices[id(tile)]
+        except KeyError:
+            raise TileNotPartOfTrackError()
+
+    def distance_at(self, index: int, progress: float) -> float:
+        """
+        :return: distance from the start of the lap to the given progress on the tile at index
+        """
+        return round(self.cumulative_distances[index] + progress / 100 * self.path_lengths[index], DISTANCE_PRECISION)
+
+    def resolve(self, distance: float) -> tuple[int, int, float]:
+        """
+        :param distance: absolute distance from the start of the first lap, may span multiple laps
+        :return: tuple of completed laps / tile index / progress on that tile
+        """
+        lap, lap_distance = divmod(distance, self.total_length)
+        lap = int(lap)
+        lap_distance = round(lap_distance, DISTANCE_PRECISION)
+        if lap_distance >= self.total_length:
+            lap, lap_distance = lap + 1, 0.0
+
+        index = bisect_right(self.cumulative_distances, lap_distance) - 1
+        progress = round((lap_distance - self.cumulative_distances[index]) / self.path_lengths[index] * 100,
+                         PROGRESS_PERCENTAGE_PRECISION)
+        return lap, index, progress
+
+    def resolve_many(self, distances: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized version of resolve for an array of absolute distances.
+        """
+        laps, lap_distances = np.divmod(distances, self.total_length)
+        lap_distances = np.round(lap_distances, DISTANCE_PRECISION)
+        wrapped = lap_distances >= self.total_length
+        laps = np.where(wrapped, laps + 1, laps).astype(np.int64)
+        lap_distances = np.where(wrapped, 0.0, lap_distances)
+
+        indices = np.searchsorted(self.cumulative_distance_array, lap_distances, side="right") - 1
+        progress = np.round((lap_distances - self.cumulative_distance_array[indices])
+                            / self.path_length_array[indices] * 100, PROGRESS_PERCENTAGE_PRECISION)
+        return laps, indices, progress
+
+    def distance_at_many(self, indices: np.ndarray, progress: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of distance_at.
+        """
+        return np.round(self.cumulative_distance_array[indices] + progress / 100 * self.path_length_array[indices],
+                        DISTANCE_PRECISION)
@@ -0,0 +1,130 @@
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import accumulate
+from typing import Self
+
+import numpy as np
+
+from simulation.compiled_track import CompiledTrack
+
+# m, largest difference between the height at the start and at the end of a lap
+ELEVATION_TOLERANCE = 0.01
+
+
+class ElevationDoesNotCloseError(Exception):
+    pass
+
+
+@dataclass(frozen=True, eq=False)
+class ElevationProfile:
+    """
+    Height along one lap, computed once per track from the rise of its tiles. The grade is constant on each tile,
+    so the height gained or lost between two distances is a lookup in the cumulative ascents and descents.
+    """
+    distances: tuple[float, ...]  # at the start of each tile, followed by the total length
+    elevations: tuple[float, ...]  # at distances
+    grades: tuple[float, ...]  # per tile, height gained per meter
+    ascents: tuple[float, ...]  # height gained from the start of the lap up to distances
+    descents: tuple[float, ...]  # height lost from the start of the lap up to distances
+
+    @classmethod
+    def from_track(cls, compiled: CompiledTrack) -> Self:
+        rises = [tile.rise for tile in compiled.tiles]
+        # otherwise the height would jump at the finish line and every lap would charge the net climb again
+        if abs(sum(rises)) > ELEVATION_TOLERANCE:
+            raise ElevationDoesNotCloseError(f"Lap ends {sum(rises):.3f}m above its start, the rises must sum up to 0")
+        return cls(
+            distances=compiled.cumulative_distances,
+            elevations=tuple(accumulate(rises, initial=compiled.tiles[0].origin.z)),
+            grades=tuple(rise / length if length > 0 else 0.0 for rise, length in zip(rises, compiled.path_lengths)),
+            ascents=tuple(accumulate((max(rise, 0.0) for rise in rises), initial=0.0)),
+            descents=tuple(accumulate((max(-rise, 0.0) for rise in rises), initial=0.0)),
+        )
+
+    @property
+    def total_length(self) -> float:
+        return self.distances[-1]
+
+    @cached_property
+    def is_flat(self) -> bool:
+        return not any(self.grades)
+
+    @cached_property
+    def _arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: tuple of distances / grades / ascents / descents as arrays
+        """
+        return np.array(self.distances), np.array(self.grades), np.array(self.ascents), np.array(self.descents)
+
+    @cached_property
+    def grade_changes(self) -> tuple[float, ...]:
+        """
+        :return: distances on the lap at which the grade changes, including the start if it differs from the end
+        """
+        previous_grades = self.grades[-1:] + self.grades[:-1]
+        return tuple(distance for distance, grade, previous in zip(self.distances, self.grades, previous_grades)
+                     if grade != previous)
+
+    def distance_to_grade_change(self, distance: float) -> float:
+        """
+        :param distance: on the lap
+        :return: distance to drive until the grade changes next, infinite if it never does
+        """
+        if not self.grade_changes:
+            return math.inf
+        index = bisect_right(self.grade_changes, distance)
+        if index < len(self.grade_changes):
+            return self.grade_changes[index] - distance
+        return self.grade_changes[0] + self.total_length - distance
+
+    def _tile_index(self, lap_distance: float) -> int:
+        return min(bisect_right(self.distances, lap_distance) - 1, len(self.grades) - 1)
+
+    def grade_at(self, distance: float) -> float:
+        """
+        :param distance: on the lap
+        """
+        return self.grades[self._tile_index(distance)]
+
+    def elevation_at(self, distance: float) -> float:
+        """
+        :param distance: on the lap
+        """
+        index = self._tile_index(distance)
+        return self.elevations[index] + self.grades[index] * (distance - self.distances[index])
+
+    def climb(self, start: float, end: float) -> tuple[float, float]:
+        """
+        :param start: distance on the lap
+        :param end: distance after start, may be on one of the following laps
+        :return: tuple of height gained / height lost between both distances
+        """
+        start_ascent, start_descent = self._cumulative_climb(start)
+        end_ascent, end_descent = self._cumulative_climb(end)
+        return end_ascent - start_ascent, end_descent - start_descent
+
+    def _cumulative_climb(self, distance: float) -> tuple[float, float]:
+        laps, lap_distance = divmod(distance, self.total_length)
+        index = self._tile_index(lap_distance)
+        rest = lap_distance - self.distances[index]
+        grade = self.grades[index]
+        return (laps * self.ascents[-1] + self.ascents[index] + max(grade, 0.0) * rest,
+                laps * self.descents[-1] + self.descents[index] + max(-grade, 0.0) * rest)
+
+    def climb_many(self, starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of climb.
+        """
+        start_ascents, start_descents = self._cumulative_climb_many(starts)
+        end_ascents, end_descents = self._cumulative_climb_many(ends)
+        return end_ascents - start_ascents, end_descents - start_descents
+
+    def _cumulative_climb_many(self, distances: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        tile_distances, grades, ascents, descents = self._arrays
+        laps, lap_distances = np.divmod(distances, self.total_length)
+        indices = np.minimum(np.searchsorted(tile_distances, lap_distances, side="right") - 1, len(self.grades) - 1)
+        rest = lap_distances - tile_distances[indices]
+        return (laps * ascents[-1] + ascents[indices] + np.maximum(grades[indices], 0.0) * rest,
+                laps * descents[-1] + descents[indices] + np.maximum(-grades[indices], 0.0) * rest)
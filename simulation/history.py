@@ -0,0 +1,176 @@
+import dataclasses
+from collections.abc import Mapping, Sequence, Iterator
+
+import numpy as np
+
+from simulation.base import TickableDelta
+from simulation.track import Track, TrackLocation
+from simulation.vehicle import Vehicle
+
+INITIAL_CAPACITY = 1024
+
+FIELDS = ("speed", "speed_delta", "acceleration", "energy_stored", "energy_used", "energy_delta", "distance",
+          "distance_delta", "lap", "lap_delta", "tile_index", "progress")
+FIELD_INDEX = {name: index for index, name in enumerate(FIELDS)}
+
+
+class HistoryIsAppendOnlyError(Exception):
+    pass
+
+
+def row_of(vehicle: Vehicle) -> tuple[float, ...]:
+    """
+    :return: the values of a vehicle in the order of FIELDS
+    """
+    delta = vehicle.delta_input
+    location = vehicle.location
+    return (vehicle.current_speed, delta.speed_delta, delta.acceleration, vehicle.energy_stored, vehicle.energy_used,
+            delta.energy_delta, vehicle.distance_driven, delta.distance_delta, vehicle.lap_counter, delta.delta_lap,
+            location.tile_index if location else -1, location.progress if location else 0.0)
+
+
+class VehicleHistory(Mapping):
+    """
+    Columnar history of all vehicles: one preallocated array of shape (ticks, vehicles, fields), doubled in size
+    whenever it runs full. Behaves like the former dict of time -> list of vehicles, but a point in time is only
+    turned back into Vehicle objects when it is accessed.
+    """
+
+    def __init__(self, vehicles: list[Vehicle], track: Track, capacity: int = INITIAL_CAPACITY):
+        self.track = track
+        self.vehicles: list[Vehicle] = list(vehicles)
+        self._length = 0
+        self.revision = 0  # incremented whenever a recorded entry is replaced, appending leaves it as it is
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._data = np.empty((capacity, len(vehicles), len(FIELDS)), dtype=np.float64)
+
+    def __setitem__(self, time: float, vehicles: list[Vehicle]):
+        self.vehicles = list(vehicles)
+        self.append(time, [row_of(vehicle) for vehicle in vehicles])
+
+    def append(self, time: float, rows: Sequence[Sequence[float]] | np.ndarray):
+        """
+        Record the state of all vehicles at the given time, one row per vehicle with values in the order of FIELDS.
+        Recording the last time again replaces that entry.
+        """
+        if self._length > 0 and time <= self._times[self._length - 1]:
+            if time < self._times[self._length - 1]:
+                raise HistoryIsAppendOnlyError(f"Cannot record {time}s before {self._times[self._length - 1]}s")
+            self._length -= 1
+            self.revision += 1
+
+        if self._length == len(self._times):
+            self._grow()
+
+        self._times[self._length] = time
+        self._data[self._length] = rows
+        self._length += 1
+
+    def _grow(self):
+        capacity = max(len(self._times) * 2, INITIAL_CAPACITY)
+        self._times = np.resize(self._times, capacity)
+        self._data = np.resize(self._data, (capacity, *self._data.shape[1:]))
+
+    def __getitem__(self, time: float) -> "HistoryFrame":
+        return HistoryFrame(self, self.index_of(time))
+
+    def index_of(self, time: float) -> int:
+        index = int(np.searchsorted(self.times, time))
+        if index == self._length or self._times[index] != time:
+            raise KeyError(time)
+        return index
+
+    def until(self, time: float) -> "VehicleHistory":
+        """
+        :return: independent copy of the history up to and including the given time
+        """
+        length = self.index_of(time) + 1
+        history = VehicleHistory(self.vehicles, self.track, capacity=max(length, INITIAL_CAPACITY))
+        history._times[:length] = self._times[:length]
+        history._data[:length] = self._data[:length]
+        history._length = length
+        return history
+
+    def __getstate__(self) -> dict:
+        # only the recorded part, not the spare capacity
+        state = self.__dict__.copy()
+        state["_times"] = self.times.copy()
+        state["_data"] = self._data[:self._length].copy()
+        return state
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.times.tolist())
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times[:self._length]
+
+    def column(self, name: str, vehicle_index: int = None) -> np.ndarray:
+        """
+        :return: view on all recorded values of a field, for all vehicles or just the one at vehicle_index
+        """
+        column = self._data[:self._length, :, FIELD_INDEX[name]]
+        return column if vehicle_index is None else column[:, vehicle_index]
+
+    def energy_used_per_distance(self, vehicle_index: int, rows: slice = slice(None)) -> np.ndarray:
+        distance = self.column("distance", vehicle_index)[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(distance > 0, self.column("energy_used", vehicle_index)[rows] / distance, np.inf)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: bytes allocated, including the capacity not recorded yet
+        """
+        return self._times.nbytes + self._data.nbytes
+
+    @property
+    def recorded_nbytes(self) -> int:
+        """
+        :return: bytes of the recorded rows only
+        """
+        return self.times.nbytes + self._data[:self._length].nbytes
+
+    def vehicle_at(self, index: int, vehicle_index: int) -> Vehicle:
+        values = dict(zip(FIELDS, self._data[index, vehicle_index].tolist()))
+
+        tile_index = int(values["tile_index"])
+        location = TrackLocation(self.track, self.track.compiled.tiles[tile_index], values["progress"]) \
+            if tile_index >= 0 else None
+
+        return dataclasses.replace(
+            self.vehicles[vehicle_index],
+            energy_stored=values["energy_stored"],
+            energy_used=values["energy_used"],
+            location=location,
+            current_speed=values["speed"],
+            distance_driven=values["distance"],
+            lap_counter=int(values["lap"]),
+            delta_input=TickableDelta(values["speed_delta"], values["acceleration"], values["energy_delta"],
+                                      values["distance_delta"], location, int(values["lap_delta"])),
+        )
+
+
+class HistoryFrame(Sequence):
+    """
+    All vehicles at one recorded point in time, created lazily from the columns of the history.
+    """
+
+    def __init__(self, history: VehicleHistory, index: int):
+        self.history = history
+        self.index = index
+
+    @property
+    def time(self) -> float:
+        return self.history.times[self.index].item()
+
+    def __getitem__(self, vehicle_index: int) -> Vehicle:
+        if not -len(self) <= vehicle_index < len(self):
+            raise IndexError(vehicle_index)
+        return self.history.vehicle_at(self.index, vehicle_index % len(self))
+
+    def __len__(self) -> int:
+        return len(self.history.vehicles)
@@ -0,0 +1,242 @@
+import math
+from dataclasses import dataclass, field
+from enum import Enum
+
+from simulation.elevation import ElevationProfile
+from simulation.physics import energy_for_constant_acceleration, energy_for_climb, VehicleParameters, \
+    DEFAULT_VEHICLE_PARAMETERS
+from simulation.track import Track
+from simulation.units import convert_seconds_to_hours
+from simulation.vehicle import Vehicle, STANDBY_POWER
+
+ENERGY_SOLVER_ITERATIONS = 60
+
+
+class PhaseKind(Enum):
+    ACCELERATING = "accelerating"
+    CRUISING = "cruising"
+    BRAKING = "braking"
+
+
+@dataclass(frozen=True)
+class Phase:
+    kind: PhaseKind
+    start_speed: float
+    end_speed: float
+    duration: float
+    distance: float
+    start_distance: float = 0.0  # on the lap
+    elevation: ElevationProfile = None  # of the track, None if it is flat
+    parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS
+
+    @property
+    def acceleration(self) -> float:
+        return (self.end_speed - self.start_speed) / self.duration if self.duration > 0 else 0.0
+
+    def speed_after(self, seconds: float) -> float:
+        return self.start_speed + self.acceleration * seconds
+
+    def distance_after(self, seconds: float) -> float:
+        return self.start_speed * seconds + self.acceleration * seconds ** 2 / 2
+
+    def energy_after(self, seconds: float) -> float:
+        """
+        :return: energy used in Wh within the first seconds of the phase, same rules as Vehicle.calculate_delta:
+        driving power while accelerating or cruising, standby power only while braking, plus the energy for the
+        grade in any case
+        """
+        if self.kind == PhaseKind.BRAKING:
+            energy = STANDBY_POWER * seconds
+        else:
+            energy = energy_for_constant_acceleration(self.start_speed, self.speed_after(seconds), seconds,
+                                                      self.parameters)
+        if self.elevation is not None:
+            energy += energy_for_climb(*self.elevation.climb(self.start_distance,
+                                                             self.start_distance + self.distance_after(seconds)),
+                                       self.parameters)
+        return convert_seconds_to_hours(energy)
+
+    @property
+    def energy(self) -> float:
+        return self.energy_after(self.duration)
+
+
+@dataclass(frozen=True)
+class LapSummary:
+    entry_speed: float
+    exit_speed: float
+    phases: tuple[Phase, ...]
+    time: float = field(init=False)
+    distance: float = field(init=False)
+    energy: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "time", sum(phase.duration for phase in self.phases))
+        object.__setattr__(self, "distance", sum(phase.distance for phase in self.phases))
+        object.__setattr__(self, "energy", sum(phase.energy for phase in self.phases))
+
+    @property
+    def is_steady(self) -> bool:
+        return math.isclose(self.entry_speed, self.exit_speed, abs_tol=1e-9)
+
+
+@dataclass
+class PhaseRunSummary:
+    time: float = 0.0
+    laps: int = 0
+    distance_driven: float = 0.0
+    energy_used: float = 0.0
+    energy_stored: float = 0.0
+    current_speed: float = 0.0
+    distinct_laps: int = 0
+
+
+class PhaseIntegrator:
+    """
+    Computes laps analytically instead of ticking: between speed limit changes the vehicle accelerates with its
+    maximum acceleration, cruises at its limit and brakes with the same rate just in time for the next limit.
+    This is the ideal driving line of the lookahead in Vehicle.calculate_delta, without its safety factors.
+
+    Laps are cached by entry speed, from the second lap on a vehicle usually enters with the same speed, so a run
+    only computes the few distinct laps and multiplies the steady one.
+    """
+
+    def __init__(self, vehicle: Vehicle, track: Track):
+        self.vehicle = vehicle
+        self.acceleration = vehicle.max_acceleration
+        profile = track.speed_limit_profile(vehicle.tire_friction_coefficient, vehicle.height, vehicle.track_width)
+
+        self.segment_lengths = [end - start for start, end in
+                                zip(profile.distances, profile.distances[1:] + (profile.total_length,))]
+        self.segment_speeds = [min(speed_limit, vehicle.max_speed) for speed_limit in profile.speed_limits]
+        self.exit_speed_limits = self._exit_speed_limits()
+        self.elevation = None if track.elevation_profile.is_flat else track.elevation_profile
+        self._laps: dict[float, LapSummary] = {}
+
+    def _exit_speed_limits(self) -> list[float]:
+        """
+        Backward pass over the segments: the highest speed at the end of each segment which still allows braking
+        down to every following limit. Done over two laps to include the start of the next lap.
+        """
+        segments = len(self.segment_speeds)
+        entry_speed_limits = list(self.segment_speeds)
+        exit_speed_limits = [0.0] * segments
+
+        for index in reversed(range(2 * segments)):
+            index %= segments
+            exit_speed_limits[index] = entry_speed_limits[(index + 1) % segments]
+            entry_speed_limits[index] = min(self.segment_speeds[index], math.sqrt(
+                exit_speed_limits[index] ** 2 + 2 * self.acceleration * self.segment_lengths[index]))
+
+        return exit_speed_limits
+
+    def lap(self, entry_speed: float) -> LapSummary:
+        lap = self._laps.get(entry_speed)
+        if lap is None:
+            lap = self._laps[entry_speed] = self._integrate_lap(entry_speed)
+        return lap
+
+    def _integrate_lap(self, entry_speed: float) -> LapSummary:
+        phases = []
+        speed = entry_speed
+        distance = 0.0
+        for length, speed_limit, exit_speed_limit in zip(self.segment_lengths, self.segment_speeds,
+                                                        self.exit_speed_limits):
+            exit_speed = min(exit_speed_limit, math.sqrt(speed ** 2 + 2 * self.acceleration * length))
+            peak_speed = min(speed_limit, math.sqrt((speed ** 2 + exit_speed ** 2) / 2 + self.acceleration * length))
+            peak_speed = max(peak_speed, speed, exit_speed)
+
+            accelerating_distance = (peak_speed ** 2 - speed ** 2) / (2 * self.acceleration)
+            braking_distance = (peak_speed ** 2 - exit_speed ** 2) / (2 * self.acceleration)
+            cruising_distance = max(length - accelerating_distance - braking_distance, 0.0)
+
+            if peak_speed > speed:
+                phases.append(Phase(PhaseKind.ACCELERATING, speed, peak_speed,
+                                    (peak_speed - speed) / self.acceleration, accelerating_distance, distance,
+                                    self.elevation, self.vehicle.parameters))
+            if cruising_distance > 0 and peak_speed > 0:
+                phases.append(Phase(PhaseKind.CRUISING, peak_speed, peak_speed, cruising_distance / peak_speed,
+                                    cruising_distance, distance + accelerating_distance, self.elevation,
+                                    self.vehicle.parameters))
+            if exit_speed < peak_speed:
+                phases.append(Phase(PhaseKind.BRAKING, peak_speed, exit_speed,
+                                    (peak_speed - exit_speed) / self.acceleration, braking_distance,
+                                    distance + length - braking_distance, self.elevation, self.vehicle.parameters))
+            speed = exit_speed
+            distance += length
+
+        return LapSummary(entry_speed, speed, tuple(phases))
+
+    def run(self, max_runtime_seconds: float) -> PhaseRunSummary:
+        summary = PhaseRunSummary(energy_stored=self.vehicle.energy_stored, current_speed=self.vehicle.current_speed)
+
+        while True:
+            lap = self.lap(summary.current_speed)
+            time_left = max_runtime_seconds - summary.time
+
+            if lap.is_steady and lap.energy > 0:
+                # energy has to stay positive during the whole lap, like the check at the beginning of each tick
+                laps = min(math.floor(time_left / lap.time), math.ceil(summary.energy_stored / lap.energy) - 1)
+            else:
+                laps = 1 if lap.time <= time_left and summary.energy_stored - lap.energy > 0 else 0
+
+            if laps <= 0:
+                break
+            self._add_laps(summary, lap, laps)
+
+        self._finish_partial_lap(summary, self.lap(summary.current_speed), max_runtime_seconds)
+        summary.distinct_laps = len(self._laps)
+        return summary
+
+    @staticmethod
+    def _add_laps(summary: PhaseRunSummary, lap: LapSummary, laps: int):
+        summary.time += lap.time * laps
+        summary.laps += laps
+        summary.distance_driven += lap.distance * laps
+        summary.energy_used += lap.energy * laps
+        summary.energy_stored -= lap.energy * laps
+        summary.current_speed = lap.exit_speed
+
+    def _finish_partial_lap(self, summary: PhaseRunSummary, lap: LapSummary, max_runtime_seconds: float):
+        for phase in lap.phases:
+            time_left = max_runtime_seconds - summary.time
+            if phase.duration <= time_left and summary.energy_stored - phase.energy > 0:
+                self._add_phase(summary, phase, phase.duration)
+                continue
+
+            duration = min(time_left, self._duration_until_energy_used(phase, summary.energy_stored))
+            self._add_phase(summary, phase, duration)
+            break
+
+        if summary.energy_stored <= 0:
+            # out of energy, brake to a standstill
+            speed = summary.current_speed
+            braking = Phase(PhaseKind.BRAKING, speed, 0.0, speed / self.acceleration,
+                            speed ** 2 / (2 * self.acceleration), summary.distance_driven, self.elevation,
+                            self.vehicle.parameters)
+            self._add_phase(summary, braking, min(braking.duration, max_runtime_seconds - summary.time))
+
+        summary.time = max_runtime_seconds
+
+    @staticmethod
+    def _add_phase(summary: PhaseRunSummary, phase: Phase, duration: float):
+        energy = phase.energy_after(duration)
+        summary.time += duration
+        summary.distance_driven += phase.distance_after(duration)
+        summary.energy_used += energy
+        summary.energy_stored -= energy
+        summary.current_speed = phase.speed_after(duration)
+
+    @staticmethod
+    def _duration_until_energy_used(phase: Phase, energy: float) -> float:
+        if phase.energy < energy:
+            return phase.duration
+
+        low, high = 0.0, phase.duration
+        for _ in range(ENERGY_SOLVER_ITERATIONS):
+            middle = (low + high) / 2
+            if phase.energy_after(middle) < energy:
+                low = middle
+            else:
+                high = middle
+        return high
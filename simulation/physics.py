@@ -1,18 +1,130 @@
-def power_for_velocity(velocity):
-    # calculate air resistance
-    roh = 1.2041
-    coefficient_of_drag = 0.23
-    area = 1.433 * 1.850  # from model 3 width * height
-    cw_a = coefficient_of_drag * area
-    force_air = cw_a * velocity * velocity / 2 * roh
+"""
+Energy model of a vehicle. All functions work on single values as well as on numpy arrays, e.g. the speeds of many
+vehicles at once, with VehicleParameters holding one value or an array of one value per vehicle, see stacked.
+"""
+from dataclasses import dataclass, field, fields
+from typing import Self
 
-    # calculate roll resistance
-    c_r = 0.012  # asphalt 0.011-0,015 according Wikipedia.
-    force_roll_resistance = c_r * 1950 * 9.81  # model 3 incl driver = 1,95t*g=F
+import numpy as np
 
-    # calculate power needed for specific velocity
-    return (force_air + force_roll_resistance) * velocity
+VEHICLE_MASS = 1950  # kg, model 3 incl driver
+GRAVITY = 9.81
+AIR_DENSITY = 1.2041  # kg/m³
+# share of the potential energy recovered on descents
+REGEN_EFFICIENCY = 0.6
 
 
-def power_for_velocity_change(delta_velocity):
-    pass
+@dataclass(frozen=True, slots=True)
+class VehicleParameters:
+    mass: float = VEHICLE_MASS  # kg
+    drag_coefficient: float = 0.23
+    frontal_area: float = 1.433 * 1.850  # m², from model 3 width * height
+    rolling_resistance_coefficient: float = 0.012  # asphalt 0.011-0,015 according Wikipedia.
+    drivetrain_efficiency: float = 1.0  # share of the power taken from the battery arriving at the wheels
+    regen_efficiency: float = REGEN_EFFICIENCY  # share of the power at the wheels recovered into the battery
+    air_density: float = AIR_DENSITY
+    # derived once instead of on every call
+    drag_factor: float = field(init=False)  # air resistance in N per (m/s)²
+    rolling_force: float = field(init=False)  # roll resistance in N
+
+    def __post_init__(self):
+        object.__setattr__(self, "drag_factor", self.drag_coefficient * self.frontal_area * self.air_density / 2)
+        object.__setattr__(self, "rolling_force", self.rolling_resistance_coefficient * self.mass * GRAVITY)
+
+    @classmethod
+    def stacked(cls, parameters: list[Self]) -> Self:
+        """
+        :return: parameters holding an array of one value per given parameters in each field
+        """
+        return cls(**{parameter.name: np.array([getattr(values, parameter.name) for values in parameters])
+                      for parameter in fields(cls) if parameter.init})
+
+
+DEFAULT_VEHICLE_PARAMETERS = VehicleParameters()
+
+
+def resistance_force(velocity, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: air and roll resistance in N
+    """
+    return parameters.drag_factor * velocity * velocity + parameters.rolling_force
+
+
+def power_for_velocity(velocity, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: power in W needed at the wheels to keep the velocity
+    """
+    return resistance_force(velocity, parameters) * velocity
+
+
+def power_for_velocity_change(velocity, acceleration, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: power in W needed at the wheels for the acceleration at the velocity on top of keeping the velocity,
+    negative while decelerating
+    """
+    return parameters.mass * acceleration * velocity
+
+
+def power_for_grade(velocity, grade, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :param grade: height gained per meter driven, negative downhill
+    :return: power in W needed at the wheels against the grade, negative downhill
+    """
+    return parameters.mass * GRAVITY * grade * velocity
+
+
+def battery_power(wheel_power, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :param wheel_power: power in W at the wheels, negative if the vehicle is slowed down by the motor
+    :return: power in W taken from the battery, the drivetrain losses added, negative for the share recovered
+    """
+    if isinstance(wheel_power, np.ndarray) or isinstance(parameters.drivetrain_efficiency, np.ndarray):
+        return np.maximum(wheel_power, 0) / parameters.drivetrain_efficiency \
+            + np.minimum(wheel_power, 0) * parameters.regen_efficiency
+    # the ufuncs cost more than the whole remaining physics of a scalar tick on single floats
+    if wheel_power >= 0:
+        return wheel_power / parameters.drivetrain_efficiency
+    return wheel_power * parameters.regen_efficiency
+
+
+def driving_power(velocity, acceleration=0.0, grade=0.0, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: power in W taken from the battery while accelerating, cruising, braking with the motor or rolling
+    downhill, negative if energy is recovered
+    """
+    return battery_power(power_for_velocity(velocity, parameters)
+                         + power_for_velocity_change(velocity, acceleration, parameters)
+                         + power_for_grade(velocity, grade, parameters), parameters)
+
+
+def energy_for_climb(ascent, descent, parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :param ascent: height gained in m
+    :param descent: height lost in m
+    :return: energy in Ws taken from the battery against the grade, negative if more is recovered on the descents
+    """
+    potential_energy = parameters.mass * GRAVITY
+    return potential_energy * ascent / parameters.drivetrain_efficiency \
+        - potential_energy * descent * parameters.regen_efficiency
+
+
+def energy_for_velocity_change(start_velocity, end_velocity,
+                               parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: energy in Ws taken from the battery for the change of kinetic energy, negative for the share
+    recovered when slowing down with the motor
+    """
+    return battery_power(parameters.mass * (end_velocity ** 2 - start_velocity ** 2) / 2, parameters)
+
+
+def energy_for_constant_acceleration(start_velocity, end_velocity, duration,
+                                     parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS):
+    """
+    :return: energy in Ws taken from the battery against the resistance while the velocity changes linearly over
+    the duration in seconds. Simpson's rule is exact here as power_for_velocity is a cubic polynomial of the
+    velocity.
+    """
+    middle_velocity = (start_velocity + end_velocity) / 2
+    return duration / 6 * (power_for_velocity(start_velocity, parameters)
+                           + 4 * power_for_velocity(middle_velocity, parameters)
+                           + power_for_velocity(end_velocity, parameters)) / parameters.drivetrain_efficiency
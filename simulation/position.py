@@ -1,4 +1,5 @@
 import math
+from dataclasses import dataclass
 from typing import Self, Optional
 
 from simulation.units import DISTANCE_PRECISION
@@ -6,12 +7,12 @@ from simulation.units import DISTANCE_PRECISION
 
 # TODO: maybe move to cm or mm precision and avoid most float errors on positioning, currently rounding on calc
 
+@dataclass(frozen=True, slots=True)
 class Position:
-    def __init__(self, x=0, y=0, z=0, orientation=0):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.orientation = orientation
+    x: float = 0
+    y: float = 0
+    z: float = 0
+    orientation: float = 0
 
     @property
     def orientation_rad(self):
@@ -32,12 +33,6 @@ class Position:
             self.orientation if orientation is None else orientation,
         )
 
-    def __eq__(self, other):
-        if isinstance(other, Position):
-            return self.__dict__ == other.__dict__
-
-        return False
-
     def __str__(self):
         return f"Position: {self.x}x {self.y}y {self.z}z {self.orientation}deg"
 
@@ -0,0 +1,211 @@
+import functools
+import json
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Callable, Iterator
+
+from simulation.history import VehicleHistory
+from simulation.track import TrackLocation
+from simulation.vehicle import Vehicle
+
+MAX_TRACE_EVENTS = 1_000_000
+
+# phase -> method timed as that phase, lookahead and move are part of calculate_delta
+PHASES: dict[str, tuple[type, str]] = {
+    "calculate_delta": (Vehicle, "calculate_delta"),
+    "lookahead": (TrackLocation, "get_upcoming_max_speed_locations"),
+    "move": (TrackLocation, "advance"),  # TrackLocation.move delegates to advance
+    "derive": (Vehicle, "derive"),
+    "history": (VehicleHistory, "__setitem__"),
+}
+
+_installed: "TickProfiler" = None
+
+
+class ProfilerAlreadyInstalledError(Exception):
+    pass
+
+
+@dataclass
+class PhaseTiming:
+    calls: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, duration_ns: int):
+        self.calls += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+
+
+class TickProfiler:
+    """
+    Opt-in timing of the phases of each tick of a Simulation given this profiler. While installed, the methods of
+    PHASES are replaced by timed wrappers, which only record calls during a profiled tick on the same thread. Nothing
+    is wrapped otherwise, so a simulation without profiler runs at full speed.
+
+    Allocation tracking uses tracemalloc and slows down everything considerably, don't compare its timings with runs
+    without it.
+
+    Usage:
+        with TickProfiler() as profiler:
+            Simulation(vehicles, environment, profiler=profiler).loop()
+        print(profiler.summary())
+    """
+
+    def __init__(self, track_allocations: bool = False, trace: bool = False, max_trace_events: int = MAX_TRACE_EVENTS):
+        """
+        :param track_allocations: measure the memory allocated per tick
+        :param trace: keep every timed call for export as Chrome trace
+        """
+        self.track_allocations = track_allocations
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.phases: dict[str, PhaseTiming] = {phase: PhaseTiming() for phase in PHASES}
+        self.ticks = PhaseTiming()
+        self.allocated_bytes = 0
+        self.retained_bytes = 0
+        # (name, start / duration in ns, simulated time of the tick)
+        self.trace_events: list[tuple[str, int, int, float]] = []
+        self._originals: dict[str, Callable] = {}
+        self._started_tracemalloc = False
+        self._thread: int = None
+        self._tick_time: float = None
+
+    def install(self):
+        global _installed
+        if _installed is self:
+            return
+        if _installed is not None:
+            raise ProfilerAlreadyInstalledError("Only a single profiler can be installed at a time")
+
+        _installed = self
+        for phase, (owner, name) in PHASES.items():
+            original = self._originals[phase] = owner.__dict__[name]
+            setattr(owner, name, self._timed(phase, original))
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def uninstall(self):
+        global _installed
+        if _installed is not self:
+            return
+
+        for phase, (owner, name) in PHASES.items():
+            setattr(owner, name, self._originals.pop(phase))
+        _installed = None
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> "TickProfiler":
+        self.install()
+        return self
+
+    def __exit__(self, *exception):
+        self.uninstall()
+
+    def _timed(self, phase: str, function: Callable) -> Callable:
+        timing = self.phases[phase]
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if self._thread != threading.get_ident():
+                return function(*args, **kwargs)
+
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._record(phase, timing, start, perf_counter_ns() - start)
+
+        return timed
+
+    def _record(self, name: str, timing: PhaseTiming, start: int, duration: int):
+        timing.add(duration)
+        if self.trace and len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append((name, start, duration, self._tick_time))
+
+    @contextmanager
+    def tick(self, time: float) -> Iterator[None]:
+        """
+        Profiles everything within as a single tick at the given simulated time
+        """
+        self._thread, self._tick_time = threading.get_ident(), time
+        tracing = self.track_allocations and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record("tick", self.ticks, start, perf_counter_ns() - start)
+            if tracing:
+                memory_after, peak = tracemalloc.get_traced_memory()
+                self.allocated_bytes += peak - memory_before
+                self.retained_bytes += memory_after - memory_before
+            self._thread = None
+
+    @property
+    def ticks_per_second(self) -> float:
+        """
+        :return: ticks per second of time spent within ticks
+        """
+        return self.ticks.calls / (self.ticks.total_ns / 1e9) if self.ticks.total_ns else 0.0
+
+    @property
+    def allocated_bytes_per_tick(self) -> float:
+        """
+        :return: average peak of memory allocated during a tick
+        """
+        return self.allocated_bytes / self.ticks.calls if self.ticks.calls else 0.0
+
+    def summary(self) -> str:
+        """
+        :return: table of the time spent per phase
+        """
+        ticks = max(self.ticks.calls, 1)
+        tick_ns = max(self.ticks.total_ns, 1)
+        lines = [f"{'phase':<16}{'calls':>10}{'total ms':>12}{'µs/tick':>10}{'% tick':>8}{'max µs':>10}"]
+        for name, timing in [("tick", self.ticks), *self.phases.items()]:
+            lines.append(f"{name:<16}{timing.calls:>10}{timing.total_ns / 1e6:>12.1f}"
+                         f"{timing.total_ns / ticks / 1e3:>10.2f}{timing.total_ns / tick_ns * 100:>8.1f}"
+                         f"{timing.max_ns / 1e3:>10.1f}")
+
+        lines.append(f"ticks/second: {self.ticks_per_second:.1f}")
+        if self.track_allocations:
+            lines.append(f"allocated bytes/tick: {self.allocated_bytes_per_tick:.0f}, "
+                         f"retained bytes/tick: {self.retained_bytes / ticks:.0f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """
+        :return: trace events in the Chrome trace event format, e.g. for chrome://tracing or Perfetto
+        """
+        pid = os.getpid()
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [{
+                "name": name,
+                "cat": "simulation",
+                "ph": "X",
+                "ts": start / 1e3,
+                "dur": duration / 1e3,
+                "pid": pid,
+                "tid": 0,
+                "args": {"time": time},
+            } for name, start, duration, time in self.trace_events],
+        }
+
+    def write_chrome_trace(self, path: str | Path):
+        Path(path).write_text(json.dumps(self.chrome_trace()))
@@ -0,0 +1,176 @@
+import dataclasses
+import math
+from dataclasses import dataclass, field
+
+from simulation.base import TickableDelta
+from simulation.vehicle import Vehicle
+
+MAX_RECORDED_LAPS = 100
+
+
+def vehicle_parameters(vehicle: Vehicle) -> tuple:
+    return (vehicle.max_acceleration, vehicle.max_speed, vehicle.height, vehicle.track_width,
+            vehicle.tire_friction_coefficient)
+
+
+def lap_state_of(vehicle: Vehicle) -> tuple:
+    """
+    :return: everything that decides how the following laps are driven, apart from the stored energy
+    """
+    return vehicle.location.tile_index, vehicle.location.progress, vehicle.current_speed
+
+
+@dataclass(frozen=True)
+class CachedLaps:
+    """
+    All deltas between two finish line crossings in the same state. As the tick grid rarely lines up with the track
+    length this usually spans a few laps, which then repeat as long as the vehicle has energy.
+    """
+    parameters: tuple
+    deltas: tuple[TickableDelta, ...]
+    steps: tuple[float, ...]
+    laps: int = field(init=False)
+    energy: float = field(init=False)
+    distance: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "laps", sum(delta.delta_lap for delta in self.deltas))
+        object.__setattr__(self, "energy", sum(delta.energy_delta for delta in self.deltas))
+        object.__setattr__(self, "distance", sum(delta.distance_delta for delta in self.deltas))
+
+    @property
+    def ticks(self) -> int:
+        return len(self.deltas)
+
+    @property
+    def time(self) -> float:
+        return sum(self.steps)
+
+    @property
+    def uniform_step(self) -> float | None:
+        return self.steps[0] if all(step == self.steps[0] for step in self.steps) else None
+
+
+@dataclass
+class LapRecording:
+    parameters: tuple = None
+    lap_states: dict[tuple, int] = field(default_factory=dict)
+    deltas: list[TickableDelta] = field(default_factory=list)
+    steps: list[float] = field(default_factory=list)
+    cached: CachedLaps = None
+    cursor: int = 0
+
+    def reset(self, parameters: tuple = None):
+        self.parameters = parameters
+        self.lap_states = {}
+        self.deltas, self.steps = [], []
+        self.cached = None
+        self.cursor = 0
+
+
+class LapReplay:
+    """
+    Detects vehicles in a steady state: the location and speed at a finish line crossing repeat a previous crossing
+    with the same parameters. The deltas in between are replayed instead of calculated until the vehicle could run
+    out of energy within them, its parameters or the tick length change.
+    """
+
+    def __init__(self, vehicle_count: int):
+        self.recordings = [LapRecording() for _ in range(vehicle_count)]
+
+    def delta_for(self, index: int, vehicle: Vehicle, seconds_per_tick: float) -> TickableDelta | None:
+        recording = self.recordings[index]
+        cached = recording.cached
+        if cached is None:
+            return None
+
+        if seconds_per_tick != cached.steps[recording.cursor] \
+                or vehicle_parameters(vehicle) != cached.parameters \
+                or vehicle.energy_stored + cached.energy <= 0:
+            recording.reset()
+            return None
+
+        return cached.deltas[recording.cursor]
+
+    def record(self, index: int, vehicle: Vehicle, seconds_per_tick: float):
+        """
+        :param vehicle: the vehicle after applying the delta of this tick
+        """
+        recording = self.recordings[index]
+        if recording.cached is not None:
+            recording.cursor = (recording.cursor + 1) % recording.cached.ticks
+            return
+
+        parameters = vehicle_parameters(vehicle)
+        if parameters != recording.parameters:
+            recording.reset(parameters)
+
+        recording.deltas.append(vehicle.delta_input)
+        recording.steps.append(seconds_per_tick)
+        if vehicle.delta_input.delta_lap == 0:
+            return
+
+        lap_state = lap_state_of(vehicle)
+        start = recording.lap_states.get(lap_state)
+        if start is not None:
+            recording.cached = CachedLaps(parameters, tuple(recording.deltas[start:]), tuple(recording.steps[start:]))
+            recording.lap_states, recording.deltas, recording.steps = {}, [], []
+        elif len(recording.lap_states) >= MAX_RECORDED_LAPS:
+            recording.reset(parameters)
+        else:
+            recording.lap_states[lap_state] = len(recording.deltas)
+
+    def is_replaying(self, index: int) -> bool:
+        return self.recordings[index].cached is not None
+
+    def skip_laps(self, vehicles: list[Vehicle], time_left: float) -> tuple[float, list[Vehicle]] | None:
+        """
+        Extrapolates whole periods in which every moving vehicle only replays its cached laps and ends up in the same
+        state, apart from energy, time and counters. Vehicles standing still without energy don't change anymore. For
+        multiple moving vehicles all need the same fixed tick length, the period is the least common multiple of their
+        cached ticks.
+
+        :return: tuple of skipped time / vehicles after the skipped time, None if nothing can be skipped
+        """
+        moving = [(index, recording.cached) for index, recording in enumerate(self.recordings)
+                  if not _is_stopped(vehicles[index])]
+        if not moving:
+            return (time_left, list(vehicles)) if time_left > 0 else None
+        if not all(cached for _, cached in moving):
+            return None
+
+        if len(moving) == 1:
+            period_ticks, period_time = moving[0][1].ticks, moving[0][1].time
+        else:
+            steps = {cached.uniform_step for _, cached in moving}
+            if len(steps) != 1 or None in steps:
+                return None
+            period_ticks = math.lcm(*[cached.ticks for _, cached in moving])
+            period_time = period_ticks * steps.pop()
+
+        periods = math.floor(time_left / period_time)
+        for index, cached in moving:
+            cycles_per_period = period_ticks // cached.ticks
+            # keep enough energy to replay the cached laps once more after the skipped periods
+            periods = min(periods, math.floor(
+                (vehicles[index].energy_stored + cached.energy) / (-cached.energy * cycles_per_period)))
+        if periods < 1:
+            return None
+
+        skipped = list(vehicles)
+        for index, cached in moving:
+            cycles = periods * period_ticks // cached.ticks
+            vehicle = vehicles[index]
+            skipped[index] = dataclasses.replace(
+                vehicle,
+                energy_stored=vehicle.energy_stored + cached.energy * cycles,
+                energy_used=vehicle.energy_used - cached.energy * cycles,
+                distance_driven=vehicle.distance_driven + cached.distance * cycles,
+                lap_counter=vehicle.lap_counter + cached.laps * cycles,
+            )
+
+        return periods * period_time, skipped
+
+
+def _is_stopped(vehicle: Vehicle) -> bool:
+    return vehicle.current_speed <= 0 and vehicle.energy_stored <= 0
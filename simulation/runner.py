@@ -0,0 +1,166 @@
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable
+
+from simulation.history import VehicleHistory
+from simulation.scheduler import TickScheduler, RateMetric
+from simulation.simulation import Simulation
+from simulation.vehicle import Vehicle
+
+IDLE_WAIT_SECONDS = 0.1
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Frame:
+    """
+    State of a simulation after a tick, safe to read from other threads: the vehicles are not changed by later ticks
+    and the history is only appended to, its first history_length entries stay as they are.
+    """
+    sequence: int
+    time: float
+    vehicles: tuple[Vehicle, ...]
+    history: VehicleHistory
+    history_length: int
+    running: bool
+    done: bool
+    rate: RateMetric
+
+
+class SimulationRunner:
+    """
+    Ticks a simulation in a worker thread of its own, so the simulation never blocks the caller. The state is
+    published as a Frame after every batch of ticks the scheduler runs, readers only ever see the latest one. Control
+    happens through commands, which the worker executes between batches.
+    """
+
+    def __init__(self, simulation: Simulation, ticks_per_second: float = 1, seconds_per_tick: float = 1,
+                 max_speed: bool = False):
+        self.simulation = simulation
+        self.scheduler = TickScheduler(ticks_per_second, seconds_per_tick, max_speed)
+        self.running = False
+        self.single_step = False
+
+        self._commands: queue.Queue[tuple[Callable, Future]] = queue.Queue()
+        self._frames: deque[Frame] = deque(maxlen=1)
+        self._sequence = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="simulation-runner", daemon=True)
+        self._publish()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopped.set()
+        self._commands.put((lambda: None, Future()))
+        self._thread.join(timeout)
+
+    def latest_frame(self) -> Frame:
+        return self._frames[-1]
+
+    def submit(self, command: Callable) -> Future:
+        """
+        :param command: executed by the worker between two ticks
+        :return: future of the result of the command
+        """
+        future = Future()
+        self._commands.put((command, future))
+        return future
+
+    def run(self) -> Future:
+        return self.submit(lambda: self._set_running(True))
+
+    def pause(self) -> Future:
+        return self.submit(lambda: self._set_running(False))
+
+    def step(self) -> Future:
+        def single_step():
+            self.single_step = True
+            self._set_running(True)
+
+        return self.submit(single_step)
+
+    def configure(self, ticks_per_second: float = None, seconds_per_tick: float = None,
+                  max_speed: bool = None) -> Future:
+        return self.submit(lambda: self.scheduler.configure(ticks_per_second, seconds_per_tick, max_speed))
+
+    def replace(self, simulation: Simulation) -> Future:
+        """
+        Continue with another simulation, paused
+        """
+        def apply():
+            self.simulation = simulation
+            self.running = False
+            self.single_step = False
+            self._publish()
+
+        return self.submit(apply)
+
+    def _set_running(self, running: bool):
+        self.running = running
+        self.scheduler.restart()
+        self._publish()
+
+    def _is_ticking(self) -> bool:
+        return self.running and not self.simulation.is_done()
+
+    def _work(self):
+        while not self._stopped.is_set():
+            timeout = self.scheduler.seconds_until_next_tick() if self._is_ticking() else IDLE_WAIT_SECONDS
+            self._execute_commands(timeout)
+            if self._stopped.is_set() or not self._is_ticking():
+                continue
+
+            if self.scheduler.run_due(self._tick) > 0:
+                self._publish()
+
+    def _tick(self) -> bool:
+        """
+        :return: if ticking should go on
+        """
+        self.simulation.tick(self.scheduler.seconds_per_tick)
+        if self.single_step:
+            self.single_step = False
+            self.running = False
+        return self._is_ticking()
+
+    def _execute_commands(self, timeout: float):
+        """
+        Waits up to the timeout for the first command, then executes all waiting ones
+        """
+        try:
+            command, future = self._commands.get(timeout=timeout) if timeout > 0 else self._commands.get_nowait()
+        except queue.Empty:
+            return
+
+        while True:
+            try:
+                future.set_result(command())
+            except Exception as exception:
+                log.exception("Failure on executing simulation runner command")
+                future.set_exception(exception)
+
+            try:
+                command, future = self._commands.get_nowait()
+            except queue.Empty:
+                return
+
+    def _publish(self):
+        self._sequence += 1
+        simulation = self.simulation
+        self._frames.append(Frame(
+            sequence=self._sequence,
+            time=simulation.time,
+            vehicles=tuple(simulation.vehicles),
+            history=simulation.vehicle_history,
+            history_length=len(simulation.vehicle_history),
+            running=self.running,
+            done=simulation.is_done(),
+            rate=self.scheduler.metric(),
+        ))
@@ -0,0 +1,149 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+MAX_CATCH_UP_TICKS = 600
+MAX_SPEED_BATCH_SECONDS = 0.05
+RATE_WINDOW_SECONDS = 2
+# tolerance of the clock, a tick exactly on time must not be missed due to rounding
+CLOCK_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class RateMetric:
+    """
+    Achieved compared to targeted rate of ticks, target is None in max speed mode.
+    """
+    target_ticks_per_second: float | None
+    achieved_ticks_per_second: float
+    seconds_per_tick: float
+    lag_ticks: int
+    skipped_ticks: int
+
+    @property
+    def target_time_ratio(self) -> float | None:
+        """
+        :return: targeted simulated seconds per wall second
+        """
+        return self.target_ticks_per_second * self.seconds_per_tick if self.target_ticks_per_second else None
+
+    @property
+    def achieved_time_ratio(self) -> float:
+        return self.achieved_ticks_per_second * self.seconds_per_tick
+
+    @property
+    def achieved_ratio(self) -> float | None:
+        """
+        :return: achieved / target rate, 1 if on schedule
+        """
+        return self.achieved_ticks_per_second / self.target_ticks_per_second if self.target_ticks_per_second else None
+
+
+@dataclass
+class TickScheduler:
+    """
+    Keeps the simulation at a fixed ratio of simulated to wall time. Due ticks are derived from the wall time since
+    the schedule started, not from the previous tick, so overhead never accumulates into drift: a lagging schedule
+    catches up by running the missed ticks as a batch. A backlog beyond max_catch_up_ticks is skipped instead,
+    otherwise the simulation would race for a long time after e.g. a suspended machine.
+
+    In max speed mode ticks run back-to-back in batches of max_speed_batch_seconds, between batches the caller can
+    publish state and handle commands, so the UI refresh rate does not depend on the tick rate.
+    """
+    ticks_per_second: float = 1
+    seconds_per_tick: float = 1
+    max_speed: bool = False
+    max_catch_up_ticks: int = MAX_CATCH_UP_TICKS
+    max_speed_batch_seconds: float = MAX_SPEED_BATCH_SECONDS
+    clock: Callable[[], float] = time.monotonic
+    start_time: float = field(default=None, init=False)
+    scheduled_ticks: int = field(default=0, init=False)
+    skipped_ticks: int = field(default=0, init=False)
+    total_ticks: int = field(default=0, init=False)
+    _samples: deque[tuple[float, int]] = field(default_factory=deque, init=False)
+
+    def restart(self):
+        """
+        Start the schedule anew from now, e.g. after a pause or a change of the rate
+        """
+        self.start_time = self.clock()
+        self.scheduled_ticks = 0
+        self._samples.clear()
+
+    def configure(self, ticks_per_second: float = None, seconds_per_tick: float = None, max_speed: bool = None):
+        if ticks_per_second is not None:
+            self.ticks_per_second = ticks_per_second
+        if seconds_per_tick is not None:
+            self.seconds_per_tick = seconds_per_tick
+        if max_speed is not None:
+            self.max_speed = max_speed
+        self.restart()
+
+    def _overdue_ticks(self) -> int:
+        elapsed_ticks = math.floor((self.clock() - self.start_time) * self.ticks_per_second + CLOCK_EPSILON)
+        return max(elapsed_ticks + 1 - self.scheduled_ticks, 0)
+
+    def due_ticks(self) -> int:
+        if self.start_time is None:
+            self.restart()
+
+        due = self._overdue_ticks()
+        if due > self.max_catch_up_ticks:
+            self.skipped_ticks += due - self.max_catch_up_ticks
+            self.scheduled_ticks += due - self.max_catch_up_ticks
+            due = self.max_catch_up_ticks
+        return due
+
+    def seconds_until_next_tick(self) -> float:
+        if self.max_speed or self.start_time is None:
+            return 0.0
+        next_tick_time = self.start_time + self.scheduled_ticks / self.ticks_per_second
+        return max(next_tick_time - self.clock(), 0.0)
+
+    def run_due(self, tick: Callable[[], bool]) -> int:
+        """
+        Runs the ticks which are due now, all of them at once if lagging behind
+
+        :param tick: runs a single tick, returns False to stop the batch, e.g. once the simulation is done
+        :return: number of ticks run
+        """
+        ticks = 0
+        if self.max_speed:
+            deadline = self.clock() + self.max_speed_batch_seconds
+            while self.clock() < deadline:
+                ticks += 1
+                if not tick():
+                    break
+        else:
+            for _ in range(self.due_ticks()):
+                ticks += 1
+                self.scheduled_ticks += 1
+                if not tick():
+                    break
+
+        self.total_ticks += ticks
+        self._sample()
+        return ticks
+
+    def _sample(self):
+        now = self.clock()
+        self._samples.append((now, self.total_ticks))
+        while len(self._samples) > 2 and self._samples[1][0] <= now - RATE_WINDOW_SECONDS:
+            self._samples.popleft()
+
+    def metric(self) -> RateMetric:
+        achieved = 0.0
+        if len(self._samples) >= 2:
+            (first_time, first_ticks), (last_time, last_ticks) = self._samples[0], self._samples[-1]
+            if last_time > first_time:
+                achieved = (last_ticks - first_ticks) / (last_time - first_time)
+
+        return RateMetric(
+            target_ticks_per_second=None if self.max_speed else self.ticks_per_second,
+            achieved_ticks_per_second=achieved,
+            seconds_per_tick=self.seconds_per_tick,
+            lag_ticks=0 if self.max_speed or self.start_time is None else self._overdue_ticks(),
+            skipped_ticks=self.skipped_ticks,
+        )
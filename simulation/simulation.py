@@ -1,50 +1,116 @@
 import logging
+from typing import TYPE_CHECKING
 
+from simulation.history import VehicleHistory
+from simulation.replay import LapReplay
+from simulation.stepper import AdaptiveStepper
+from simulation.telemetry import telemetry
 from simulation.vehicle import Vehicle
 from simulation.environment import Environment
 from simulation.track import TrackLocation
 
+if TYPE_CHECKING:
+    from simulation.checkpoint import CheckpointWriter
+    from simulation.profiler import TickProfiler
+
 SECONDS_PER_TICK = 2
 MAX_RUNTIME_SECONDS = 24 * 60 * 60  # 24h
 
 log = logging.getLogger(__name__)
-log.setLevel(logging.DEBUG)
 
 
 class Simulation:
-    def __init__(self, vehicles: list[Vehicle], environment, max_runtime_seconds=MAX_RUNTIME_SECONDS):
+    def __init__(self, vehicles: list[Vehicle], environment, max_runtime_seconds=MAX_RUNTIME_SECONDS,
+                 lap_replay: bool = False, profiler: "TickProfiler" = None):
+        """
+        :param lap_replay: replay the deltas of steady laps instead of calculating them and skip whole laps in loop
+        :param profiler: records the time spent per phase of each tick, see TickProfiler
+        """
         self.time = 0
+        self.ticks = 0  # executed by loop, laps skipped by lap_replay are not counted
         self.environment: Environment = environment
         self.vehicles: list[Vehicle] = vehicles
-        self.vehicle_history: dict[int, list[Vehicle]] = {self.time: [v for v in self.vehicles]}
+        self.vehicle_history: VehicleHistory = VehicleHistory(self.vehicles, environment.track)
+        self.vehicle_history[self.time] = self.vehicles
         self.max_runtime_seconds = max_runtime_seconds
+        self.lap_replay: LapReplay = LapReplay(len(vehicles)) if lap_replay else None
+        self.profiler: "TickProfiler" = profiler
 
-    def loop(self):
+    def loop(self, seconds_per_tick: int = 1, stepper: AdaptiveStepper = None, checkpoints: "CheckpointWriter" = None):
+        """
+        :param seconds_per_tick: fixed length of each tick, ignored if a stepper is given
+        :param stepper: chooses a variable length for each tick
+        :param checkpoints: writes checkpoints periodically while looping
+        """
         self.setup()
 
         while not self.is_done():
-            self.tick()
+            self.tick(self.next_step(stepper) if stepper else seconds_per_tick)
+            self.ticks += 1
+            if self.lap_replay:
+                self.skip_steady_laps()
+            if checkpoints:
+                checkpoints.maybe_write(self)
 
         log.info(f"Simulation done. Total time: {self.time}s")
 
     def is_done(self) -> bool:
         return self.time >= self.max_runtime_seconds
 
+    def next_step(self, stepper: AdaptiveStepper) -> float:
+        return stepper.next_step(self.vehicles, self.environment, self.max_runtime_seconds - self.time)
+
     def setup(self):
+        """
+        Places vehicles without a location at the start, vehicles of a restored checkpoint stay where they are.
+        """
         for vehicle in self.vehicles:
-            vehicle.location = TrackLocation(self.environment.track, self.environment.track.starting_tile, 0.0)
+            if vehicle.location is None:
+                vehicle.location = TrackLocation(self.environment.track, self.environment.track.starting_tile, 0.0)
+        self.vehicle_history[self.time] = self.vehicles
 
     def tick(self, seconds_per_tick: int = 1):
+        if self.profiler is None:
+            self._tick(seconds_per_tick)
+        else:
+            with self.profiler.tick(self.time + seconds_per_tick):
+                self._tick(seconds_per_tick)
+
+    def _tick(self, seconds_per_tick):
         self._advance_time(seconds_per_tick)
 
-        log.debug(f"Processing tick at {self.time}s")
+        telemetry.emit("simulation.tick", "Processing tick at {}s".format, self.time, level=logging.DEBUG)
+
+        if self.lap_replay:
+            self.vehicles = [self._replay_or_apply(index, vehicle, seconds_per_tick)
+                             for index, vehicle in enumerate(self.vehicles)]
+        else:
+            self.vehicles = [vehicle.apply(self.environment, seconds_per_tick) for vehicle in self.vehicles]
+        self.vehicle_history[self.time] = self.vehicles
+
+        telemetry.emit("environment.status", self.environment.status)
+
+    def _replay_or_apply(self, index: int, vehicle: Vehicle, seconds_per_tick) -> Vehicle:
+        delta = self.lap_replay.delta_for(index, vehicle, seconds_per_tick)
+        vehicle = vehicle.apply(self.environment, seconds_per_tick) if delta is None else vehicle.derive(delta)
+        self.lap_replay.record(index, vehicle, seconds_per_tick)
+        return vehicle
+
+    def skip_steady_laps(self) -> bool:
+        """
+        Extrapolates energy, distance, laps and time over whole steady laps of all vehicles at once.
 
-        self.vehicle_history[self.time] = [
-            vehicle.apply(self.environment, seconds_per_tick) for vehicle in self.vehicles
-        ]
-        self.vehicles = self.vehicle_history[self.time]
+        :return: True if laps were skipped
+        """
+        skipped = self.lap_replay.skip_laps(self.vehicles, self.max_runtime_seconds - self.time)
+        if skipped is None:
+            return False
 
-        log.info(self.environment.status())
+        seconds, self.vehicles = skipped
+        self._advance_time(seconds)
+        self.vehicle_history[self.time] = self.vehicles
+        log.debug(f"Skipped {seconds}s of steady laps")
+        return True
 
     def _advance_time(self, seconds_per_tick):
         self.time += seconds_per_tick
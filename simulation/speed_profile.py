@@ -0,0 +1,74 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Self
+
+import numpy as np
+
+from simulation.compiled_track import CompiledTrack
+from simulation.units import DISTANCE_PRECISION
+
+
+@dataclass
+class SpeedLimitDistance:
+    distance: float
+    speed_limit: float
+
+
+@dataclass(frozen=True, eq=False)
+class SpeedLimitProfile:
+    """
+    Speed limits along one lap for a specific vehicle setup, tiles may have several limits along them. Consecutive
+    limits of the same speed are merged, so only the distances at which the limit changes are kept.
+    """
+    distances: tuple[float, ...]
+    speed_limits: tuple[float, ...]
+    total_length: float
+
+    @classmethod
+    def from_track(cls, compiled: CompiledTrack, tire_friction_coefficient: float, vehicle_height: float,
+                   vehicle_track_width: float) -> Self:
+        distances = []
+        speed_limits = []
+        for tile, distance in zip(compiled.tiles, compiled.cumulative_distances):
+            for offset, speed_limit in tile.speed_limits(tire_friction_coefficient, vehicle_height,
+                                                         vehicle_track_width):
+                if speed_limits and speed_limits[-1] == speed_limit:
+                    continue
+                distances.append(round(distance + offset, DISTANCE_PRECISION))
+                speed_limits.append(speed_limit)
+
+        return cls(tuple(distances), tuple(speed_limits), compiled.total_length)
+
+    @cached_property
+    def distance_array(self) -> np.ndarray:
+        return np.array(self.distances, dtype=np.float64)
+
+    @cached_property
+    def speed_limit_array(self) -> np.ndarray:
+        return np.array(self.speed_limits, dtype=np.float64)
+
+    def speed_limit_at(self, distance: float) -> float:
+        return self.speed_limits[bisect_right(self.distances, distance) - 1]
+
+    def upcoming(self, distance: float, lookahead_distance: float) -> list[SpeedLimitDistance]:
+        """
+        :param distance: current distance on the lap
+        :param lookahead_distance: how far to look ahead, may span multiple laps
+        :return: the current speed limit at relative distance 0, followed by every limit change within the lookahead
+        """
+        index = bisect_right(self.distances, distance) - 1
+        result = [SpeedLimitDistance(0.0, self.speed_limits[index])]
+
+        start = index + 1
+        offset = -distance
+        while offset <= lookahead_distance:
+            end = bisect_right(self.distances, lookahead_distance - offset)
+            result += [SpeedLimitDistance(change_distance + offset, speed_limit) for change_distance, speed_limit in
+                       zip(self.distances[start:end], self.speed_limits[start:end])]
+            if end < len(self.distances):
+                break
+            start = 0
+            offset += self.total_length
+
+        return result
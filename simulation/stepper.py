@@ -0,0 +1,71 @@
+import math
+from dataclasses import dataclass
+
+from simulation.environment import Environment
+from simulation.physics import power_for_velocity, battery_power, power_for_grade
+from simulation.vehicle import Vehicle, ACCELERATION_SAFETY_FACTOR, ACCELERATION_SAFETY_DISTANCE
+
+
+@dataclass
+class AdaptiveStepper:
+    """
+    Chooses the length of the next tick based on the next predictable event of any vehicle: reaching a braking
+    point, a speed limit change or running out of energy. While all vehicles hold a constant speed the tick spans up
+    to that event, otherwise it falls back to min_step. Steps are multiples of min_step.
+    """
+    min_step: float = 1
+    max_step: float = 60
+
+    def next_step(self, vehicles: list[Vehicle], environment: Environment, time_left: float) -> float:
+        step = min(self.max_step, time_left)
+        for vehicle in vehicles:
+            if step <= self.min_step:
+                break
+            step = min(step, self.vehicle_step(vehicle, environment, step))
+
+        return min(step, time_left)
+
+    def vehicle_step(self, vehicle: Vehicle, environment: Environment, max_step: float) -> float:
+        speed = vehicle.current_speed
+        if speed <= 0:
+            # standing still, either not yet started or out of energy
+            return self.min_step if vehicle.energy_stored > 0 else max_step
+        if vehicle.delta_input.acceleration != 0:
+            return self.min_step
+
+        step = min(max_step, self.time_to_next_event(vehicle, max_step))
+        step = max(self.min_step, math.floor(step / self.min_step) * self.min_step)
+
+        # the phase could still change within the step, e.g. by a slower corner entering the lookahead
+        if step > self.min_step and vehicle.calculate_delta(environment, step).acceleration != 0:
+            return self.min_step
+        return step
+
+    @staticmethod
+    def time_to_next_event(vehicle: Vehicle, max_step: float) -> float:
+        speed = vehicle.current_speed
+        profile = vehicle.location.track.speed_limit_profile(vehicle.tire_friction_coefficient, vehicle.height,
+                                                             vehicle.track_width)
+
+        longest_braking_distance = max(speed ** 2 / (2 * vehicle.max_acceleration * ACCELERATION_SAFETY_FACTOR),
+                                       ACCELERATION_SAFETY_DISTANCE)
+        lookahead_distance = speed * max_step + longest_braking_distance
+
+        power = battery_power(power_for_velocity(speed, vehicle.parameters), vehicle.parameters)
+        elevation = vehicle.location.track.elevation_profile
+        if not elevation.is_flat:
+            # the grade is constant up to its next change, which is an event on its own
+            distance = vehicle.location.distance
+            power += battery_power(power_for_grade(speed, elevation.grade_at(distance), vehicle.parameters),
+                                   vehicle.parameters)
+            lookahead_distance = min(lookahead_distance, elevation.distance_to_grade_change(distance))
+        time_to_event = vehicle.energy_stored / power * 60 * 60 if power > 0 else math.inf
+        for speed_limit_location in profile.upcoming(vehicle.location.distance, lookahead_distance)[1:]:
+            distance = speed_limit_location.distance
+            if speed_limit_location.speed_limit < speed:
+                braking_distance = (speed ** 2 - speed_limit_location.speed_limit ** 2) / (
+                        2 * vehicle.max_acceleration * ACCELERATION_SAFETY_FACTOR)
+                distance -= max(braking_distance, ACCELERATION_SAFETY_DISTANCE)
+            time_to_event = min(time_to_event, distance / speed)
+
+        return time_to_event
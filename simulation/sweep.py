@@ -0,0 +1,148 @@
+import dataclasses
+import itertools
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Iterable
+
+from simulation.batch import BatchSimulation
+from simulation.compiled_track import TRACK_FILE_SUFFIX
+from simulation.environment import Environment
+from simulation.phase import PhaseIntegrator
+from simulation.simulation import Simulation, MAX_RUNTIME_SECONDS
+from simulation.telemetry import telemetry
+from simulation.track import Track
+from simulation.vehicle import Vehicle
+
+SWEEP_PARAMETERS = ("max_acceleration", "max_speed", "tire_friction_coefficient", "energy_stored")
+ENGINES = ("scalar", "batch", "phase", "replay")
+
+log = logging.getLogger(__name__)
+
+# Track of the current worker process, set once per worker by _init_worker
+_worker_track: Track = None
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    max_acceleration: float
+    max_speed: float
+    tire_friction_coefficient: float
+    energy_stored: float
+    laps: int
+    distance_driven: float
+    energy_used: float
+    energy_left: float
+    simulated_seconds: float
+
+    @property
+    def energy_per_lap(self) -> float:
+        return self.energy_used / self.laps if self.laps > 0 else float("inf")
+
+    @classmethod
+    def header(cls) -> list[str]:
+        return [field.name for field in dataclasses.fields(cls)] + ["energy_per_lap"]
+
+    def row(self) -> list:
+        return list(dataclasses.astuple(self)) + [self.energy_per_lap]
+
+
+def parameter_grid(**values: Iterable) -> list[dict]:
+    """
+    :param values: list of values per vehicle parameter, e.g. max_speed=[33, 40]
+    :return: every combination of the given values
+    """
+    unknown = set(values) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+def run_single(track: Track, vehicle: Vehicle, max_runtime_seconds: int, seconds_per_tick: int,
+               engine: str = "scalar") -> SweepResult:
+    """
+    :param engine: "scalar" or "batch" to tick a Simulation or BatchSimulation, "replay" for a Simulation which
+    replays and skips steady laps, "phase" for the analytic PhaseIntegrator which ignores seconds_per_tick
+    """
+    if engine == "phase":
+        summary = PhaseIntegrator(vehicle, track).run(max_runtime_seconds)
+        return SweepResult(
+            max_acceleration=vehicle.max_acceleration,
+            max_speed=vehicle.max_speed,
+            tire_friction_coefficient=vehicle.tire_friction_coefficient,
+            energy_stored=vehicle.energy_stored,
+            laps=summary.laps,
+            distance_driven=summary.distance_driven,
+            energy_used=summary.energy_used,
+            energy_left=summary.energy_stored,
+            simulated_seconds=summary.time,
+        )
+
+    if engine == "batch":
+        simulation = BatchSimulation([vehicle], Environment(track), max_runtime_seconds)
+    else:
+        simulation = Simulation([vehicle], Environment(track), max_runtime_seconds, lap_replay=engine == "replay")
+    simulation.loop(seconds_per_tick)
+    result = simulation.vehicles[0]
+
+    return SweepResult(
+        max_acceleration=vehicle.max_acceleration,
+        max_speed=vehicle.max_speed,
+        tire_friction_coefficient=vehicle.tire_friction_coefficient,
+        energy_stored=vehicle.energy_stored,
+        laps=result.lap_counter,
+        distance_driven=result.distance_driven,
+        energy_used=result.energy_used,
+        energy_left=result.energy_stored,
+        simulated_seconds=simulation.time,
+    )
+
+
+def _init_worker(track_path: Path):
+    global _worker_track
+    # memory mapped, so all workers share one copy of the track file in the page cache
+    _worker_track = Track.load(track_path)
+    # Per tick status output of every run would dominate the runtime of a sweep
+    telemetry.quiet = True
+
+
+def _run_in_worker(vehicle: Vehicle, max_runtime_seconds: int, seconds_per_tick: int, engine: str) -> SweepResult:
+    return run_single(_worker_track, vehicle, max_runtime_seconds, seconds_per_tick, engine)
+
+
+def sweep(track: Track | Path | str, base_vehicle: Vehicle, grid: list[dict], max_runtime_seconds: int = MAX_RUNTIME_SECONDS,
+          seconds_per_tick: int = 1, max_workers: int = None, engine: str = "scalar") -> Iterator[SweepResult]:
+    """
+    Run one simulation per parameter combination of the grid in a process pool. Each worker loads the track once
+    from a track file, results are yielded as soon as a run finishes, thus not in the order of the grid.
+
+    :param track: track, written to a temporary track file for the workers, or the path of a track file
+    :param base_vehicle: vehicle providing all parameters not part of the grid
+    :param grid: parameter combinations as created by parameter_grid
+    :param engine: one of ENGINES, see run_single
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}, expected one of {', '.join(ENGINES)}")
+
+    vehicles = [dataclasses.replace(base_vehicle, **parameters) for parameters in grid]
+
+    with tempfile.TemporaryDirectory(prefix="sweep-") if isinstance(track, Track) else nullcontext() as directory:
+        if directory is None:
+            track_path = Path(track)
+        else:
+            track_path = Path(directory) / f"track{TRACK_FILE_SUFFIX}"
+            track.save(track_path)
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(track_path,)) as executor:
+            futures = [executor.submit(_run_in_worker, vehicle, max_runtime_seconds, seconds_per_tick, engine)
+                       for vehicle in vehicles]
+            log.info(f"Submitted {len(futures)} runs on track file {track_path}")
+
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,87 @@
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class TelemetrySink(ABC):
+    @abstractmethod
+    def is_enabled(self, event: str, level: int) -> bool:
+        pass
+
+    @abstractmethod
+    def record(self, event: str, level: int, payload: Any):
+        pass
+
+
+class LoggingSink(TelemetrySink):
+    """
+    Forwards events to the logger "<prefix>.<event>", only if that logger would emit the given level.
+    """
+
+    def __init__(self, prefix: str = "simulation.telemetry"):
+        self.prefix = prefix
+        self._loggers: dict[str, logging.Logger] = {}
+
+    def _logger(self, event: str) -> logging.Logger:
+        logger = self._loggers.get(event)
+        if logger is None:
+            logger = self._loggers[event] = logging.getLogger(f"{self.prefix}.{event}")
+        return logger
+
+    def is_enabled(self, event: str, level: int) -> bool:
+        return self._logger(event).isEnabledFor(level)
+
+    def record(self, event: str, level: int, payload: Any):
+        self._logger(event).log(level, payload)
+
+
+class RecordingSink(TelemetrySink):
+    """
+    Keeps every event in memory, e.g. to inspect a run in tests.
+    """
+
+    def __init__(self, level: int = logging.DEBUG):
+        self.level = level
+        self.events: list[tuple[str, Any]] = []
+
+    def is_enabled(self, event: str, level: int) -> bool:
+        return level >= self.level
+
+    def record(self, event: str, level: int, payload: Any):
+        self.events.append((event, payload))
+
+
+class Telemetry:
+    """
+    Entry point for status output of the simulation. Payloads are passed as callables with their arguments and only
+    evaluated if at least one sink wants the event, so no formatting happens for disabled output and no closure is
+    built on the hot path. In quiet mode emitting returns right away without asking any sink.
+    """
+
+    def __init__(self, sinks: list[TelemetrySink] = None):
+        self.sinks: list[TelemetrySink] = sinks if sinks is not None else []
+        self.quiet: bool = False
+
+    def emit(self, event: str, payload: Callable[..., Any], *args, level: int = logging.INFO):
+        if self.quiet:
+            return
+
+        sinks = [sink for sink in self.sinks if sink.is_enabled(event, level)]
+        if not sinks:
+            return
+
+        value = payload(*args)
+        for sink in sinks:
+            sink.record(event, level, value)
+
+    @contextmanager
+    def silenced(self) -> Iterator[None]:
+        quiet, self.quiet = self.quiet, True
+        try:
+            yield
+        finally:
+            self.quiet = quiet
+
+
+telemetry = Telemetry([LoggingSink()])
@@ -1,20 +1,98 @@
+import functools
 import math
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from enum import Enum
+from typing import Any, Self
+
+import numpy as np
 
 from simulation.position import Position
 from simulation.units import DISTANCE_PRECISION, abs_angle
 
+TILE_WIDTH = 10
+MIN_INNER_RADIUS = 1  # m, keeps the speed limit of sharp kinks of a polyline above 0
+SPEED_LIMIT_RESOLUTION = 0.1  # m/s, of the speed limits along a polyline
+
+
+class TileIsImmutableError(AttributeError):
+    pass
+
+
+class InvalidPolylineError(ValueError):
+    pass
+
+
+def cornering_speed(radius, tire_friction_coefficient: float, vehicle_height: float, vehicle_track_width: float):
+    """
+    Help: https://engineering.icalculator.com/cornering-force-calculator.html
+    or https://calculator.academy/maximum-cornering-speed-calculator/
+
+    :param radius: single radius or numpy array of radii, infinite for straights
+    """
+    return np.sqrt(tire_friction_coefficient * 9.81 * radius
+                   / (1 - tire_friction_coefficient * vehicle_height / vehicle_track_width))
+
+
+def cached_geometry(method):
+    """
+    Computes the result of a tile method once per tile and arguments, the cache is only invalidated by Tile.modify
+    """
+    @functools.wraps(method)
+    def cached(self, *args):
+        key = (method.__name__, *args)
+        try:
+            return self._geometry[key]
+        except KeyError:
+            result = self._geometry[key] = method(self, *args)
+            return result
+
+    return cached
+
 
 class Tile(ABC):
-    def __init__(self, origin: Position, width: float = 10):
+    """
+    Immutable once built: attributes can be set once in __init__, changes need to go through modify. This allows to
+    compute the geometry lazily and only once, see cached_geometry.
+    """
+
+    def __init__(self, origin: Position, width: float = TILE_WIDTH, rise: float = 0.0):
+        """
+        :param rise: height gained from the origin to the destination, negative for descents
+        """
+        self._geometry: dict[tuple, Any] = {}
         self.origin: Position = origin
         self.width: float = width
+        self.rise: float = rise
+
+    def __setattr__(self, name: str, value):
+        if name in self.__dict__:
+            raise TileIsImmutableError(f"Cannot change {name} of tile {self}, use modify")
+        super().__setattr__(name, value)
+
+    def modify(self, **changes) -> Self:
+        """
+        Changes attributes of the tile and drops its cached geometry. Tiles following this one and tracks containing it
+        are not updated.
+        """
+        for name, value in changes.items():
+            if name not in self.__dict__ or name.startswith("_"):
+                raise AttributeError(f"Tile has no attribute {name} to modify")
+            object.__setattr__(self, name, value)
+        self._geometry.clear()
+        return self
+
+    def cache_geometry(self, method: str, result: Any, *args):
+        """
+        Stores an already known result of a cached_geometry method, e.g. as loaded from a track file
+        """
+        self._geometry[(method, *args)] = result
 
     @abstractmethod
     def get_destination(self) -> Position:
         pass
 
+    @cached_geometry
     def get_defining_points(self) -> tuple[Position, Position, Position, Position]:
         """
         :return: the 4 defining points of the tile in the following order:
@@ -40,10 +118,23 @@ class Tile(ABC):
     def get_absolute_position(self, progress):
         pass
 
+    def elevation_at(self, progress: float) -> float:
+        """
+        :return: height at the progress in percent, changing linearly from the origin to the destination
+        """
+        return self.origin.z + self.rise * progress / 100
+
     @abstractmethod
     def max_speed(self, tire_friction_coefficient: float, vehicle_height: float, vehicle_track_width: float) -> float:
         pass
 
+    def speed_limits(self, tire_friction_coefficient: float, vehicle_height: float,
+                     vehicle_track_width: float) -> tuple[tuple[float, float], ...]:
+        """
+        :return: tuples of distance from the start of the tile / max speed from there on, the first at distance 0
+        """
+        return (0.0, self.max_speed(tire_friction_coefficient, vehicle_height, vehicle_track_width)),
+
 
 class Direction(Enum):
     """
@@ -54,8 +145,9 @@ class Direction(Enum):
 
 
 class CornerTile(Tile):
-    def __init__(self, origin: Position, alpha: int, inner_radius: float, direction: Direction, width=10):
-        super().__init__(origin, width)
+    def __init__(self, origin: Position, alpha: int, inner_radius: float, direction: Direction, width=TILE_WIDTH,
+                 rise: float = 0.0):
+        super().__init__(origin, width, rise)
         # TODO: add some validation for limits, e.g < 360 deg etc.
         self.alpha: int = alpha
         self.inner_radius: float = inner_radius
@@ -65,6 +157,7 @@ class CornerTile(Tile):
     def alpha_rad(self):
         return math.radians(self.alpha)
 
+    @cached_geometry
     def get_destination(self) -> Position:
         # TODO: check if current approach works for corners >= 180deg
 
@@ -83,30 +176,29 @@ class CornerTile(Tile):
 
         return self.origin.derive(orientation=angle_to_destination) \
             .translate(distance_to_destination) \
-            .derive(orientation=angle_at_destination)
+            .derive(z=self.elevation_at(100), orientation=angle_at_destination)
 
+    @cached_geometry
     def get_radius_center(self) -> Position:
         radius = self.width + self.inner_radius if self.direction == Direction.RIGHT else self.inner_radius
         return self.origin.derive(orientation=abs_angle(self.origin.orientation + 90 * self.direction.value)) \
             .translate(radius)
 
+    @cached_geometry
     def path_length(self):
         # TODO: implement properly based on previous/next tile and some sort of racing line
         # 2r * pi / ratio of a full circle + 0% removed buffer for now
         return round(self.inner_radius * math.pi / (math.pi / math.radians(self.alpha)), DISTANCE_PRECISION)
 
+    @cached_geometry
     def max_speed(self, tire_friction_coefficient: float, vehicle_height: float, vehicle_track_width: float) -> float:
-        """
-        Help: https://engineering.icalculator.com/cornering-force-calculator.html
-        or https://calculator.academy/maximum-cornering-speed-calculator/
-        """
         # TODO: figure out a better radius, rather than inner_radius
-        return math.sqrt(tire_friction_coefficient * 9.81 * self.inner_radius
-                         / (1 - tire_friction_coefficient * vehicle_height / vehicle_track_width))
+        return float(cornering_speed(self.inner_radius, tire_friction_coefficient, vehicle_height, vehicle_track_width))
 
     def get_absolute_position(self, progress):
         return self.get_radius_center().derive(orientation=self.origin.orientation - 90 * self.direction.value) \
-            .translate(self.inner_radius + self.width / 2, self.alpha * self.direction.value * (progress / 100))
+            .translate(self.inner_radius + self.width / 2, self.alpha * self.direction.value * (progress / 100)) \
+            .derive(z=self.elevation_at(progress))
 
     def __str__(self):
         return f"Corner {self.origin} -> {self.alpha}° {self.direction} radius {self.inner_radius}m"
@@ -118,13 +210,15 @@ class StraightTile(Tile):
     Destination is the equivalent on the end of the tile.
     """
 
-    def __init__(self, origin: Position, length: float, width: float = 10):
-        super().__init__(origin, width)
+    def __init__(self, origin: Position, length: float, width: float = TILE_WIDTH, rise: float = 0.0):
+        super().__init__(origin, width, rise)
         self.length = length
 
+    @cached_geometry
     def get_destination(self) -> Position:
-        return self.origin.translate(self.length)
+        return self.origin.translate(self.length).derive(z=self.elevation_at(100))
 
+    @cached_geometry
     def path_length(self) -> float:
         # TODO: implement properly based on previous/next tile and some sort of racing line
         return round(self.length, DISTANCE_PRECISION)
@@ -133,7 +227,118 @@ class StraightTile(Tile):
         return math.inf
 
     def get_absolute_position(self, progress) -> Position:
-        return self.origin.translate(self.width / 2, 90).translate(self.length * (progress / 100))
+        return self.origin.translate(self.width / 2, 90).translate(self.length * (progress / 100)) \
+            .derive(z=self.elevation_at(progress))
 
     def __str__(self) -> str:
         return f"Straight {self.origin} -> {self.length}m"
+
+
+@dataclass(frozen=True)
+class ArcLengthTable:
+    """
+    Centerline of a PolylineTile sampled at its points, indexed by the distance along it
+    """
+    distances: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    orientations: np.ndarray  # in degrees, unwrapped so they can be interpolated
+    curvatures: np.ndarray  # in 1/m, positive turning right
+
+
+class PolylineTile(Tile):
+    """
+    Long section of varying curvature as a single tile, e.g. a chain of corners of an imported track. Its centerline
+    is given by points relative to the start of the centerline: x along the orientation of the origin, y to the right
+    of it, starting at 0, 0 into the direction of x.
+
+    Positions and speed limits are looked up in the ArcLengthTable, computed once per tile.
+    """
+
+    def __init__(self, origin: Position, points: np.ndarray, width: float = TILE_WIDTH, rise: float = 0.0):
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[0] < 2 or points.shape[1] != 2:
+            raise InvalidPolylineError(f"Polyline needs at least 2 points of x, y, got an array of shape {points.shape}")
+        super().__init__(origin, width, rise)
+        self.points: np.ndarray = points
+
+    @cached_geometry
+    def arc_length_table(self) -> ArcLengthTable:
+        start = self.origin.translate(self.width / 2, 90)
+        orientation = self.origin.orientation_rad
+        local_x, local_y = self.points[:, 0], self.points[:, 1]
+        x = start.x + local_x * math.cos(orientation) - local_y * math.sin(orientation)
+        y = start.y + local_x * math.sin(orientation) + local_y * math.cos(orientation)
+
+        segments = np.diff(self.points, axis=0)
+        segment_lengths = np.hypot(segments[:, 0], segments[:, 1])
+        segment_angles = np.unwrap(np.arctan2(segments[:, 1], segments[:, 0]))
+        # the direction at a point is the average of the segments meeting there, continued by half a turn at both
+        # ends, the curvature is the turn between the segments
+        turns = np.diff(segment_angles)
+        end_turns = (turns[0], turns[-1]) if len(turns) else (0.0, 0.0)
+        angles = np.concatenate(([segment_angles[0] - end_turns[0] / 2], (segment_angles[:-1] + segment_angles[1:]) / 2,
+                                 [segment_angles[-1] + end_turns[1] / 2]))
+        curvatures = turns / ((segment_lengths[:-1] + segment_lengths[1:]) / 2)
+        curvatures = np.concatenate((curvatures[:1], curvatures, curvatures[-1:])) if len(turns) else np.zeros(2)
+
+        return ArcLengthTable(
+            distances=np.concatenate(([0.0], np.cumsum(segment_lengths))),
+            x=x,
+            y=y,
+            orientations=self.origin.orientation + np.degrees(angles),
+            curvatures=curvatures,
+        )
+
+    @cached_geometry
+    def get_destination(self) -> Position:
+        table = self.arc_length_table()
+        end = Position(float(table.x[-1]), float(table.y[-1]), self.elevation_at(100),
+                       abs_angle(float(table.orientations[-1])))
+        return end.translate(self.width / 2, -90)
+
+    @cached_geometry
+    def path_length(self) -> float:
+        return round(float(self.arc_length_table().distances[-1]), DISTANCE_PRECISION)
+
+    def get_absolute_position(self, progress) -> Position:
+        table = self.arc_length_table()
+        distance = progress / 100 * table.distances[-1]
+        return Position(
+            round(float(np.interp(distance, table.distances, table.x)), DISTANCE_PRECISION),
+            round(float(np.interp(distance, table.distances, table.y)), DISTANCE_PRECISION),
+            self.elevation_at(progress),
+            abs_angle(float(np.interp(distance, table.distances, table.orientations))),
+        )
+
+    @cached_geometry
+    def speed_limits(self, tire_friction_coefficient: float, vehicle_height: float,
+                     vehicle_track_width: float) -> tuple[tuple[float, float], ...]:
+        """
+        One limit per segment between two points, the lower one of the curvatures at both ends, rounded down to the
+        SPEED_LIMIT_RESOLUTION. The radius is taken on the inside of the track like for corners.
+        """
+        table = self.arc_length_table()
+        curvatures = np.abs(table.curvatures)
+        with np.errstate(divide="ignore"):
+            radii = np.maximum(1 / curvatures - self.width / 2, MIN_INNER_RADIUS)
+        speeds = cornering_speed(radii, tire_friction_coefficient, vehicle_height, vehicle_track_width)
+        # rounded down, tiny differences of the curvature should not add a limit at every point
+        speeds = np.floor(np.minimum(speeds[:-1], speeds[1:]) / SPEED_LIMIT_RESOLUTION) * SPEED_LIMIT_RESOLUTION
+
+        limits = [(0.0, float(speeds[0]))]
+        for distance, speed in zip(table.distances[1:-1].tolist(), speeds[1:].tolist()):
+            if speed != limits[-1][1]:
+                limits.append((distance, speed))
+        return tuple(limits)
+
+    @cached_geometry
+    def max_speed(self, tire_friction_coefficient: float, vehicle_height: float, vehicle_track_width: float) -> float:
+        """
+        :return: lowest speed limit on the whole tile
+        """
+        return min(speed for _, speed in self.speed_limits(tire_friction_coefficient, vehicle_height,
+                                                             vehicle_track_width))
+
+    def __str__(self) -> str:
+        return f"Polyline {self.origin} -> {len(self.points)} points {self.path_length()}m"
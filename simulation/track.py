@@ -1,23 +1,27 @@
 import logging
 from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
 from typing import Self
 
+import numpy as np
+
+from simulation.compiled_track import CompiledTrack, TileNotPartOfTrackError
+from simulation.elevation import ElevationProfile
 from simulation.position import Position
-from simulation.tile import Tile, Direction, CornerTile, StraightTile
-from simulation.units import PROGRESS_PERCENTAGE_PRECISION, DISTANCE_PRECISION
+from simulation.speed_profile import SpeedLimitDistance, SpeedLimitProfile
+from simulation.tile import Tile, Direction, CornerTile, StraightTile, PolylineTile, TILE_WIDTH
 
 log = logging.getLogger(__name__)
 
 
-class TileNotPartOfTrackError(Exception):
-    pass
-
-
 class Track:
-    def __init__(self, name: str, tiles: list[Tile]):
+    def __init__(self, name: str, tiles: list[Tile], compiled: CompiledTrack = None):
         self.name = name
         self.tiles = tiles
         self.origin = tiles[0].origin
+        self.compiled: CompiledTrack = compiled if compiled is not None else CompiledTrack.from_tiles(tiles)
+        self._speed_limit_profiles: dict[tuple[float, float, float], SpeedLimitProfile] = {}
 
     @property
     def starting_tile(self):
@@ -30,26 +34,41 @@ class Track:
         return result
 
     def tile_after(self, tile):
-        current_index = self.tiles.index(tile)
-
-        if current_index == -1:
-            raise TileNotPartOfTrackError()
-
-        if current_index == len(self.tiles) - 1:
-            return self.starting_tile
+        return self.compiled.tiles[self.compiled.successors[self.compiled.index_of(tile)]]
+
+    def speed_limit_profile(self, tire_friction_coefficient: float, vehicle_height: float,
+                            vehicle_track_width: float) -> SpeedLimitProfile:
+        key = (tire_friction_coefficient, vehicle_height, vehicle_track_width)
+        profile = self._speed_limit_profiles.get(key)
+        if profile is None:
+            profile = SpeedLimitProfile.from_track(self.compiled, *key)
+            self._speed_limit_profiles[key] = profile
+        return profile
+
+    @cached_property
+    def elevation_profile(self) -> ElevationProfile:
+        return ElevationProfile.from_track(self.compiled)
+
+    def save(self, path: str | Path):
+        """
+        Writes the track to a binary track file, see CompiledTrack.write
+        """
+        self.compiled.write(path, self.name)
 
-        return self.tiles[current_index + 1]
+    @classmethod
+    def load(cls, path: str | Path) -> Self:
+        """
+        Loads a track saved before, memory mapped and without computing any geometry again
+        """
+        name, compiled = CompiledTrack.read(path)
+        return cls(name, list(compiled.tiles), compiled)
 
     def tile_before(self, tile):
         raise NotImplementedError()
 
     @property
     def total_length(self) -> float:
-        total_length = 0
-        for tile in self.tiles:
-            total_length += tile.path_length()
-
-        return round(total_length, DISTANCE_PRECISION)
+        return self.compiled.total_length
 
 
 class TrackDoesNotLoopException(Exception):
@@ -75,15 +94,25 @@ class TrackBuilder:
         self.tiles.append(tile)
         return self
 
-    def into_straight(self, length: float):
-        return self.into(StraightTile(self.current_end, length))
+    def into_straight(self, length: float, width: float = TILE_WIDTH, rise: float = 0.0):
+        """
+        :param rise: height gained along the tile, negative for descents
+        """
+        return self.into(StraightTile(self.current_end, length, width, rise))
 
-    def into_corner(self, direction: Direction, angle: int, inner_radius: float):
+    def into_corner(self, direction: Direction, angle: int, inner_radius: float, width: float = TILE_WIDTH,
+                    rise: float = 0.0):
         # Split any radius > 90 into multiple corners as current calculation only supports up to 90
         if angle > 90:
-            return self.into_corner(direction, 90, inner_radius) \
-                .into_corner(direction, angle - 90, inner_radius)
-        return self.into(CornerTile(self.current_end, angle, inner_radius, direction))
+            return self.into_corner(direction, 90, inner_radius, width, rise * 90 / angle) \
+                .into_corner(direction, angle - 90, inner_radius, width, rise * (angle - 90) / angle)
+        return self.into(CornerTile(self.current_end, angle, inner_radius, direction, width, rise))
+
+    def into_polyline(self, points: np.ndarray, width: float = TILE_WIDTH, rise: float = 0.0):
+        """
+        :param points: of the centerline relative to its current end, see PolylineTile
+        """
+        return self.into(PolylineTile(self.current_end, points, width, rise))
 
     def loop(self) -> Track:
         if not self.tiles:
@@ -92,20 +121,14 @@ class TrackBuilder:
         # if self.current_end != self.track_origin:
         #    raise TrackDoesNotLoopException(self.tiles)
         # TODO: write logic to safely close the track
-        return Track(self.name, self.tiles)
-
-
-@dataclass
-class SpeedLimitDistance:
-    distance: float
-    speed_limit: float
+        return Track(self.name, list(self.tiles), CompiledTrack.from_tiles(self.tiles))
 
 
+@dataclass(frozen=True, slots=True, eq=False)
 class TrackLocation:
-    def __init__(self, track: Track, tile: Tile, progress: float):
-        self.track = track
-        self.tile = tile
-        self.progress = progress
+    track: Track
+    tile: Tile
+    progress: float
 
     def move(self, distance: float, passed_finish_line: bool = False) -> tuple[Self, bool]:
         """
@@ -113,48 +136,48 @@ class TrackLocation:
         :param passed_finish_line: if finish line has already been passed
         :return: tuple of new location / finish line has been passed
         """
-        distance_left_on_tile = self.distance_left_on_tile
-
-        if distance >= distance_left_on_tile:
-            next_tile = self.track.tile_after(self.tile)
-            new_distance = round(distance - distance_left_on_tile, DISTANCE_PRECISION)
-            return TrackLocation(self.track, next_tile, 0.0) \
-                .move(new_distance, passed_finish_line or next_tile == self.track.starting_tile)
+        new_location, laps = self.advance(distance)
+        return new_location, passed_finish_line or laps > 0
 
-        new_progress = round(100 - ((distance_left_on_tile - distance) / self.tile.path_length() * 100),
-                             PROGRESS_PERCENTAGE_PRECISION)
-        return TrackLocation(self.track, self.tile, new_progress), passed_finish_line
+    def advance(self, distance: float) -> tuple[Self, int]:
+        """
+        :param distance: to move in total
+        :return: tuple of new location / number of times the finish line has been passed
+        """
+        laps, index, progress = self.track.compiled.resolve(self.distance + distance)
+        return TrackLocation(self.track, self.track.compiled.tiles[index], progress), laps
 
     def get_absolute_position(self) -> Position:
         return self.tile.get_absolute_position(self.progress)
 
+    @property
+    def tile_index(self) -> int:
+        return self.track.compiled.index_of(self.tile)
+
+    @property
+    def distance(self) -> float:
+        """
+        :return: distance driven on the current lap
+        """
+        return self.track.compiled.distance_at(self.tile_index, self.progress)
+
     @property
     def distance_left_on_tile(self) -> float:
         return (100 - self.progress) / 100 * self.tile.path_length()
 
     def get_upcoming_max_speed_locations(self, lookahead_distance: float, tire_friction_coefficient: float,
-                                         vehicle_height: float, vehicle_track_width: float,
-                                         relative_looking_distance: float = 0.0) -> list[SpeedLimitDistance]:
-        result = [SpeedLimitDistance(
-            relative_looking_distance,
-            self.tile.max_speed(tire_friction_coefficient, vehicle_height, vehicle_track_width)
-        )]
-
-        distance_left_on_tile = self.distance_left_on_tile
-        if self.distance_left_on_tile <= lookahead_distance:
-            next_tile = self.track.tile_after(self.tile)
-            result += TrackLocation(self.track, next_tile, 0.0) \
-                .get_upcoming_max_speed_locations(lookahead_distance - self.distance_left_on_tile,
-                                                  tire_friction_coefficient, vehicle_height, vehicle_track_width,
-                                                  distance_left_on_tile + relative_looking_distance)
-
-        return result
+                                         vehicle_height: float, vehicle_track_width: float) -> list[SpeedLimitDistance]:
+        return self.track.speed_limit_profile(tire_friction_coefficient, vehicle_height, vehicle_track_width) \
+            .upcoming(self.distance, lookahead_distance)
 
     def __str__(self):
         return f"Tile: {self.tile} / Progress: {self.progress:.1f}%"
 
     def __eq__(self, other):
         if isinstance(other, TrackLocation):
-            return self.__dict__ == other.__dict__
+            return self.tile is other.tile and self.progress == other.progress and self.track is other.track
 
         return False
+
+    def __hash__(self):
+        return hash((id(self.track), id(self.tile), self.progress))
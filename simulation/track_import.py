@@ -0,0 +1,283 @@
+import hashlib
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from simulation.compiled_track import TRACK_FILE_SUFFIX, TRACK_FILE_VERSION
+from simulation.position import Position
+from simulation.tile import Direction
+from simulation.track import Track, TrackBuilder
+
+FIT_TOLERANCE = 0.5  # m, maximum distance of a centerline point from the fitted tiles
+HEADING_TOLERANCE = 2  # degree, maximum difference of the heading at the end of a tile to the centerline
+MIN_CURVATURE = 1e-6  # 1/m, arcs of a larger radius are treated as straight
+MAX_TURN = math.pi / 2  # of a single tile, larger turns are ambiguous at the fitting
+HEADING_WINDOW = 10  # m, distance between the points the heading of the centerline is taken from, against noise
+MIN_CORNER_RADIUS = 1
+MAX_CLOSING_GAP = 10  # times the usual distance of points, between the last and the first point of a centerline
+TRACK_MARGIN = 50  # m, offset of the track from the origin of the coordinate system
+TRACK_CACHE_DIRECTORY = Path.home() / ".cache" / "energy-race-sim" / "tracks"
+# part of the cache key, increase whenever the fitting changes its results
+FITTING_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+class InvalidCenterlineError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Centerline:
+    """
+    Closed centerline of a track, with y pointing down like the coordinates of the tiles
+    """
+    points: np.ndarray  # shape (points, 2)
+    widths: np.ndarray  # total width of the track at each point
+
+    @property
+    def length(self) -> float:
+        return float(np.linalg.norm(np.roll(self.points, -1, axis=0) - self.points, axis=1).sum())
+
+
+@dataclass(frozen=True)
+class TileSpec:
+    """
+    Parameters of a single fitted tile to build
+    """
+    kind: str  # "straight" or "corner"
+    length: float = 0.0
+    angle: float = 0.0
+    inner_radius: float = 0.0
+    direction: str = Direction.RIGHT.name
+    width: float = 0.0
+
+
+def read_centerline(path: str | Path) -> Centerline:
+    """
+    Reads a centerline CSV of the racetrack-database (https://github.com/TUMFTM/racetrack-database): one point per
+    line with x, y, width to the right, width to the left in meters, comments start with #.
+    """
+    values = np.loadtxt(path, delimiter=",", comments="#", ndmin=2)
+    if values.shape[0] < 3 or values.shape[1] < 4:
+        raise InvalidCenterlineError(f"Expected at least 3 rows of x, y, right and left width in {path}")
+
+    points = values[:, :2] * (1, -1)  # y up in the source, down on the tiles
+    widths = values[:, 2] + values[:, 3]
+    if np.allclose(points[0], points[-1]):
+        points, widths = points[:-1], widths[:-1]
+
+    spacings = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    if np.linalg.norm(points[0] - points[-1]) > MAX_CLOSING_GAP * max(float(np.median(spacings)), 1):
+        raise InvalidCenterlineError(f"The centerline in {path} does not end where it starts")
+
+    return Centerline(points - points.min(axis=0) + TRACK_MARGIN, widths)
+
+
+@dataclass(frozen=True)
+class Fit:
+    """
+    Straight and arc from the end of the previous tile through a range of centerline points
+    """
+    straight_error: float  # maximum distance of the points from the straight
+    straight_length: float
+    arc_error: float  # maximum distance of the points from the arc
+    turn: float  # of the arc in radians, positive turning clockwise on screen
+    curvature: float  # of the arc in 1/m, signed like the turn
+
+
+def _fit(center: np.ndarray, heading: float, points: np.ndarray) -> Fit:
+    """
+    Fits a straight and an arc starting at center into the direction of heading to the given points, the arc ends
+    exactly at the last point so positions never drift apart from tile to tile.
+    """
+    forward = np.array((math.cos(heading), math.sin(heading)))
+    normal = np.array((-math.sin(heading), math.cos(heading)))
+    offsets = points - center
+    along, across = offsets @ forward, offsets @ normal
+    straight_error = float(np.abs(across).max())
+
+    # a circle touching the start with curvature k passes through the end if k * (along² + across²) = 2 * across
+    end_along, end_across = float(along[-1]), float(across[-1])
+    distance_squared = end_along ** 2 + end_across ** 2
+    curvature = 2 * end_across / distance_squared if distance_squared > 0 else 0.0
+    if abs(curvature) < MIN_CURVATURE:
+        return Fit(straight_error, end_along, math.inf, 0.0, 0.0)
+
+    radius = 1 / curvature
+    arc_error = float(np.abs(np.hypot(along, across - radius) - abs(radius)).max())
+    return Fit(straight_error, end_along, arc_error, 2 * math.atan2(end_across, end_along), curvature)
+
+
+def fit_tiles(centerline: Centerline, tolerance: float = FIT_TOLERANCE,
+              heading_tolerance: float = HEADING_TOLERANCE) -> tuple[Position, list[TileSpec]]:
+    """
+    Greedily fits straights and corners along the centerline, each as long as all its points stay within the
+    tolerance and it ends in about the direction of the centerline. Every tile starts where the previously built
+    tile actually ends, so rounding of the tile geometry never accumulates. The tile length is found by doubling the
+    number of points, then bisecting.
+
+    All tiles get the average width of the track, tiles of differing widths would shift the centerline.
+
+    :return: tuple of origin / tiles to build from there
+    """
+    points = _smoothed(centerline.points, max(round(HEADING_WINDOW / (centerline.length / len(centerline.points))), 1))
+    points = np.concatenate((points, points[:1]))
+    count = len(centerline.points)
+    width = float(centerline.widths.mean())
+
+    # direction of the centerline at each point, from the points about HEADING_WINDOW / 2 before and after it
+    offset = max(round(HEADING_WINDOW / 2 / (centerline.length / count)), 1)
+    tangents = np.roll(points[:-1], -offset, axis=0) - np.roll(points[:-1], offset, axis=0)
+    headings = np.arctan2(tangents[:, 1], tangents[:, 0])
+    headings = np.concatenate((headings, headings[:1]))
+    max_heading_error = math.radians(heading_tolerance)
+
+    x, y = points[0].tolist()
+    start_heading = math.degrees(headings[0])
+    builder = TrackBuilder("fit", Position(x, y, 0, start_heading).translate(width / 2, -90))
+    tiles = []
+
+    def fits(start: int, end: int) -> bool:
+        fit = _fit(center, heading, points[start + 1:end + 1])
+        return _straight_fits(fit, heading, headings[end]) or _arc_fits(fit, heading, headings[end])
+
+    def _straight_fits(fit: Fit, heading: float, end_heading: float) -> bool:
+        return fit.straight_error <= tolerance and fit.straight_length > 0 \
+            and _angle_between(heading, end_heading) <= max_heading_error
+
+    def _arc_fits(fit: Fit, heading: float, end_heading: float) -> bool:
+        return fit.arc_error <= tolerance and abs(fit.turn) <= MAX_TURN \
+            and _angle_between(heading + fit.turn, end_heading) <= max_heading_error
+
+    start = 0
+    while start < count:
+        center_position = builder.current_end.translate(width / 2, 90)
+        center = np.array((center_position.x, center_position.y))
+        heading = math.radians(center_position.orientation)
+
+        # exponential search for a failing end, then bisect between the last fitting and the failing one
+        good, step = start + 1, 1
+        while good + step <= count and fits(start, good + step):
+            good += step
+            step *= 2
+        bad = min(good + step, count + 1)
+        while bad - good > 1:
+            middle = (good + bad) // 2
+            if fits(start, middle):
+                good = middle
+            else:
+                bad = middle
+
+        fit = _fit(center, heading, points[start + 1:good + 1])
+        if _straight_fits(fit, heading, headings[good]):
+            tile = _straight(fit.straight_length, width)
+        elif _arc_fits(fit, heading, headings[good]):
+            tile = _corner(fit.turn, 1 / abs(fit.curvature), width)
+        else:
+            # not even the next point fits, e.g. after noise: a single step into the direction of the centerline
+            turn = float(np.clip((headings[good] - heading + math.pi) % (2 * math.pi) - math.pi, -MAX_TURN, MAX_TURN))
+            length = math.dist(points[start], points[good])
+            tile = _straight(length, width) if abs(turn) < 1e-6 else _corner(turn, length / abs(turn), width)
+        tiles.append(tile)
+        _build(builder, tile)
+        start = good
+
+    return builder.track_origin, tiles
+
+
+def _straight(length: float, width: float) -> TileSpec:
+    return TileSpec("straight", length=max(length, 0.0), width=width)
+
+
+def _corner(turn: float, radius: float, width: float) -> TileSpec:
+    """
+    :param turn: in radians, positive turning clockwise on screen
+    :param radius: of the centerline
+    """
+    return TileSpec("corner", angle=math.degrees(abs(turn)), inner_radius=max(radius - width / 2, MIN_CORNER_RADIUS),
+                    direction=(Direction.RIGHT if turn > 0 else Direction.LEFT).name, width=width)
+
+
+def _smoothed(points: np.ndarray, window: int) -> np.ndarray:
+    """
+    :return: circular moving average of the points over the given number of points, against measurement noise
+    """
+    if window < 3:
+        return points
+    window -= 1 - window % 2  # odd, so it is centered
+    padded = np.concatenate((points[-(window // 2):], points, points[:window // 2]))
+    kernel = np.full(window, 1 / window)
+    return np.column_stack([np.convolve(padded[:, axis], kernel, mode="valid") for axis in range(2)])
+
+
+def _angle_between(first: float, second: float) -> float:
+    return abs((first - second + math.pi) % (2 * math.pi) - math.pi)
+
+
+def _build(builder: TrackBuilder, tile: TileSpec) -> TrackBuilder:
+    if tile.kind == "straight":
+        return builder.into_straight(tile.length, tile.width)
+    return builder.into_corner(Direction[tile.direction], tile.angle, tile.inner_radius, tile.width)
+
+
+def build_track(name: str, origin: Position, tiles: list[TileSpec]) -> Track:
+    builder = TrackBuilder(name, origin)
+    for tile in tiles:
+        _build(builder, tile)
+    return builder.loop()
+
+
+def file_hash(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_track_csv(path: str | Path, tolerance: float = FIT_TOLERANCE,
+                   cache_directory: str | Path | None = TRACK_CACHE_DIRECTORY, name: str = None) -> Track:
+    """
+    Imports a track from a centerline CSV, see read_centerline. The fitted track is cached as track file keyed by
+    the hash of the CSV file and the tolerance, so each file is only fitted once.
+
+    :param cache_directory: where to cache fitted tracks, None to always fit
+    :param name: of the track, defaults to the file name
+    """
+    path = Path(path)
+    name = name or path.stem
+    cache_path = None
+    if cache_directory is not None:
+        key = f"{file_hash(path)}/{tolerance}/{FITTING_VERSION}/{TRACK_FILE_VERSION}"
+        key = hashlib.sha256(key.encode()).hexdigest()[:32]
+        cache_path = Path(cache_directory) / f"{path.stem}-{key}{TRACK_FILE_SUFFIX}"
+        if cache_path.exists():
+            log.debug(f"Using cached track of {path} from {cache_path}")
+            track = Track.load(cache_path)
+            track.name = name
+            return track
+
+    track = build_track(name, *fit_tiles(read_centerline(path), tolerance))
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, a concurrent import never reads a partial cache entry
+        temporary = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        track.save(temporary)
+        temporary.replace(cache_path)
+
+    return track
+
+
+def load_track_directory(directory: str | Path, tolerance: float = FIT_TOLERANCE,
+                         cache_directory: str | Path | None = TRACK_CACHE_DIRECTORY) -> dict[str, Track]:
+    """
+    :return: tracks of all CSV files in the directory by file name, e.g. of the tracks directory of the
+    racetrack-database
+    """
+    return {path.stem: load_track_csv(path, tolerance, cache_directory)
+            for path in sorted(Path(directory).glob("*.csv"))}
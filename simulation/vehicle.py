@@ -4,17 +4,23 @@ from typing import Self
 
 from simulation.base import Tickable, TickableDelta
 from simulation.environment import Environment
-from simulation.physics import power_for_velocity
+from simulation.physics import power_for_velocity, energy_for_climb, battery_power, VehicleParameters, \
+    DEFAULT_VEHICLE_PARAMETERS
+from simulation.telemetry import telemetry
 from simulation.track import TrackLocation
 from simulation.units import convert_seconds_to_hours
 
 # vehicle has standby power, lets say 1kW. I think it was 500W in sentry mode only???
 STANDBY_POWER = 1000
 
+LOOKAHEAD_FACTOR = 20
+ACCELERATION_SAFETY_FACTOR = 0.90
+ACCELERATION_SAFETY_DISTANCE = 40  # always decelerate if distance is less than this
+
 log = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Vehicle(Tickable):
     name: str
     color: str
@@ -30,22 +36,22 @@ class Vehicle(Tickable):
     distance_driven: float = 0
     lap_counter: int = 0
     delta_input: TickableDelta = field(default_factory=TickableDelta)
+    parameters: VehicleParameters = DEFAULT_VEHICLE_PARAMETERS
 
     @property
     def energy_used_per_distance(self) -> float:
         return self.energy_used / self.distance_driven if self.distance_driven > 0 else float("inf")
 
     def apply(self, environment: Environment, time_delta: int) -> Self:
-        log.info(self.status_static())
+        telemetry.emit("vehicle.status", self.status_static)
 
         delta = self.calculate_delta(environment, time_delta)
 
-        log.info(self.status_delta(time_delta, delta))
+        telemetry.emit("vehicle.delta", self.status_delta, time_delta, delta)
         return self.derive(delta)
 
     def calculate_delta(self, environment: Environment, time_delta_seconds: int) -> TickableDelta:
-        lookahead_factor = 20
-        lookahead_distance = self.max_speed * time_delta_seconds * lookahead_factor
+        lookahead_distance = self.max_speed * time_delta_seconds * LOOKAHEAD_FACTOR
         speed_limit_locations = self.location.get_upcoming_max_speed_locations(lookahead_distance,
                                                                                self.tire_friction_coefficient,
                                                                                self.height,
@@ -54,17 +60,15 @@ class Vehicle(Tickable):
                                         key=lambda x: (x.speed_limit - self.current_speed) / time_delta_seconds)
         acceleration: float = self.max_acceleration
 
-        acceleration_safety_factor = 0.90
-        acceleration_safety_distance = 40  # always decelerate if distance is less than this
         # average deceleration to reach speed limit with the given distance
         if speed_limit_most_relevant.distance > 0:
             # This calculation is entirely based on co-pilot, not sure if it is correct
             deceleration = (self.current_speed ** 2 - speed_limit_most_relevant.speed_limit ** 2) / (
                         2 * speed_limit_most_relevant.distance)
             # TODO: also check for minimum distance to avoid unnecessary acceleration
-            if deceleration >= self.max_acceleration * acceleration_safety_factor or speed_limit_most_relevant.distance < acceleration_safety_distance:
+            if deceleration >= self.max_acceleration * ACCELERATION_SAFETY_FACTOR or speed_limit_most_relevant.distance < ACCELERATION_SAFETY_DISTANCE:
                 acceleration = -deceleration
-        elif self.current_speed > speed_limit_most_relevant.speed_limit * acceleration_safety_factor:
+        elif self.current_speed > speed_limit_most_relevant.speed_limit * ACCELERATION_SAFETY_FACTOR:
             # Assume we already did all the
             acceleration = 0
 
@@ -81,16 +85,20 @@ class Vehicle(Tickable):
         average_speed: float = (self.current_speed + new_speed) / 2
         distance_delta: float = average_speed * time_delta_seconds
 
-        new_location, passed_finish_line = self.location.move(distance_delta)
-
-        # This does not work if multiple laps are done in one tick, but probably not relevant
-        delta_lap = 1 if passed_finish_line else 0
+        new_location, delta_lap = self.location.advance(distance_delta)
 
         # TODO: calculate energy needed/gained for velocity change specifically in relation to the rate of change and thus resistance/efficiency
         # + energy for keeping velocity (as of now)
-        energy_delta = -power_for_velocity(average_speed) * convert_seconds_to_hours(time_delta_seconds) \
+        energy_delta = -battery_power(power_for_velocity(average_speed, self.parameters), self.parameters) \
+            * convert_seconds_to_hours(time_delta_seconds) \
             if acceleration >= 0 else 0 + -STANDBY_POWER * convert_seconds_to_hours(time_delta_seconds)
 
+        elevation = self.location.track.elevation_profile
+        if not elevation.is_flat:
+            start = self.location.distance
+            energy_delta -= convert_seconds_to_hours(energy_for_climb(*elevation.climb(start, start + distance_delta),
+                                                                      self.parameters))
+
         return TickableDelta(speed_delta, acceleration, energy_delta, distance_delta, new_location, delta_lap)
 
     def derive(self, delta: TickableDelta) -> Self:
@@ -108,7 +116,8 @@ class Vehicle(Tickable):
             current_speed=self.current_speed + delta.speed_delta,
             distance_driven=self.distance_driven + delta.distance_delta,
             lap_counter=self.lap_counter + delta.delta_lap,
-            delta_input=delta
+            delta_input=delta,
+            parameters=self.parameters,
         )
 
     def status_static(self) -> str:
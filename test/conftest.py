@@ -0,0 +1,33 @@
+"""
+Vehicles and simulations shared by the tests. Test files only override the parameters their tests are about.
+"""
+from simulation.environment import Environment
+from simulation.simulation import Simulation, MAX_RUNTIME_SECONDS
+from simulation.track import Track
+from simulation.tracks import create_hockenheimring_short_2
+from simulation.vehicle import Vehicle
+
+
+def create_test_vehicle(name: str = "test", color: str = "red", **overrides) -> Vehicle:
+    """
+    :param overrides: any other field of Vehicle, e.g. max_speed=40
+    """
+    parameters = dict(max_acceleration=2, max_speed=33, energy_stored=10_000, tire_friction_coefficient=0.8,
+                      height=1.5, track_width=1.9)
+    return Vehicle(name, color, **{**parameters, **overrides})
+
+
+def create_test_simulation(vehicles: list[Vehicle] = None, track: Track = None,
+                           max_runtime_seconds: float = MAX_RUNTIME_SECONDS, simulation_class: type = Simulation,
+                           **options) -> Simulation:
+    """
+    :param vehicles: defaults to a single test vehicle
+    :param track: defaults to the short Hockenheimring
+    :param options: passed on to the simulation, e.g. lap_replay=True
+    :return: simulation with the vehicles placed at the start, ready to tick
+    """
+    vehicles = vehicles if vehicles is not None else [create_test_vehicle()]
+    simulation = simulation_class(vehicles, Environment(track or create_hockenheimring_short_2()), max_runtime_seconds,
+                                  **options)
+    simulation.setup()
+    return simulation
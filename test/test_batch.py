@@ -0,0 +1,58 @@
+import pytest
+from assertpy import assert_that
+
+from simulation.batch import BatchSimulation
+from simulation.environment import Environment
+from simulation.position import Position
+from simulation.simulation import Simulation
+from simulation.tile import Direction
+from simulation.track import TrackBuilder
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle
+
+track = TrackBuilder("Batch Track", Position(0, 0, 0, 0)) \
+    .into_straight(300) \
+    .into_corner(Direction.RIGHT, 90, 15) \
+    .into_straight(50) \
+    .into_corner(Direction.RIGHT, 90, 40) \
+    .into_straight(300) \
+    .into_corner(Direction.RIGHT, 180, 25) \
+    .loop()
+
+
+def create_vehicles() -> list[Vehicle]:
+    return [
+        create_test_vehicle("slow", "red"),
+        create_test_vehicle("fast", "blue", max_acceleration=4, max_speed=40),
+        create_test_vehicle("grippy", "green", max_acceleration=3, max_speed=50, energy_stored=200,
+                            tire_friction_coefficient=1.1, height=1.2, track_width=2),
+    ]
+
+
+def run(simulation: Simulation, seconds_per_tick: int) -> Simulation:
+    simulation.setup()
+    while not simulation.is_done():
+        simulation.tick(seconds_per_tick)
+    return simulation
+
+
+@pytest.mark.parametrize("seconds_per_tick", [1, 3])
+def test__batch_simulation__equivalent_to_scalar(seconds_per_tick):
+    scalar = run(Simulation(create_vehicles(), Environment(track), 600), seconds_per_tick)
+    batch = run(BatchSimulation(create_vehicles(), Environment(track), 600), seconds_per_tick)
+
+    for field in ("speed", "acceleration", "energy_stored", "distance", "lap", "tile_index", "progress"):
+        expected = scalar.vehicle_history.column(field)
+        actual = batch.vehicle_history.column(field)
+        assert_that(abs(expected - actual).max()).described_as(field).is_less_than_or_equal_to(1e-6)
+
+
+def test__batch_simulation__vehicles_materialized_on_access():
+    scalar = run(Simulation(create_vehicles(), Environment(track), 120), 1)
+    batch = run(BatchSimulation(create_vehicles(), Environment(track), 120), 1)
+
+    for expected, actual in zip(scalar.vehicles, batch.vehicles):
+        assert_that(actual.name).is_equal_to(expected.name)
+        assert_that(actual.location).is_equal_to(expected.location)
+        assert_that(actual.lap_counter).is_equal_to(expected.lap_counter)
+        assert_that(actual.current_speed).is_close_to(expected.current_speed, 1e-6)
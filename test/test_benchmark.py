@@ -0,0 +1,55 @@
+import dataclasses
+
+from assertpy import assert_that
+
+from simulation.benchmark import benchmark_matrix, run_benchmarks, save_baseline, load_baseline, find_regressions, \
+    BenchmarkCase, run_case
+from simulation.history import FIELDS
+from simulation.tracks import create_synthetic_track
+
+
+def test__synthetic_track__has_requested_tiles():
+    track = create_synthetic_track(1000)
+
+    assert_that(track.tiles).is_length(1000)
+    assert_that(create_synthetic_track(1000).compiled.total_length).is_equal_to(track.compiled.total_length)
+
+
+def test__benchmark_matrix__all_combinations():
+    cases = benchmark_matrix(["basic-oval", "synthetic-1000"], [1, 4], [1, 5])
+
+    assert_that(cases).is_length(8)
+    assert_that(cases).contains(BenchmarkCase("synthetic-1000", 4, 5, "scalar"))
+    assert_that(benchmark_matrix).raises(ValueError).when_called_with(engines=["warp"])
+
+
+def test__run_benchmarks__measures_and_detects_regressions(tmp_path):
+    cases = benchmark_matrix(["basic-oval"], [2], [1], ["scalar", "batch"])
+    results = list(run_benchmarks(cases, max_runtime_seconds=60, isolated=False))
+
+    assert_that(results).is_length(2)
+    for result in results:
+        assert_that(result.ticks).is_equal_to(60)
+        assert_that(result.ticks_per_second).is_greater_than(0)
+        assert_that(result.peak_rss_bytes).is_greater_than(0)
+        assert_that(result.history_bytes_per_tick).is_greater_than(0)
+
+    path = tmp_path / "baseline.json"
+    save_baseline(results, path)
+    baseline = load_baseline(path)
+    assert_that(baseline).contains_key(cases[0].key, cases[1].key)
+    assert_that(find_regressions(results, baseline)).is_empty()
+
+    slower = dataclasses.replace(results[0], seconds=results[0].seconds * 2)
+    regressions = find_regressions([slower], baseline, threshold=0.2)
+    assert_that(regressions).is_length(1)
+    assert_that(regressions[0].metric).is_equal_to("ticks_per_second")
+    assert_that(regressions[0].change).is_close_to(-0.5, 1e-9)
+
+
+def test__run_case__counts_executed_ticks_and_recorded_bytes():
+    result = run_case(BenchmarkCase("basic-oval", 1, 1, "replay"), max_runtime_seconds=3600)
+
+    # steady laps are skipped without ticking
+    assert_that(result.ticks).is_less_than(3600)
+    assert_that(result.history_bytes_per_tick).is_equal_to((1 + len(FIELDS)) * 8)
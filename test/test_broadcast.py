@@ -0,0 +1,111 @@
+import asyncio
+from dataclasses import dataclass, field
+
+from assertpy import assert_that
+
+from ui.broadcast import Broadcaster
+
+
+@dataclass
+class Element:
+    id: str
+    content: str
+    attrs: dict = field(init=False)
+
+    def __post_init__(self):
+        self.attrs = {"id": self.id}
+
+
+def render(element: Element) -> str:
+    return f"{element.id}:{element.content}"
+
+
+class Client:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.received: list[str] = []
+
+    async def send(self, message: str):
+        await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+
+def test__broadcaster__renders_each_element_once():
+    rendered = []
+
+    async def run():
+        broadcaster = Broadcaster(lambda element: rendered.append(element) or render(element))
+        clients = [Client() for _ in range(3)]
+        for client in clients:
+            broadcaster.connect(client.send)
+
+        broadcaster.broadcast([Element("vehicles", "1"), Element("charts", "1")])
+        await broadcaster.drain()
+        return clients
+
+    clients = asyncio.run(run())
+
+    assert_that(rendered).is_length(2)
+    for client in clients:
+        assert_that(client.received).is_equal_to(["vehicles:1", "charts:1"])
+
+
+def test__broadcaster__slow_session_does_not_block_and_gets_latest_frame():
+    async def run():
+        broadcaster = Broadcaster(render)
+        fast, slow = Client(), Client(delay=0.05)
+        broadcaster.connect(fast.send)
+        slow_channel = broadcaster.connect(slow.send)
+
+        for frame in range(10):
+            broadcaster.broadcast([Element("vehicles", str(frame))])
+            await asyncio.sleep(0.001)
+        await broadcaster.drain()
+        return fast, slow, slow_channel
+
+    fast, slow, slow_channel = asyncio.run(run())
+
+    assert_that(fast.received).is_length(10)
+    assert_that(slow.received[0]).is_equal_to("vehicles:0")
+    assert_that(slow.received[-1]).is_equal_to("vehicles:9")
+    assert_that(len(slow.received)).is_less_than(10)
+    assert_that(slow_channel.dropped).is_equal_to(10 - len(slow.received))
+
+
+def test__broadcaster__failing_session_is_closed_and_removed():
+    async def failing_send(message: str):
+        raise ConnectionError()
+
+    async def run():
+        broadcaster = Broadcaster(render)
+        client = Client()
+        broadcaster.connect(client.send)
+        failing = broadcaster.connect(failing_send)
+
+        broadcaster.broadcast([Element("vehicles", "1")])
+        await broadcaster.drain()
+        broadcaster.broadcast([Element("vehicles", "2")])
+        await broadcaster.drain()
+        return broadcaster, client, failing
+
+    broadcaster, client, failing = asyncio.run(run())
+
+    assert_that(failing.closed).is_true()
+    assert_that(broadcaster.channels).is_length(1)
+    assert_that(client.received).is_equal_to(["vehicles:1", "vehicles:2"])
+
+
+def test__session_channel__bounded_without_keys():
+    async def run():
+        broadcaster = Broadcaster(str, max_pending=3)
+        client = Client(delay=0.01)
+        channel = broadcaster.connect(client.send)
+        for message in range(10):
+            broadcaster.send_to(channel, message)
+        await broadcaster.drain()
+        return client, channel
+
+    client, channel = asyncio.run(run())
+
+    assert_that(client.received).is_equal_to(["7", "8", "9"])
+    assert_that(channel.dropped).is_equal_to(7)
@@ -0,0 +1,107 @@
+from assertpy import assert_that
+
+from simulation.batch import BatchSimulation
+from simulation.checkpoint import Checkpoint, CheckpointWriter, IncompatibleCheckpointError, checkpoint_paths, \
+    latest_checkpoint
+from simulation.simulation import Simulation
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def create_simulation(max_runtime_seconds=2 * 60 * 60, simulation_class=Simulation) -> Simulation:
+    vehicles = [create_test_vehicle("red", "red"),
+                create_test_vehicle("blue", "blue", max_acceleration=4, max_speed=40)]
+    return create_test_simulation(vehicles, max_runtime_seconds=max_runtime_seconds,
+                                  simulation_class=simulation_class)
+
+
+def assert_same_vehicles(vehicles: list[Vehicle], expected: list[Vehicle]):
+    for vehicle, expected_vehicle in zip(vehicles, expected):
+        assert_that(vehicle.current_speed).is_equal_to(expected_vehicle.current_speed)
+        assert_that(vehicle.energy_stored).is_equal_to(expected_vehicle.energy_stored)
+        assert_that(vehicle.distance_driven).is_equal_to(expected_vehicle.distance_driven)
+        assert_that(vehicle.lap_counter).is_equal_to(expected_vehicle.lap_counter)
+        assert_that(vehicle.location.distance).is_equal_to(expected_vehicle.location.distance)
+
+
+def test__checkpoint__resumed_run_matches_uninterrupted_run():
+    uninterrupted = create_simulation()
+    uninterrupted.loop(1)
+
+    first_half = create_simulation(max_runtime_seconds=60 * 60)
+    first_half.loop(1)
+    checkpoint = Checkpoint.from_bytes(Checkpoint.of(first_half).to_bytes())
+    resumed = checkpoint.restore(max_runtime_seconds=2 * 60 * 60)
+    resumed.loop(1)
+
+    assert_that(resumed.time).is_equal_to(uninterrupted.time)
+    assert_same_vehicles(resumed.vehicles, uninterrupted.vehicles)
+    assert_that(resumed.vehicle_history.times.tolist()).is_equal_to(uninterrupted.vehicle_history.times.tolist())
+    assert_that(resumed.vehicle_history.column("speed").tolist()) \
+        .is_equal_to(uninterrupted.vehicle_history.column("speed").tolist())
+
+
+def test__checkpoint__fork_from_earlier_time_without_resimulating():
+    simulation = create_simulation()
+    simulation.loop(1)
+
+    fork = Checkpoint.of(simulation, 600).restore()
+
+    assert_that(fork.time).is_equal_to(600)
+    assert_that(len(fork.vehicle_history)).is_equal_to(601)
+    assert_same_vehicles(fork.vehicles, list(simulation.vehicle_history[600]))
+
+    fork.loop(1)
+    assert_same_vehicles(fork.vehicles, simulation.vehicles)
+
+
+def test__checkpoint__forks_are_independent():
+    simulation = create_simulation(max_runtime_seconds=600)
+    simulation.loop(1)
+    checkpoint = Checkpoint.of(simulation)
+
+    faster = checkpoint.restore(max_runtime_seconds=1200)
+    faster.vehicles[0].max_speed = 40
+    faster.loop(1)
+    unchanged = checkpoint.restore(max_runtime_seconds=1200)
+    unchanged.loop(1)
+
+    assert_that(checkpoint.vehicles[0].max_speed).is_equal_to(33)
+    assert_that(len(checkpoint.history)).is_equal_to(601)
+    assert_that(faster.vehicles[0].distance_driven).is_greater_than(unchanged.vehicles[0].distance_driven)
+
+
+def test__checkpoint__batch_simulation_resumes():
+    uninterrupted = create_simulation(simulation_class=BatchSimulation)
+    uninterrupted.loop(1)
+
+    first_half = create_simulation(max_runtime_seconds=60 * 60, simulation_class=BatchSimulation)
+    first_half.loop(1)
+    resumed = Checkpoint.of(first_half).restore(max_runtime_seconds=2 * 60 * 60)
+    resumed.loop(1)
+
+    assert_that(resumed).is_instance_of(BatchSimulation)
+    assert_same_vehicles(resumed.vehicles, uninterrupted.vehicles)
+
+
+def test__checkpoint__incompatible_version_raises():
+    checkpoint = Checkpoint.of(create_simulation())
+    checkpoint.version = 0
+
+    assert_that(Checkpoint.from_bytes).raises(IncompatibleCheckpointError).when_called_with(checkpoint.to_bytes())
+
+
+def test__checkpoint_writer__writes_periodically_and_keeps_latest(tmp_path):
+    simulation = create_simulation(max_runtime_seconds=60 * 60)
+    simulation.loop(1, checkpoints=CheckpointWriter(tmp_path, interval_seconds=10 * 60, keep=2))
+
+    assert_that([path.name for path in checkpoint_paths(tmp_path)]) \
+        .is_equal_to(["checkpoint-000003000.checkpoint.gz", "checkpoint-000003600.checkpoint.gz"])
+    assert_that(latest_checkpoint(tmp_path).time).is_equal_to(3600)
+
+
+def test__checkpoint__unreadable_data_raises():
+    data = Checkpoint.of(create_simulation()).to_bytes()
+
+    assert_that(Checkpoint.from_bytes).raises(IncompatibleCheckpointError).when_called_with(data[:len(data) // 2])
+    assert_that(Checkpoint.from_bytes).raises(IncompatibleCheckpointError).when_called_with(b"no checkpoint")
@@ -0,0 +1,129 @@
+import dataclasses
+
+import numpy as np
+import pytest
+from assertpy import assert_that
+
+from simulation.batch import BatchSimulation
+from simulation.elevation import ElevationDoesNotCloseError
+from simulation.environment import Environment
+from simulation.phase import PhaseIntegrator
+from simulation.physics import energy_for_climb, VEHICLE_MASS, GRAVITY, REGEN_EFFICIENCY
+from simulation.position import Position
+from simulation.simulation import Simulation
+from simulation.stepper import AdaptiveStepper
+from simulation.tile import Direction
+from simulation.track import TrackBuilder
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle
+
+
+def create_track(rise: float):
+    """
+    :return: oval climbing by rise on the first straight and descending again on the second one
+    """
+    return TrackBuilder("Hill", Position(0, 0, 0, 0)) \
+        .into_straight(200, rise=rise) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .into_straight(200, rise=-rise) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .loop()
+
+
+hill_track = create_track(10)
+flat_track = create_track(0)
+
+
+def create_vehicle() -> Vehicle:
+    return create_test_vehicle("climber")
+
+
+def run(simulation: Simulation) -> Simulation:
+    simulation.setup()
+    while not simulation.is_done():
+        simulation.tick(1)
+    return simulation
+
+
+def test__elevation_profile__grades_and_heights():
+    profile = hill_track.elevation_profile
+
+    assert_that(profile.is_flat).is_false()
+    assert_that(flat_track.elevation_profile.is_flat).is_true()
+    assert_that(profile.grade_at(100)).is_equal_to(0.05)
+    assert_that(profile.elevation_at(100)).is_close_to(5, 1e-9)
+    assert_that(profile.elevation_at(profile.total_length - 1)).is_close_to(0, 1e-9)
+    assert_that(hill_track.tiles[3].get_destination().z).is_close_to(0, 1e-9)
+    assert_that(hill_track.tiles[1].get_absolute_position(50).z).is_close_to(10, 1e-9)
+
+
+def test__elevation_profile__lap_must_end_at_start_height():
+    track = TrackBuilder("Ramp", Position(0, 0, 0, 0)) \
+        .into_straight(200, rise=10) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .into_straight(200) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .loop()
+
+    with pytest.raises(ElevationDoesNotCloseError):
+        track.elevation_profile
+
+
+def test__elevation_profile__climb_spans_laps():
+    profile = hill_track.elevation_profile
+
+    assert_that(profile.climb(100, 150)).is_equal_to((2.5, 0.0))
+    ascent, descent = profile.climb(0, 3 * profile.total_length + 100)
+    assert_that(ascent).is_close_to(35, 1e-9)
+    assert_that(descent).is_close_to(30, 1e-9)
+
+    starts = np.array([0, 100, 250, profile.total_length - 10])
+    ascents, descents = profile.climb_many(starts, starts + 500)
+    for start, ascent, descent in zip(starts, ascents, descents):
+        assert_that((ascent, descent)).is_equal_to(profile.climb(start, start + 500))
+
+
+def test__energy_for_climb__recovers_part_on_descents():
+    assert_that(energy_for_climb(10, 0)).is_equal_to(VEHICLE_MASS * GRAVITY * 10)
+    assert_that(energy_for_climb(10, 10)).is_close_to(VEHICLE_MASS * GRAVITY * 10 * (1 - REGEN_EFFICIENCY), 1e-6)
+    assert_that(energy_for_climb(0, 10)).is_less_than(0)
+
+
+def test__simulation__hills_cost_energy():
+    flat = run(Simulation([create_vehicle()], Environment(flat_track), 600)).vehicles[0]
+    hill = run(Simulation([create_vehicle()], Environment(hill_track), 600)).vehicles[0]
+    batch = run(BatchSimulation([create_vehicle()], Environment(hill_track), 600)).vehicles[0]
+
+    assert_that(hill.distance_driven).is_equal_to(flat.distance_driven)
+    assert_that(hill.energy_used).is_greater_than(flat.energy_used)
+    assert_that(batch.energy_used).is_close_to(hill.energy_used, 1e-6)
+
+
+def test__phase_integrator__hills_cost_energy():
+    flat = PhaseIntegrator(create_vehicle(), flat_track).run(600)
+    hill = PhaseIntegrator(create_vehicle(), hill_track).run(600)
+
+    assert_that(hill.distance_driven).is_close_to(flat.distance_driven, 1e-6)
+    laps = hill.distance_driven / hill_track.total_length
+    expected = energy_for_climb(10, 10) / 3600 * laps
+    assert_that(hill.energy_used - flat.energy_used).is_close_to(expected, expected * 0.1)
+
+
+def test__adaptive_stepper__stops_at_energy_exhaustion_on_climbs():
+    track = TrackBuilder("Long Hill", Position(0, 0, 0, 0)) \
+        .into_straight(20_000, rise=1000) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .into_straight(20_000, rise=-1000) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .loop()
+    vehicle = dataclasses.replace(create_vehicle(), energy_stored=3000)
+
+    fixed = Simulation([vehicle], Environment(track), 600)
+    fixed.loop()
+    adaptive = Simulation([vehicle], Environment(track), 600)
+    adaptive.loop(stepper=AdaptiveStepper(min_step=1, max_step=60))
+
+    expected, actual = fixed.vehicles[0], adaptive.vehicles[0]
+    assert_that(track.elevation_profile.distance_to_grade_change(100)).is_close_to(19_900, 1e-9)
+    assert_that(actual.distance_driven).is_close_to(expected.distance_driven, expected.distance_driven * 0.05)
+    assert_that(actual.energy_stored).is_close_to(expected.energy_stored, 50)
@@ -0,0 +1,88 @@
+import pytest
+from assertpy import assert_that
+
+from simulation.environment import Environment
+from simulation.history import VehicleHistory, HistoryIsAppendOnlyError
+from simulation.position import Position
+from simulation.simulation import Simulation
+from simulation.tile import Direction
+from simulation.track import TrackBuilder
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle
+
+track = TrackBuilder("History Oval", Position(0, 0, 0, 0)) \
+    .into_straight(100) \
+    .into_corner(Direction.RIGHT, 180, 20) \
+    .into_straight(100) \
+    .into_corner(Direction.RIGHT, 180, 20) \
+    .loop()
+
+
+def create_vehicle(name: str) -> Vehicle:
+    return create_test_vehicle(name, track_width=2)
+
+
+def run_simulation(seconds: int) -> Simulation:
+    simulation = Simulation([create_vehicle("a"), create_vehicle("b")], Environment(track), seconds)
+    simulation.loop()
+    return simulation
+
+
+def test__history__vehicle_view_matches_simulated_vehicle():
+    simulation = run_simulation(30)
+
+    vehicle = simulation.vehicle_history[simulation.time][1]
+
+    assert_that(vehicle).is_equal_to(simulation.vehicles[1])
+
+
+def test__history__keys_are_recorded_times():
+    simulation = run_simulation(30)
+
+    assert_that(list(simulation.vehicle_history.keys())).is_equal_to(list(range(0, 31)))
+
+
+def test__history__column_is_slice_over_time():
+    simulation = run_simulation(30)
+
+    speeds = simulation.vehicle_history.column("speed", 0)
+
+    assert_that(speeds.tolist()).is_equal_to(
+        [time_slot[0].current_speed for time_slot in simulation.vehicle_history.values()])
+
+
+def test__history__grows_beyond_initial_capacity():
+    vehicles = [create_vehicle("a")]
+    history = VehicleHistory(vehicles, track, capacity=2)
+
+    for time in range(5):
+        history[time] = vehicles
+
+    assert_that(history).is_length(5)
+    assert_that(history[4][0].current_speed).is_equal_to(0)
+
+
+def test__history__same_time_replaces_last_entry():
+    vehicles = [create_vehicle("a")]
+    history = VehicleHistory(vehicles, track)
+
+    history[0] = vehicles
+    history[0] = [create_vehicle("b")]
+
+    assert_that(history).is_length(1)
+    assert_that(history[0][0].name).is_equal_to("b")
+
+
+def test__history__unknown_time():
+    history = VehicleHistory([create_vehicle("a")], track)
+
+    with pytest.raises(KeyError):
+        _ = history[10]
+
+
+def test__history__earlier_time_is_rejected():
+    vehicles = [create_vehicle("a")]
+    history = VehicleHistory(vehicles, track)
+    history[10] = vehicles
+
+    assert_that(history.__setitem__).raises(HistoryIsAppendOnlyError).when_called_with(5, vehicles)
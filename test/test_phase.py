@@ -0,0 +1,59 @@
+from assertpy import assert_that
+
+from simulation.environment import Environment
+from simulation.phase import PhaseIntegrator
+from simulation.physics import power_for_velocity
+from simulation.position import Position
+from simulation.simulation import Simulation
+from simulation.track import TrackBuilder
+from simulation.tracks import create_hockenheimring_short_2
+from simulation.units import convert_seconds_to_hours
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle
+
+straight_track = TrackBuilder("Straight", Position(0, 0, 0, 0)) \
+    .into_straight(1000) \
+    .loop()
+
+
+def create_vehicle(max_acceleration=2, max_speed=20, energy_stored=10_000) -> Vehicle:
+    return create_test_vehicle("phase", max_acceleration=max_acceleration, max_speed=max_speed,
+                               energy_stored=energy_stored)
+
+
+def test__phase_integrator__accelerate_then_cruise():
+    summary = PhaseIntegrator(create_vehicle(), straight_track).run(60)
+
+    assert_that(summary.laps).is_equal_to(1)
+    assert_that(summary.distance_driven).is_close_to(100 + 20 * 50, 1e-6)
+    assert_that(summary.current_speed).is_equal_to(20)
+    assert_that(summary.energy_used).is_greater_than(power_for_velocity(20) * convert_seconds_to_hours(50))
+
+
+def test__phase_integrator__out_of_energy_stops_vehicle():
+    summary = PhaseIntegrator(create_vehicle(energy_stored=20), straight_track).run(3600)
+
+    assert_that(summary.current_speed).is_equal_to(0)
+    assert_that(summary.energy_stored).is_less_than_or_equal_to(0)
+    assert_that(summary.time).is_equal_to(3600)
+
+
+def test__phase_integrator__long_run_only_integrates_distinct_laps():
+    summary = PhaseIntegrator(create_vehicle(max_speed=33, energy_stored=1_000_000),
+                              create_hockenheimring_short_2()).run(24 * 60 * 60)
+
+    assert_that(summary.distinct_laps).is_less_than_or_equal_to(3)
+    assert_that(summary.laps).is_greater_than(500)
+
+
+def test__phase_integrator__close_to_ticked_simulation():
+    track = create_hockenheimring_short_2()
+    simulation = Simulation([create_vehicle(max_speed=33)], Environment(track), 1800)
+    simulation.loop()
+    ticked = simulation.vehicles[0]
+
+    summary = PhaseIntegrator(create_vehicle(max_speed=33), track).run(1800)
+
+    assert_that(summary.distance_driven).is_close_to(ticked.distance_driven, ticked.distance_driven * 0.1)
+    assert_that(summary.energy_used / summary.distance_driven).is_close_to(
+        ticked.energy_used_per_distance, ticked.energy_used_per_distance * 0.1)
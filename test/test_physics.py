@@ -0,0 +1,91 @@
+import dataclasses
+
+import numpy as np
+from assertpy import assert_that
+
+from simulation.batch import BatchSimulation
+from simulation.environment import Environment
+from simulation.physics import VehicleParameters, power_for_velocity, power_for_velocity_change, battery_power, \
+    driving_power, energy_for_velocity_change, energy_for_constant_acceleration, DEFAULT_VEHICLE_PARAMETERS
+from simulation.position import Position
+from simulation.simulation import Simulation
+from simulation.stepper import AdaptiveStepper
+from simulation.tile import Direction
+from simulation.track import TrackBuilder
+from simulation.tracks import create_basic_oval
+from test.conftest import create_test_vehicle
+
+heavy = VehicleParameters(mass=2500, drag_coefficient=0.3, drivetrain_efficiency=0.9, regen_efficiency=0.7)
+
+
+def test__power_for_velocity__same_as_before_parameters():
+    # air resistance of a model 3 plus roll resistance at 1950kg
+    expected = (0.23 * 1.433 * 1.850 * 30 * 30 / 2 * 1.2041 + 0.012 * 1950 * 9.81) * 30
+
+    assert_that(power_for_velocity(30)).is_close_to(expected, 1e-9)
+    assert_that(power_for_velocity(30, heavy)).is_greater_than(expected)
+
+
+def test__physics__vectorized_matches_scalar():
+    speeds = np.linspace(0, 50, 1000)
+    accelerations = np.linspace(-4, 4, 1000)
+    parameters = VehicleParameters.stacked([heavy if index % 2 else DEFAULT_VEHICLE_PARAMETERS
+                                            for index in range(1000)])
+
+    powers = driving_power(speeds, accelerations, 0.02, parameters)
+    energies = energy_for_constant_acceleration(speeds, speeds + 1, 5, parameters)
+
+    for index in (0, 1, 500, 999):
+        single = heavy if index % 2 else DEFAULT_VEHICLE_PARAMETERS
+        assert_that(powers[index]).is_close_to(driving_power(speeds[index], accelerations[index], 0.02, single), 1e-6)
+        assert_that(energies[index]).is_close_to(
+            energy_for_constant_acceleration(speeds[index], speeds[index] + 1, 5, single), 1e-6)
+
+
+def test__battery_power__drivetrain_losses_and_regen():
+    assert_that(battery_power(900.0, heavy)).is_close_to(1000, 1e-9)
+    assert_that(battery_power(-1000.0, heavy)).is_close_to(-700, 1e-9)
+    assert_that(battery_power(900.0, heavy)).is_type_of(float)
+    assert_that(battery_power(np.array([900.0, -1000.0]), heavy).tolist()).is_equal_to([1000.0, -700.0])
+    assert_that(power_for_velocity_change(20, -2, heavy)).is_equal_to(-100_000)
+    assert_that(driving_power(20, -2, parameters=heavy)).is_less_than(0)
+    assert_that(energy_for_velocity_change(20, 0, heavy)).is_close_to(-2500 * 20 ** 2 / 2 * 0.7, 1e-6)
+
+
+def test__simulation__uses_vehicle_parameters():
+    vehicles = [create_test_vehicle("default")]
+    vehicles.append(dataclasses.replace(vehicles[0], name="heavy", parameters=heavy))
+
+    scalar = Simulation(vehicles, Environment(create_basic_oval()), 300)
+    batch = BatchSimulation(vehicles, Environment(create_basic_oval()), 300)
+    for simulation in (scalar, batch):
+        simulation.setup()
+        while not simulation.is_done():
+            simulation.tick(1)
+
+    default, heavier = scalar.vehicles
+    assert_that(heavier.parameters).is_equal_to(heavy)
+    assert_that(heavier.distance_driven).is_equal_to(default.distance_driven)
+    assert_that(heavier.energy_used).is_greater_than(default.energy_used)
+    assert_that(heavier.energy_stored).is_type_of(float)
+    for vehicle, batch_vehicle in zip(scalar.vehicles, batch.vehicles):
+        assert_that(batch_vehicle.energy_used).is_close_to(vehicle.energy_used, 1e-6)
+
+
+def test__adaptive_stepper__includes_drivetrain_losses():
+    track = TrackBuilder("Long Oval", Position(0, 0, 0, 0)) \
+        .into_straight(20_000) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .into_straight(20_000) \
+        .into_corner(Direction.RIGHT, 180, 30) \
+        .loop()
+    vehicle = create_test_vehicle("lossy", energy_stored=100, parameters=VehicleParameters(drivetrain_efficiency=0.5))
+
+    fixed = Simulation([vehicle], Environment(track), 600)
+    fixed.loop()
+    adaptive = Simulation([vehicle], Environment(track), 600)
+    adaptive.loop(stepper=AdaptiveStepper(min_step=1, max_step=60))
+
+    expected, actual = fixed.vehicles[0], adaptive.vehicles[0]
+    assert_that(actual.distance_driven).is_close_to(expected.distance_driven, expected.distance_driven * 0.05)
+    assert_that(actual.energy_stored).is_close_to(expected.energy_stored, 5)
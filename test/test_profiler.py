@@ -0,0 +1,58 @@
+import json
+
+from assertpy import assert_that
+
+from simulation.profiler import TickProfiler, ProfilerAlreadyInstalledError
+from simulation.simulation import Simulation
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def create_simulation(profiler: TickProfiler = None) -> Simulation:
+    return create_test_simulation([create_test_vehicle("profiled")], max_runtime_seconds=100, profiler=profiler)
+
+
+def test__tick_profiler__records_phases_of_each_tick():
+    with TickProfiler() as profiler:
+        create_simulation(profiler).loop()
+
+    assert_that(profiler.ticks.calls).is_equal_to(100)
+    assert_that(profiler.phases["calculate_delta"].calls).is_equal_to(100)
+    assert_that(profiler.phases["lookahead"].calls).is_equal_to(100)
+    assert_that(profiler.phases["move"].calls).is_equal_to(100)
+    assert_that(profiler.phases["derive"].calls).is_equal_to(100)
+    assert_that(profiler.phases["history"].calls).is_equal_to(100)
+    assert_that(profiler.phases["calculate_delta"].total_ns).is_less_than_or_equal_to(profiler.ticks.total_ns)
+    assert_that(profiler.ticks_per_second).is_greater_than(0)
+    assert_that(profiler.summary()).contains("calculate_delta", "ticks/second")
+
+
+def test__tick_profiler__ignores_simulations_without_profiler_and_restores_methods():
+    original = Vehicle.calculate_delta
+    with TickProfiler() as profiler:
+        assert_that(Vehicle.calculate_delta).is_not_same_as(original)
+        create_simulation().loop()
+
+    assert_that(Vehicle.calculate_delta).is_same_as(original)
+    assert_that(profiler.ticks.calls).is_zero()
+    assert_that(profiler.phases["calculate_delta"].calls).is_zero()
+
+
+def test__tick_profiler__single_installation():
+    with TickProfiler():
+        assert_that(TickProfiler().install).raises(ProfilerAlreadyInstalledError).when_called_with()
+
+
+def test__tick_profiler__allocations_and_chrome_trace(tmp_path):
+    with TickProfiler(track_allocations=True, trace=True) as profiler:
+        create_simulation(profiler).loop()
+
+    assert_that(profiler.allocated_bytes_per_tick).is_greater_than(0)
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(path)
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert_that(events).is_length(600)
+    assert_that({event["name"] for event in events}) \
+        .is_equal_to({"tick", "calculate_delta", "lookahead", "move", "derive", "history"})
+    assert_that(events[0]).contains_key("ts", "dur", "ph")
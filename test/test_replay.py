@@ -0,0 +1,81 @@
+from assertpy import assert_that
+
+from simulation.environment import Environment
+from simulation.simulation import Simulation
+from simulation.tracks import create_hockenheimring_short_2, create_basic_oval
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def create_vehicles(energy_stored=200_000) -> list[Vehicle]:
+    return [create_test_vehicle("red", "red", max_acceleration=4, max_speed=50, height=1.4, track_width=1.8,
+                                tire_friction_coefficient=0.9, energy_stored=energy_stored)]
+
+
+def run(vehicles: list[Vehicle], track, max_runtime_seconds: int, lap_replay: bool) -> Simulation:
+    simulation = Simulation(vehicles, Environment(track), max_runtime_seconds, lap_replay=lap_replay)
+    simulation.loop(1)
+    return simulation
+
+
+def assert_same_result(replayed: list[Vehicle], ticked: list[Vehicle]):
+    for vehicle, expected in zip(replayed, ticked):
+        assert_that(vehicle.lap_counter).is_equal_to(expected.lap_counter)
+        assert_that(vehicle.current_speed).is_equal_to(expected.current_speed)
+        assert_that(vehicle.location.distance).is_equal_to(expected.location.distance)
+        assert_that(vehicle.distance_driven).is_close_to(expected.distance_driven, 1e-6)
+        assert_that(vehicle.energy_stored).is_close_to(expected.energy_stored, 1e-6)
+
+
+def test__lap_replay__same_result_as_ticking_until_energy_runs_out():
+    ticked = run(create_vehicles(), create_hockenheimring_short_2(), 24 * 60 * 60, lap_replay=False)
+    replayed = run(create_vehicles(), create_hockenheimring_short_2(), 24 * 60 * 60, lap_replay=True)
+
+    assert_same_result(replayed.vehicles, ticked.vehicles)
+    assert_that(replayed.vehicles[0].energy_stored).is_less_than_or_equal_to(0)
+    assert_that(replayed.time).is_equal_to(ticked.time)
+    assert_that(len(replayed.vehicle_history)).is_less_than(len(ticked.vehicle_history) // 10)
+
+
+def test__lap_replay__multiple_vehicles_same_result_as_ticking():
+    def vehicles():
+        return create_vehicles() + [create_test_vehicle("blue", "blue", max_acceleration=3, max_speed=40,
+                                                        track_width=1.6, energy_stored=60_000)]
+
+    ticked = run(vehicles(), create_basic_oval(), 6 * 60 * 60, lap_replay=False)
+    replayed = run(vehicles(), create_basic_oval(), 6 * 60 * 60, lap_replay=True)
+
+    assert_same_result(replayed.vehicles, ticked.vehicles)
+
+
+def test__lap_replay__detects_repeating_finish_line_state():
+    simulation = create_test_simulation(create_vehicles(), lap_replay=True)
+    while not simulation.lap_replay.is_replaying(0):
+        simulation.tick(1)
+
+    cached = simulation.lap_replay.recordings[0].cached
+    assert_that(cached.laps).is_greater_than(0)
+    assert_that(cached.energy).is_less_than(0)
+    assert_that(cached.uniform_step).is_equal_to(1)
+
+
+def test__lap_replay__parameter_change_falls_back_to_ticking():
+    simulation = create_test_simulation(create_vehicles(), lap_replay=True)
+    while not simulation.lap_replay.is_replaying(0):
+        simulation.tick(1)
+
+    simulation.vehicles[0].max_speed = 30
+    simulation.tick(1)
+
+    assert_that(simulation.lap_replay.is_replaying(0)).is_false()
+    assert_that(simulation.vehicles[0].current_speed).is_less_than_or_equal_to(30)
+
+
+def test__lap_replay__tick_length_change_falls_back_to_ticking():
+    simulation = create_test_simulation(create_vehicles(), lap_replay=True)
+    replay = simulation.lap_replay
+    while not replay.is_replaying(0):
+        simulation.tick(1)
+
+    assert_that(replay.delta_for(0, simulation.vehicles[0], 2)).is_none()
+    assert_that(replay.is_replaying(0)).is_false()
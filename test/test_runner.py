@@ -0,0 +1,65 @@
+import time
+
+from assertpy import assert_that
+
+from simulation.runner import SimulationRunner
+from simulation.simulation import Simulation
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def create_simulation() -> Simulation:
+    return create_test_simulation([create_test_vehicle("runner")])
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert_that(time.monotonic()).is_less_than(deadline)
+        time.sleep(0.005)
+
+
+def test__simulation_runner__ticks_in_background_and_publishes_frames():
+    runner = SimulationRunner(create_simulation(), ticks_per_second=1000)
+    runner.start()
+    try:
+        runner.run().result(timeout=1)
+        wait_for(lambda: runner.latest_frame().time >= 50)
+        runner.pause().result(timeout=1)
+
+        frame = runner.latest_frame()
+        assert_that(frame.running).is_false()
+        assert_that(frame.history_length).is_equal_to(frame.time + 1)
+        assert_that(frame.vehicles[0].distance_driven).is_greater_than(0)
+        assert_that(frame.history.column("distance", 0)[frame.history_length - 1]) \
+            .is_equal_to(frame.vehicles[0].distance_driven)
+    finally:
+        runner.stop(timeout=1)
+
+
+def test__simulation_runner__single_step():
+    runner = SimulationRunner(create_simulation(), ticks_per_second=1000, seconds_per_tick=5)
+    runner.start()
+    try:
+        runner.step().result(timeout=1)
+        wait_for(lambda: not runner.latest_frame().running)
+
+        assert_that(runner.latest_frame().time).is_equal_to(5)
+    finally:
+        runner.stop(timeout=1)
+
+
+def test__simulation_runner__replace_simulation():
+    runner = SimulationRunner(create_simulation(), ticks_per_second=1000)
+    runner.start()
+    try:
+        runner.run().result(timeout=1)
+        wait_for(lambda: runner.latest_frame().time >= 10)
+        replacement = create_simulation()
+        runner.replace(replacement).result(timeout=1)
+
+        frame = runner.latest_frame()
+        assert_that(frame.history).is_same_as(replacement.vehicle_history)
+        assert_that(frame.time).is_equal_to(0)
+        assert_that(frame.running).is_false()
+    finally:
+        runner.stop(timeout=1)
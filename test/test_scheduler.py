@@ -0,0 +1,88 @@
+from assertpy import assert_that
+
+from simulation.scheduler import TickScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test__tick_scheduler__runs_ticks_on_schedule():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=10, clock=clock)
+
+    assert_that(scheduler.run_due(lambda: True)).is_equal_to(1)
+    assert_that(scheduler.run_due(lambda: True)).is_equal_to(0)
+    assert_that(scheduler.seconds_until_next_tick()).is_close_to(0.1, 1e-9)
+
+    clock.now += 0.1
+    assert_that(scheduler.run_due(lambda: True)).is_equal_to(1)
+
+
+def test__tick_scheduler__catches_up_without_drift():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=10, clock=clock)
+    scheduler.run_due(lambda: True)
+
+    # a slow tick delays everything by 0.35 seconds, the missed ticks run as one batch
+    clock.now += 0.35
+    assert_that(scheduler.run_due(lambda: True)).is_equal_to(3)
+    # the next tick stays on the original schedule
+    assert_that(scheduler.seconds_until_next_tick()).is_close_to(0.05, 1e-9)
+
+
+def test__tick_scheduler__skips_backlog_beyond_cap():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=10, max_catch_up_ticks=20, clock=clock)
+    scheduler.run_due(lambda: True)
+
+    clock.now += 60
+    assert_that(scheduler.run_due(lambda: True)).is_equal_to(20)
+    assert_that(scheduler.metric().skipped_ticks).is_equal_to(580)
+    assert_that(scheduler.metric().lag_ticks).is_equal_to(0)
+
+
+def test__tick_scheduler__stops_batch_when_tick_returns_false():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=10, clock=clock)
+    scheduler.run_due(lambda: True)
+
+    clock.now += 1
+    assert_that(scheduler.run_due(lambda: False)).is_equal_to(1)
+
+
+def test__tick_scheduler__max_speed_runs_batches_until_deadline():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=1, max_speed=True, max_speed_batch_seconds=0.05, clock=clock)
+
+    def tick():
+        clock.now += 0.001
+        return True
+
+    ticks = scheduler.run_due(tick)
+    assert_that(ticks).is_between(49, 51)
+    assert_that(scheduler.seconds_until_next_tick()).is_equal_to(0)
+
+    scheduler.run_due(tick)
+    metric = scheduler.metric()
+    assert_that(metric.target_ticks_per_second).is_none()
+    assert_that(metric.achieved_ticks_per_second).is_close_to(1000, 30)
+
+
+def test__tick_scheduler__metric_compares_achieved_with_target():
+    clock = FakeClock()
+    scheduler = TickScheduler(ticks_per_second=10, seconds_per_tick=5, clock=clock)
+
+    for _ in range(21):
+        scheduler.run_due(lambda: True)
+        clock.now += 0.1
+
+    metric = scheduler.metric()
+    assert_that(metric.achieved_ticks_per_second).is_close_to(10, 1e-6)
+    assert_that(metric.achieved_ratio).is_close_to(1, 1e-6)
+    assert_that(metric.target_time_ratio).is_equal_to(50)
+    assert_that(metric.achieved_time_ratio).is_close_to(50, 1e-5)
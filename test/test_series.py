@@ -0,0 +1,92 @@
+import dataclasses
+
+import numpy as np
+from assertpy import assert_that
+
+from simulation.simulation import Simulation
+from test.conftest import create_test_vehicle, create_test_simulation
+from ui.series import MinMaxDownsampler, HistorySeries, history_field
+
+
+def test__min_max_downsampler__keeps_all_points_below_budget():
+    downsampler = MinMaxDownsampler(max_points=100)
+    downsampler.extend(np.arange(10.0), np.arange(10.0) ** 2)
+
+    x, y = downsampler.points()
+    assert_that(x.tolist()).is_equal_to(np.arange(10.0).tolist())
+    assert_that(y.tolist()).is_equal_to((np.arange(10.0) ** 2).tolist())
+
+
+def test__min_max_downsampler__caps_points_and_keeps_peaks():
+    x = np.arange(100_000.0)
+    y = np.sin(x / 1000)
+    y[54_321] = 5
+    y[12_345] = -5
+
+    downsampler = MinMaxDownsampler(max_points=200)
+    for chunk in range(0, len(x), 777):
+        downsampler.extend(x[chunk:chunk + 777], y[chunk:chunk + 777])
+
+    sampled_x, sampled_y = downsampler.points()
+    assert_that(len(sampled_x)).is_less_than_or_equal_to(200)
+    assert_that(sampled_y.max()).is_equal_to(5)
+    assert_that(sampled_y.min()).is_equal_to(-5)
+    assert_that(sampled_x.tolist()).contains(54_321.0, 12_345.0, 99_999.0)
+    assert_that(np.all(np.diff(sampled_x) > 0)).is_true()
+
+
+def test__min_max_downsampler__incremental_equals_at_once():
+    x = np.arange(5000.0)
+    y = np.random.default_rng(42).normal(size=len(x))
+
+    at_once = MinMaxDownsampler(max_points=100)
+    at_once.extend(x, y)
+    incremental = MinMaxDownsampler(max_points=100)
+    for index in range(len(x)):
+        incremental.extend(x[index:index + 1], y[index:index + 1])
+
+    assert_that(incremental.points()[0].tolist()).is_equal_to(at_once.points()[0].tolist())
+    assert_that(incremental.points()[1].tolist()).is_equal_to(at_once.points()[1].tolist())
+
+
+def create_simulation() -> Simulation:
+    return create_test_simulation([create_test_vehicle("series")])
+
+
+def test__history_series__only_reads_new_ticks():
+    simulation = create_simulation()
+    series = HistorySeries(history_field("speed"), max_points=10_000)
+    for _ in range(300):
+        simulation.tick(1)
+        series.update(simulation.vehicle_history)
+
+    assert_that(series.synced).is_equal_to(301)
+    assert_that(series.points(0)[1].tolist()).is_equal_to(simulation.vehicle_history.column("speed", 0).tolist())
+
+
+def test__history_series__starts_over_for_new_simulation():
+    series = HistorySeries(history_field("distance"))
+    simulation = create_simulation()
+    for _ in range(100):
+        simulation.tick(1)
+    series.update(simulation.vehicle_history)
+
+    series.update(create_simulation().vehicle_history)
+
+    assert_that(series.synced).is_equal_to(1)
+    assert_that(series.points(0)[1].tolist()).is_equal_to([0.0])
+
+
+def test__history_series__rereads_replaced_entry():
+    simulation = create_simulation()
+    series = HistorySeries(history_field("speed"), max_points=10_000)
+    for _ in range(10):
+        simulation.tick(1)
+    series.update(simulation.vehicle_history)
+
+    simulation.vehicle_history[simulation.time] = [dataclasses.replace(simulation.vehicles[0], current_speed=99.0)]
+    series.update(simulation.vehicle_history)
+
+    assert_that(series.synced).is_equal_to(11)
+    assert_that(series.points(0)[1].tolist()).is_equal_to(simulation.vehicle_history.column("speed", 0).tolist())
+    assert_that(series.points(0)[1][-1]).is_equal_to(99.0)
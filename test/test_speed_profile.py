@@ -0,0 +1,54 @@
+import math
+
+from assertpy import assert_that
+
+from simulation.position import Position
+from simulation.speed_profile import SpeedLimitDistance
+from simulation.tile import Direction
+from simulation.track import TrackBuilder
+
+track = TrackBuilder("Profile Track", Position(0, 0, 0, 0)) \
+    .into_straight(100) \
+    .into_corner(Direction.RIGHT, 180, 10) \
+    .into_straight(100) \
+    .into_corner(Direction.RIGHT, 180, 10) \
+    .loop()
+
+
+def test__speed_limit_profile__merges_equal_consecutive_limits():
+    profile = track.speed_limit_profile(0.8, 1.5, 2)
+
+    assert_that(track.tiles).is_length(6)
+    assert_that(profile.distances).is_length(4)
+    assert_that(profile.speed_limits[0]).is_equal_to(math.inf)
+
+
+def test__speed_limit_profile__is_cached_per_vehicle_setup():
+    assert_that(track.speed_limit_profile(0.8, 1.5, 2)).is_same_as(track.speed_limit_profile(0.8, 1.5, 2))
+    assert_that(track.speed_limit_profile(0.8, 1.5, 2)).is_not_same_as(track.speed_limit_profile(0.9, 1.5, 2))
+
+
+def test__speed_limit_profile__upcoming__within_lap():
+    profile = track.speed_limit_profile(0.8, 1.5, 2)
+    corner_speed = track.tiles[1].max_speed(0.8, 1.5, 2)
+
+    upcoming = profile.upcoming(50, 60)
+
+    assert_that(upcoming).is_equal_to([SpeedLimitDistance(0.0, math.inf), SpeedLimitDistance(50, corner_speed)])
+
+
+def test__speed_limit_profile__upcoming__wraps_around_lap():
+    profile = track.speed_limit_profile(0.8, 1.5, 2)
+
+    upcoming = profile.upcoming(profile.distances[-1] + 1, track.total_length)
+
+    assert_that([location.speed_limit for location in upcoming]).is_equal_to(
+        [profile.speed_limits[-1], *profile.speed_limits])
+    assert_that(upcoming[1].distance).is_close_to(profile.total_length - profile.distances[-1] - 1, 0.001)
+
+
+def test__speed_limit_profile__matches_tile_lookup():
+    profile = track.speed_limit_profile(0.8, 1.5, 2)
+
+    for tile, distance in zip(track.tiles, track.compiled.cumulative_distances):
+        assert_that(profile.speed_limit_at(distance)).is_equal_to(tile.max_speed(0.8, 1.5, 2))
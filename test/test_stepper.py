@@ -0,0 +1,56 @@
+from assertpy import assert_that
+
+from simulation.environment import Environment
+from simulation.simulation import Simulation
+from simulation.stepper import AdaptiveStepper
+from simulation.tracks import create_basic_oval
+from simulation.vehicle import Vehicle
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def create_vehicles() -> list[Vehicle]:
+    return [
+        create_test_vehicle("slow", "red", energy_stored=2_000),
+        create_test_vehicle("fast", "blue", max_acceleration=4, max_speed=40, energy_stored=2_000),
+    ]
+
+
+def test__adaptive_stepper__same_result_with_fewer_ticks():
+    fixed = Simulation(create_vehicles(), Environment(create_basic_oval()), 3600)
+    fixed.loop()
+    adaptive = Simulation(create_vehicles(), Environment(create_basic_oval()), 3600)
+    adaptive.loop(stepper=AdaptiveStepper(min_step=1, max_step=60))
+
+    assert_that(adaptive.time).is_equal_to(fixed.time)
+    assert_that(len(adaptive.vehicle_history)).is_less_than(len(fixed.vehicle_history) / 2)
+    for expected, actual in zip(fixed.vehicles, adaptive.vehicles):
+        assert_that(actual.lap_counter).is_equal_to(expected.lap_counter)
+        assert_that(actual.distance_driven).is_close_to(expected.distance_driven, expected.distance_driven * 0.001)
+        assert_that(actual.energy_used).is_close_to(expected.energy_used, expected.energy_used * 0.001)
+
+
+def test__adaptive_stepper__min_step_while_accelerating():
+    simulation = Simulation(create_vehicles(), Environment(create_basic_oval()), 3600)
+    simulation.setup()
+
+    simulation.tick(simulation.next_step(AdaptiveStepper(min_step=1, max_step=60)))
+
+    assert_that(simulation.time).is_equal_to(1)
+
+
+def test__adaptive_stepper__does_not_exceed_runtime():
+    simulation = Simulation(create_vehicles(), Environment(create_basic_oval()), 90)
+
+    simulation.loop(stepper=AdaptiveStepper(min_step=1, max_step=60))
+
+    assert_that(simulation.time).is_equal_to(90)
+
+
+def test__vehicle__multiple_laps_in_one_tick():
+    track = create_basic_oval()
+    simulation = create_test_simulation([create_test_vehicle("fast", max_acceleration=4, max_speed=40,
+                                                             energy_stored=2_000, current_speed=40)], track, 3600)
+
+    simulation.tick(round(track.total_length * 2.5 / 40))
+
+    assert_that(simulation.vehicles[0].lap_counter).is_equal_to(2)
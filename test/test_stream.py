@@ -0,0 +1,100 @@
+from assertpy import assert_that
+
+from simulation.simulation import Simulation
+from test.conftest import create_test_vehicle, create_test_simulation
+from ui.series import HistorySeries, history_field
+from ui.stream import ChartStream, MAX_UNACKED_UPDATES
+
+
+def create_simulation() -> Simulation:
+    return create_test_simulation([create_test_vehicle(name, name) for name in ("red", "blue")])
+
+
+def tick(simulation: Simulation, charts: dict[str, HistorySeries], ticks: int):
+    for _ in range(ticks):
+        simulation.tick(1)
+    for series in charts.values():
+        series.update(simulation.vehicle_history)
+
+
+def test__chart_stream__sends_only_new_points():
+    simulation = create_simulation()
+    charts = {"chart-speed": HistorySeries(history_field("speed"))}
+    stream = ChartStream()
+    tick(simulation, charts, 10)
+    stream.synced(charts)
+
+    tick(simulation, charts, 5)
+    update = stream.update(charts)
+
+    speed = update["charts"]["chart-speed"]
+    assert_that(speed["start"]).is_equal_to([11, 11])
+    assert_that(speed["x"][0]).is_equal_to([11_000, 12_000, 13_000, 14_000, 15_000])
+    assert_that(speed["y"][1]).is_equal_to(simulation.vehicle_history.column("speed", 1)[11:].tolist())
+
+
+def test__chart_stream__resends_points_until_acknowledged():
+    simulation = create_simulation()
+    charts = {"chart-speed": HistorySeries(history_field("speed"))}
+    stream = ChartStream()
+    tick(simulation, charts, 10)
+    stream.synced(charts)
+
+    tick(simulation, charts, 5)
+    lost = stream.update(charts)
+    tick(simulation, charts, 5)
+    resent = stream.update(charts)
+    stream.acknowledge(resent["update"])
+    tick(simulation, charts, 5)
+    acknowledged = stream.update(charts)
+
+    assert_that(resent["charts"]["chart-speed"]["start"]).is_equal_to(lost["charts"]["chart-speed"]["start"])
+    assert_that(resent["charts"]["chart-speed"]["x"][0]).is_length(10)
+    assert_that(acknowledged["charts"]["chart-speed"]["start"]).is_equal_to([21, 21])
+    assert_that(acknowledged["charts"]["chart-speed"]["x"][0]).is_length(5)
+
+
+def test__chart_stream__up_to_date_client_gets_nothing():
+    simulation = create_simulation()
+    charts = {"chart-speed": HistorySeries(history_field("speed"))}
+    stream = ChartStream()
+    tick(simulation, charts, 10)
+    stream.synced(charts)
+
+    assert_that(stream.update(charts)).is_none()
+
+
+def test__chart_stream__merged_buckets_are_sent_completely():
+    simulation = create_simulation()
+    charts = {"chart-speed": HistorySeries(history_field("speed"), max_points=20)}
+    stream = ChartStream()
+    tick(simulation, charts, 5)
+    stream.synced(charts)
+
+    tick(simulation, charts, 100)
+    update = stream.update(charts)
+
+    assert_that(update["charts"]["chart-speed"]["start"]).is_equal_to([0, 0])
+    assert_that(len(update["charts"]["chart-speed"]["x"][0])).is_less_than_or_equal_to(20)
+
+
+def test__chart_stream__limits_unacknowledged_updates():
+    simulation = create_simulation()
+    charts = {"chart-speed": HistorySeries(history_field("speed"))}
+    stream = ChartStream()
+    tick(simulation, charts, 10)
+    stream.synced(charts)
+    synced = stream.acknowledged
+
+    updates = []
+    for _ in range(MAX_UNACKED_UPDATES + 10):
+        tick(simulation, charts, 1)
+        updates.append(stream.update(charts))
+
+    assert_that(stream.sent).is_length(MAX_UNACKED_UPDATES)
+    stream.acknowledge(updates[0]["update"])
+    assert_that(stream.acknowledged).is_equal_to(synced)
+    stream.acknowledge(updates[-1]["update"])
+    assert_that(stream.sent).is_empty()
+    tick(simulation, charts, 1)
+    assert_that(stream.update(charts)["charts"]["chart-speed"]["x"][0]).is_length(1)
@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from assertpy import assert_that
+
+import simulation.sweep
+from simulation.sweep import parameter_grid, sweep, run_single, _init_worker
+from simulation.tracks import create_basic_oval
+from simulation.vehicle import Vehicle
+
+base_vehicle = Vehicle("sweep", "red", max_acceleration=2, max_speed=33, energy_stored=10_000,
+                       tire_friction_coefficient=0.8, height=1.5, track_width=1.9)
+
+
+def test__parameter_grid__all_combinations():
+    grid = parameter_grid(max_speed=[33, 40], max_acceleration=[2, 3, 4])
+
+    assert_that(grid).is_length(6)
+    assert_that(grid).contains({"max_speed": 40, "max_acceleration": 3})
+
+
+def test__parameter_grid__unknown_parameter():
+    assert_that(parameter_grid).raises(ValueError).when_called_with(color=["red"])
+
+
+def test__sweep__matches_single_runs():
+    track = create_basic_oval()
+    grid = parameter_grid(max_speed=[33, 40], max_acceleration=[2, 4])
+
+    results = list(sweep(track, base_vehicle, grid, max_runtime_seconds=120, max_workers=2))
+
+    assert_that(results).is_length(4)
+    fastest = max(results, key=lambda result: result.distance_driven)
+    assert_that(fastest).is_equal_to(
+        run_single(track, Vehicle("sweep", "red", max_acceleration=4, max_speed=40, energy_stored=10_000,
+                                  tire_friction_coefficient=0.8, height=1.5, track_width=1.9), 120, 1))
+
+
+def worker_track_is_memory_mapped() -> bool:
+    return isinstance(simulation.sweep._worker_track.compiled.cumulative_distance_array, np.memmap)
+
+
+def test__sweep__workers_memory_map_the_track_file(tmp_path):
+    path = tmp_path / "oval.track"
+    create_basic_oval().save(path)
+
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(path,)) as executor:
+        assert_that(executor.submit(worker_track_is_memory_mapped).result()).is_true()
+
+    results = list(sweep(path, base_vehicle, parameter_grid(max_speed=[33]), max_runtime_seconds=60, max_workers=1))
+    assert_that(results[0]).is_equal_to(run_single(create_basic_oval(), base_vehicle, 60, 1))
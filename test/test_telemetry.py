@@ -0,0 +1,61 @@
+import logging
+
+from assertpy import assert_that
+
+from simulation.telemetry import Telemetry, RecordingSink, LoggingSink, telemetry
+from simulation.tracks import create_basic_oval
+from test.conftest import create_test_vehicle, create_test_simulation
+
+
+def failing_payload():
+    raise AssertionError("payload must not be evaluated")
+
+
+def test__telemetry__no_sink__payload_not_evaluated():
+    Telemetry().emit("test", failing_payload)
+
+
+def test__telemetry__logging_sink_below_level__payload_not_evaluated():
+    logging.getLogger("telemetry-test").setLevel(logging.WARNING)
+
+    Telemetry([LoggingSink("telemetry-test")]).emit("test", failing_payload, level=logging.INFO)
+
+
+def test__telemetry__quiet__payload_not_evaluated():
+    subject = Telemetry([RecordingSink()])
+
+    with subject.silenced():
+        subject.emit("test", failing_payload)
+
+    assert_that(subject.quiet).is_false()
+
+
+def test__telemetry__payload_passed_to_enabled_sinks_only():
+    debug_sink = RecordingSink(logging.DEBUG)
+    warning_sink = RecordingSink(logging.WARNING)
+
+    Telemetry([debug_sink, warning_sink]).emit("test", lambda: "payload", level=logging.INFO)
+
+    assert_that(debug_sink.events).is_equal_to([("test", "payload")])
+    assert_that(warning_sink.events).is_empty()
+
+
+def test__telemetry__simulation_tick_emits_vehicle_status():
+    sink = RecordingSink()
+    telemetry.sinks.append(sink)
+    try:
+        simulation = create_test_simulation([create_test_vehicle(track_width=2)], create_basic_oval(), 1)
+        simulation.loop()
+    finally:
+        telemetry.sinks.remove(sink)
+
+    assert_that([event for event, _ in sink.events]).is_equal_to(
+        ["simulation.tick", "vehicle.status", "vehicle.delta", "environment.status"])
+
+
+def test__telemetry__payload_called_with_arguments():
+    sink = RecordingSink()
+
+    Telemetry([sink]).emit("test", "{} of {}".format, 1, 2, level=logging.INFO)
+
+    assert_that(sink.events).is_equal_to([("test", "1 of 2")])
@@ -1,8 +1,12 @@
+import math
+
+import numpy as np
 import pytest
 from assertpy import assert_that
 
 from simulation.position import Position
-from simulation.tile import Direction, CornerTile, StraightTile
+from simulation.tile import Direction, CornerTile, StraightTile, PolylineTile, TileIsImmutableError, \
+    InvalidPolylineError
 
 POSITION_0_0_0_0 = Position(0, 0, 0, 0)
 
@@ -148,3 +152,72 @@ def test__corner__path_length(origin, length: float, path_length_expected: float
     tile = StraightTile(origin, length)
 
     assert_that(tile.path_length()).is_equal_to(path_length_expected)
+
+
+def test__tile__geometry_is_cached():
+    tile = CornerTile(POSITION_0_0_0_0, 90, 10, Direction.RIGHT)
+
+    assert_that(tile.get_destination()).is_same_as(tile.get_destination())
+    assert_that(tile.get_defining_points()).is_same_as(tile.get_defining_points())
+    assert_that(tile.max_speed(0.8, 1.5, 1.9)).is_not_equal_to(tile.max_speed(1.0, 1.5, 1.9))
+
+
+def test__tile__is_immutable():
+    tile = StraightTile(POSITION_0_0_0_0, 20)
+
+    with pytest.raises(TileIsImmutableError):
+        tile.length = 30
+
+
+def test__tile__modify_invalidates_geometry():
+    tile = StraightTile(POSITION_0_0_0_0, 20)
+    assert_that(tile.get_destination()).is_equal_to(Position(20, 0, 0, 0))
+
+    tile.modify(length=30)
+
+    assert_that(tile.path_length()).is_equal_to(30)
+    assert_that(tile.get_destination()).is_equal_to(Position(30, 0, 0, 0))
+    assert_that(tile.modify).raises(AttributeError).when_called_with(unknown=1)
+
+
+def quarter_circle(radius: float, count: int = 200) -> np.ndarray:
+    """
+    :return: centerline points of a 90° right turn relative to its start
+    """
+    angles = np.linspace(0, math.pi / 2, count)
+    return np.column_stack((radius * np.sin(angles), radius * (1 - np.cos(angles))))
+
+
+def test__polyline__matches_corner():
+    corner = CornerTile(POSITION_0_0_0_0, 90, 20, Direction.RIGHT)
+    polyline = PolylineTile(POSITION_0_0_0_0, quarter_circle(20 + 5))
+
+    destination, expected = polyline.get_destination(), corner.get_destination()
+    assert_that(destination.x).is_close_to(expected.x, 0.01)
+    assert_that(destination.y).is_close_to(expected.y, 0.01)
+    assert_that(destination.orientation).is_close_to(90, 0.01)
+    middle, expected = polyline.get_absolute_position(50), corner.get_absolute_position(50)
+    assert_that(middle.x).is_close_to(expected.x, 0.01)
+    assert_that(middle.y).is_close_to(expected.y, 0.01)
+    assert_that(polyline.path_length()).is_close_to(25 * math.pi / 2, 0.01)
+    assert_that(polyline.max_speed(0.8, 1.5, 1.9)).is_close_to(corner.max_speed(0.8, 1.5, 1.9), 0.1)
+
+
+def test__polyline__rejects_invalid_points():
+    for points in ([(0, 0)], [0, 1, 2], np.zeros((5, 3)), np.zeros((0, 2))):
+        assert_that(PolylineTile).raises(InvalidPolylineError).when_called_with(POSITION_0_0_0_0, points)
+
+
+def test__polyline__speed_limits_follow_curvature():
+    # straight for 50m, then a quarter circle
+    points = np.concatenate((np.column_stack((np.arange(0, 50), np.zeros(50))), quarter_circle(25) + (50, 0)))
+    polyline = PolylineTile(Position(0, 0, 0, 90), points)
+
+    limits = polyline.speed_limits(0.8, 1.5, 1.9)
+
+    assert_that(limits[0]).is_equal_to((0.0, math.inf))
+    assert_that(limits[1][0]).is_between(48, 50)
+    corner_speed = CornerTile(POSITION_0_0_0_0, 90, 20, Direction.RIGHT).max_speed(0.8, 1.5, 1.9)
+    assert_that(limits[-1][1]).is_close_to(corner_speed, 0.1)
+    assert_that(len(limits)).is_less_than(5)
+    assert_that(polyline.get_absolute_position(0)).is_equal_to(Position(-5, 0, 0, 90))
@@ -1,9 +1,11 @@
+import numpy as np
 import pytest
 from assertpy import assert_that
 
+from simulation.compiled_track import TRACK_FILE_SUFFIX, InvalidTrackFileError
 from simulation.position import Position
-from simulation.track import TrackBuilder, TrackLocation
-from simulation.tile import Direction
+from simulation.track import Track, TrackBuilder, TrackLocation, TileNotPartOfTrackError
+from simulation.tile import Direction, StraightTile
 
 
 def test__simple_track():
@@ -48,3 +50,105 @@ def test__track_location__move(track_location, distance_to_move, track_location_
 
     assert_that(new_location).is_equal_to(track_location_expected)
     assert_that(finish_line_passed).is_equal_to(finish_line_passed_expected)
+
+
+def test__track__compiled__cumulative_distances():
+    compiled = simple_track.compiled
+
+    assert_that(compiled.cumulative_distances).is_length(len(simple_track.tiles) + 1)
+    assert_that(compiled.cumulative_distances[1]).is_equal_to(20)
+    assert_that(compiled.total_length).is_equal_to(simple_track.total_length)
+
+
+def test__track__tile_after__last_tile_wraps_to_start():
+    assert_that(simple_track.tile_after(simple_track.tiles[-1])).is_same_as(simple_track.starting_tile)
+
+
+def test__track__tile_after__unknown_tile():
+    unknown_tile = StraightTile(Position(0, 0, 0, 0), 20)
+
+    assert_that(simple_track.tile_after).raises(TileNotPartOfTrackError).when_called_with(unknown_tile)
+
+
+def test__track_location__advance__multiple_laps():
+    location = TrackLocation(simple_track, simple_track.starting_tile, 0.0)
+
+    new_location, laps = location.advance(simple_track.total_length * 2 + 10)
+
+    assert_that(new_location).is_equal_to(TrackLocation(simple_track, simple_track.starting_tile, 50))
+    assert_that(laps).is_equal_to(2)
+
+
+def test__track_location__distance():
+    location = TrackLocation(simple_track, simple_track.tiles[2], 50)
+
+    assert_that(location.distance).is_equal_to(round(20 + simple_track.tiles[1].path_length() + 5, 3))
+
+
+def test__track_location__frozen_and_hashable():
+    location = TrackLocation(simple_track, simple_track.tiles[2], 50)
+
+    assert_that(hash(location)).is_equal_to(hash(TrackLocation(simple_track, simple_track.tiles[2], 50.0)))
+    assert_that({location, TrackLocation(simple_track, simple_track.tiles[2], 50)}).is_length(1)
+    assert_that(location).is_not_equal_to(TrackLocation(simple_track, simple_track.tiles[3], 50))
+    with pytest.raises(AttributeError):
+        location.progress = 60
+
+
+def test__track__save_and_load(tmp_path):
+    path = tmp_path / f"simple{TRACK_FILE_SUFFIX}"
+    simple_track.save(path)
+
+    loaded = Track.load(path)
+
+    assert_that(loaded.name).is_equal_to(simple_track.name)
+    assert_that(loaded.tiles).is_length(len(simple_track.tiles))
+    assert_that(loaded.compiled.cumulative_distances).is_equal_to(simple_track.compiled.cumulative_distances)
+    assert_that(loaded.compiled.cumulative_distance_array).is_instance_of(np.memmap)
+    for original, tile in zip(simple_track.tiles, loaded.tiles):
+        assert_that(type(tile)).is_equal_to(type(original))
+        assert_that(tile.get_destination()).is_equal_to(original.get_destination())
+        assert_that(tile.get_absolute_position(50)).is_equal_to(original.get_absolute_position(50))
+    assert_that(loaded.compiled.resolve(35.5)).is_equal_to(simple_track.compiled.resolve(35.5))
+
+
+def test__track__load_rejects_other_files(tmp_path):
+    path = tmp_path / "other.track"
+    path.write_bytes(b"no track at all")
+
+    assert_that(Track.load).raises(InvalidTrackFileError).when_called_with(path)
+
+
+def test__track__load_rejects_truncated_and_corrupt_files(tmp_path):
+    path = tmp_path / "simple.track"
+    simple_track.save(path)
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-1])
+    assert_that(Track.load).raises(InvalidTrackFileError).when_called_with(path)
+    path.write_bytes(data[:len(data) // 2])
+    assert_that(Track.load).raises(InvalidTrackFileError).when_called_with(path)
+    path.write_bytes(data + bytes(16))
+    assert_that(Track.load).raises(InvalidTrackFileError).when_called_with(path)
+
+
+def test__track__save_and_load_polyline(tmp_path):
+    angles = np.linspace(0, np.pi, 100)
+    half_circle = np.column_stack((30 * np.sin(angles), 30 * (1 - np.cos(angles))))
+    track = TrackBuilder("Polyline Track", Position(0, 0, 0, 0)) \
+        .into_straight(100) \
+        .into_polyline(half_circle) \
+        .into_straight(100) \
+        .into_polyline(half_circle) \
+        .loop()
+    track.save(tmp_path / "polyline.track")
+
+    loaded = Track.load(tmp_path / "polyline.track")
+
+    assert_that(loaded.tiles[1].points.flags.writeable).is_false()  # mapped read-only from the file
+    assert_that(loaded.tiles[3].get_absolute_position(25)).is_equal_to(track.tiles[3].get_absolute_position(25))
+    assert_that(loaded.speed_limit_profile(0.8, 1.5, 1.9).distances) \
+        .is_equal_to(track.speed_limit_profile(0.8, 1.5, 1.9).distances)
+    end = loaded.tiles[-1].get_destination()
+    assert_that(end.x).is_close_to(0, 0.01)
+    assert_that(end.y).is_close_to(0, 0.01)
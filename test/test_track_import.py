@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+from assertpy import assert_that
+
+from simulation import track_import
+from simulation.track_import import load_track_csv, load_track_directory, read_centerline, InvalidCenterlineError
+
+
+def write_stadium(path, spacing=1.0, straight=300, radius=50, noise=0.0):
+    """
+    Writes the centerline of two straights joined by two half circles, 10m wide, going clockwise on screen
+    """
+    points = [(distance, 0) for distance in np.arange(0, straight, spacing)]
+    steps = int(math.pi * radius / spacing)
+    points += [(straight + radius * math.sin(math.pi * step / steps),
+                radius - radius * math.cos(math.pi * step / steps)) for step in range(steps)]
+    points += [(straight - distance, 2 * radius) for distance in np.arange(0, straight, spacing)]
+    points += [(-radius * math.sin(math.pi * step / steps), radius + radius * math.cos(math.pi * step / steps))
+               for step in range(steps)]
+    points = np.array(points) * (1, -1) + np.random.default_rng(0).normal(0, noise, (len(points), 2))
+    rows = np.column_stack((points, np.full((len(points), 2), 5)))
+    np.savetxt(path, rows, delimiter=",", header="x_m,y_m,w_tr_right_m,w_tr_left_m")
+    return path
+
+
+# corners measure their path length on the inner radius, 5m inside the centerline
+STADIUM_LENGTH = 2 * 300 + 2 * math.pi * (50 - 5)
+
+
+def test__load_track_csv__fits_stadium(tmp_path):
+    track = load_track_csv(write_stadium(tmp_path / "stadium.csv"), cache_directory=None)
+
+    assert_that(track.name).is_equal_to("stadium")
+    assert_that(len(track.tiles)).is_less_than(40)
+    assert_that(track.total_length).is_close_to(STADIUM_LENGTH, 5)
+    assert_that(track.tiles[0].width).is_equal_to(10)
+    end, origin = track.tiles[-1].get_destination(), track.origin
+    assert_that(math.dist((end.x, end.y), (origin.x, origin.y))).is_less_than(1)
+
+
+def test__load_track_csv__tolerates_noise(tmp_path):
+    track = load_track_csv(write_stadium(tmp_path / "noisy.csv", spacing=2, noise=0.1), cache_directory=None)
+
+    assert_that(len(track.tiles)).is_less_than(100)
+    assert_that(track.total_length).is_close_to(STADIUM_LENGTH, 10)
+
+
+def test__load_track_csv__reuses_cache(tmp_path, monkeypatch):
+    path = write_stadium(tmp_path / "stadium.csv")
+    track = load_track_csv(path, cache_directory=tmp_path / "cache")
+    assert_that(list((tmp_path / "cache").glob("stadium-*.track"))).is_length(1)
+
+    def fail(*arguments):
+        raise AssertionError("Tiles should be taken from the cache")
+
+    monkeypatch.setattr(track_import, "fit_tiles", fail)
+    cached = load_track_csv(path, cache_directory=tmp_path / "cache", name="cached")
+
+    assert_that(cached.name).is_equal_to("cached")
+    assert_that(cached.total_length).is_close_to(track.total_length, 1e-9)
+    assert_that(load_track_csv).raises(AssertionError).when_called_with(path, tolerance=0.2,
+                                                                         cache_directory=tmp_path / "cache")
+
+
+def test__load_track_directory__loads_every_csv(tmp_path):
+    write_stadium(tmp_path / "short.csv", straight=100)
+    write_stadium(tmp_path / "long.csv")
+
+    tracks = load_track_directory(tmp_path, cache_directory=None)
+
+    assert_that(tracks).contains_only("short", "long")
+    assert_that(tracks["short"].total_length).is_less_than(tracks["long"].total_length)
+
+
+def test__read_centerline__rejects_open_centerline(tmp_path):
+    path = tmp_path / "open.csv"
+    np.savetxt(path, [(x, 0, 5, 5) for x in range(100)], delimiter=",")
+
+    assert_that(read_centerline).raises(InvalidCenterlineError).when_called_with(path)
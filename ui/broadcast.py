@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+MAX_PENDING_MESSAGES = 32
+
+log = logging.getLogger(__name__)
+
+
+def key_of(element: Any) -> str | None:
+    """
+    :return: id of an out of band element, a newer element with the same id replaces it in the browser anyway
+    """
+    attributes = getattr(element, "attrs", None)
+    return attributes.get("id") if isinstance(attributes, dict) else None
+
+
+class SessionChannel:
+    """
+    Outgoing messages of one session, written by a task of its own so a slow session never blocks anyone else.
+    Messages with the same key replace each other while waiting, as only the latest frame of an element matters.
+    Beyond max_pending messages the oldest ones are dropped.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable], max_pending: int = MAX_PENDING_MESSAGES):
+        self.send = send
+        self.max_pending = max_pending
+        self.pending: OrderedDict[Any, str] = OrderedDict()
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._write())
+
+    def put(self, message: str, key: Any = None):
+        if self.closed:
+            return
+
+        if key is None:
+            key = object()
+        elif self.pending.pop(key, None) is not None:
+            self.dropped += 1
+        self.pending[key] = message
+
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+
+        self._idle.clear()
+        self._ready.set()
+
+    async def _write(self):
+        while not self.closed:
+            await self._ready.wait()
+            self._ready.clear()
+
+            while self.pending:
+                _, message = self.pending.popitem(last=False)
+                try:
+                    await self.send(message)
+                except Exception:
+                    log.exception("Failure on sending to session, closing it")
+                    self.close()
+                    return
+            self._idle.set()
+
+    async def drained(self):
+        await self._idle.wait()
+
+    def close(self):
+        self.closed = True
+        self.pending.clear()
+        self._idle.set()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class Broadcaster:
+    """
+    Fan-out of updates to all sessions: each element is rendered once and queued for every session, the sending
+    happens concurrently in the background. Broadcasting never waits for a session.
+    """
+
+    def __init__(self, render: Callable[[Any], str], max_pending: int = MAX_PENDING_MESSAGES):
+        self.render = render
+        self.max_pending = max_pending
+        self.channels: list[SessionChannel] = []
+
+    def connect(self, send: Callable[[str], Awaitable]) -> SessionChannel:
+        channel = SessionChannel(send, self.max_pending)
+        self.channels.append(channel)
+        return channel
+
+    def disconnect(self, channel: SessionChannel):
+        channel.close()
+        self.channels = [other for other in self.channels if other is not channel]
+
+    def broadcast(self, elements: list):
+        self.channels = [channel for channel in self.channels if not channel.closed]
+
+        messages = [(key_of(element), self.render(element)) for element in elements if element is not None]
+        for channel in self.channels:
+            for key, message in messages:
+                channel.put(message, key)
+
+    def send_to(self, channel: SessionChannel, element: Any):
+        """
+        Queue an element only meant for a single session
+        """
+        if element is not None:
+            channel.put(self.render(element), key_of(element))
+
+    async def drain(self):
+        """
+        Wait until all sessions sent their pending messages
+        """
+        await asyncio.gather(*[channel.drained() for channel in self.channels])
@@ -1,39 +1,48 @@
-import pandas as pd
+import json
+
 import plotly.graph_objects as go
 import plotly.io as pio
-from fasthtml import Div
+from fasthtml import Div, Script, Form, Input
 from fh_plotly import plotly2fasthtml
+from plotly.io import to_json
 
+from ui.series import HistorySeries, history_field
 from ui.state import ui_state
+from ui.stream import ChartStream
 
 pio.templates.default = "plotly_dark"
 
 
-def SpeedCharts():
-    # TODO: reduce resolution of charts at a certain threshold or similar
-    speed_histogram = vehicle_line_chart_over_time(lambda v: v.current_speed, "Speed (m/s)")
-    distance_histogram = vehicle_line_chart_over_time(lambda v: v.distance_driven, "Distance (m)")
-    lap_histogram = vehicle_line_chart_over_time(lambda v: v.lap_counter, "Laps")
+LINE_CHARTS: dict[str, tuple[HistorySeries, str]] = {
+    "chart-speed": (HistorySeries(history_field("speed")), "Speed (m/s)"),
+    "chart-distance": (HistorySeries(history_field("distance")), "Distance (m)"),
+    "chart-lap": (HistorySeries(history_field("lap")), "Laps"),
+    "chart-energy-stored": (HistorySeries(history_field("energy_stored")), "⚡ Stored (Wh)"),
+    "chart-energy-used": (HistorySeries(history_field("energy_used")), "⚡ Used (Wh)"),
+    "chart-energy-per-distance": (HistorySeries(
+        lambda history, vehicle_index, rows: history.energy_used_per_distance(vehicle_index, rows)),
+                                  "⚡ per Distance (Wh/m)"),
+    "chart-acceleration": (HistorySeries(history_field("acceleration")), "Accel. Δ (m/s²)"),
+    "chart-distance-delta": (HistorySeries(history_field("distance_delta")), "Distance Δ (m)"),
+    "chart-energy-delta": (HistorySeries(history_field("energy_delta")), "Energy Δ (Wh)"),
+}
 
+
+def SpeedCharts():
     return Div(
-        plotly2fasthtml(speed_histogram),
-        plotly2fasthtml(distance_histogram),
-        plotly2fasthtml(lap_histogram),
+        LineChart("chart-speed"),
+        LineChart("chart-distance"),
+        LineChart("chart-lap"),
         hx_swap_oob="true",
         cls="chart-row",
         id="chart-row")
 
 
 def EnergyCharts():
-    energy_histogram = vehicle_line_chart_over_time(lambda v: v.energy_stored, "⚡ Stored (Wh)")
-    energy_usage_histogram = vehicle_line_chart_over_time(lambda v: v.energy_used, "⚡ Used (Wh)")
-    energy_usage_per_distance_histogram = vehicle_line_chart_over_time(lambda v: v.energy_used_per_distance,
-                                                                       "⚡ per Distance (Wh/m)")
-
     return Div(
-        plotly2fasthtml(energy_histogram),
-        plotly2fasthtml(energy_usage_histogram),
-        plotly2fasthtml(energy_usage_per_distance_histogram),
+        LineChart("chart-energy-stored"),
+        LineChart("chart-energy-used"),
+        LineChart("chart-energy-per-distance"),
         hx_swap_oob="true",
         cls="chart-row2",
         id="chart-row2"
@@ -41,63 +50,106 @@ def EnergyCharts():
 
 
 def DeltaCharts():
-    acceleration_histogram = vehicle_line_chart_over_time(lambda v: v.delta_input.acceleration, "Accel. Δ (m/s²)")
-    distance_delta_histogram = vehicle_line_chart_over_time(lambda v: v.delta_input.distance_delta,
-                                                            "Distance Δ (m)")
-    energy_delta_histogram = vehicle_line_chart_over_time(lambda v: v.delta_input.energy_delta, "Energy Δ (Wh)")
-
     return Div(
-        plotly2fasthtml(acceleration_histogram),
-        plotly2fasthtml(distance_delta_histogram),
-        plotly2fasthtml(energy_delta_histogram),
+        LineChart("chart-acceleration"),
+        LineChart("chart-distance-delta"),
+        LineChart("chart-energy-delta"),
         hx_swap_oob="true",
         cls="chart-row3",
         id="chart-row3"
     )
 
 
-def vehicle_line_chart_over_time(extractor: callable, label_y: str, label_x: str = ''):
+def LineChart(chart_id: str):
+    series, label_y = LINE_CHARTS[chart_id]
+    return plotly_chart(vehicle_line_chart_over_time(series, label_y), chart_id)
+
+
+def plotly_chart(figure: go.Figure, chart_id: str):
+    """
+    Same as plotly2fasthtml, but with a stable id so streamed updates find the chart
+    """
+    return Div(Script(f"""
+        var plotly_data = {to_json(figure)};
+        Plotly.newPlot('{chart_id}', plotly_data.data, plotly_data.layout);
+    """), id=chart_id)
+
+
+def line_chart_series() -> dict[str, HistorySeries]:
+    """
+    :return: series of all line charts by chart id, updated with the latest ticks
+    """
+    frame = ui_state.frame
+    for series, _ in LINE_CHARTS.values():
+        series.update(frame.history, frame.history_length)
+    return {chart_id: series for chart_id, (series, _) in LINE_CHARTS.items()}
+
+
+def ChartStreamScript(stream: ChartStream):
+    """
+    Extends the line charts of a client by the points it is missing, see ChartStream. Nothing if it is up-to-date.
+    """
+    update = stream.update(line_chart_series())
+    if update is None:
+        return None
+    return Div(Script(f"extendCharts({json.dumps(update)});"), hx_swap_oob="true", id="chart-stream")
+
+
+def ChartAck():
+    """
+    Hidden form sending the acknowledgement of a streamed update back over the websocket, triggered by extendCharts
+    """
+    return Form(Input(type="hidden", name="ack", id="chart-ack-update"), ws_send=True, hx_trigger="chart-ack",
+                id="chart-ack")
+
+
+def vehicle_line_chart_over_time(series: HistorySeries, label_y: str, label_x: str = ''):
     histogram = go.Figure()
 
-    for index, vehicle in enumerate(ui_state.simulation.vehicles):
-        data_frame = pd.DataFrame(dict(
-            time=ui_state.simulation.vehicle_history.keys(),
-            y=[extractor(time_slot[index]) for time_slot in ui_state.simulation.vehicle_history.values()],
-        ))
-        data_frame['time'] = pd.to_datetime(data_frame['time'], unit='s')
-        histogram.add_trace(go.Scatter(x=data_frame['time'], y=data_frame['y'],
+    # only reads the ticks since the last update, the chart gets at most series.max_points per vehicle
+    frame = ui_state.frame
+    series.update(frame.history, frame.history_length)
+    for index, vehicle in enumerate(frame.vehicles):
+        time, y = series.points(index)
+        histogram.add_trace(go.Scatter(x=time * 1000, y=y,
                                        mode='lines', name=vehicle.name,
                                        line=dict(color=vehicle.color, ),
                                        ))
 
     histogram.update_layout(margin=dict(b=20, l=80, r=20, t=20), yaxis_title=label_y, xaxis_title=label_x)
-    histogram.update_xaxes(tickformat="%H:%M", dtick=60 * 1000)  # dtick is in milliseconds
+    # x values are milliseconds, same as the streamed points
+    histogram.update_xaxes(type="date", tickformat="%H:%M", dtick=60 * 1000)  # dtick is in milliseconds
     return histogram
 
 
 def SideCharts():
     # TODO: add delta for speed based on tick delta
     # TODO: make this multi-vehicle compatible
+    vehicle = ui_state.frame.vehicles[0]
     speed_gauge = go.Figure(go.Indicator(
         mode="gauge+number",
-        value=ui_state.simulation.vehicles[0].current_speed,
+        value=vehicle.current_speed,
         domain={'x': [0, 1], 'y': [0, 1]},
         title={'text': "Speed (m/s)"},
-        gauge={'axis': {'range': [None, ui_state.simulation.vehicles[0].max_speed]}, }
+        gauge={'axis': {'range': [None, vehicle.max_speed]}, }
     ))
     speed_gauge.update_layout(margin=dict(b=20, l=20, r=20, t=70))
 
     energy_gauge = go.Figure(go.Indicator(
         mode="gauge+number",
-        value=ui_state.simulation.vehicles[0].energy_stored,
+        value=vehicle.energy_stored,
         domain={'x': [0, 1], 'y': [0, 1]},
         title={'text': "Energy Stored (Wh)"},
         gauge={'axis': {'range': [None, 10_000]}, }
     ))
     energy_gauge.update_layout(margin=dict(b=20, l=20, r=20, t=70))
 
+    rate = ui_state.frame.rate
+    target = "max" if rate.target_ticks_per_second is None else f"{rate.target_ticks_per_second:g}"
     return Div(
         Div(f"Active: {"✅" if ui_state.simulation_running else "❌"}"),
+        Div(f"Ticks/Second: {rate.achieved_ticks_per_second:.1f} of {target}"),
+        Div(f"Simulated Seconds/Second: {rate.achieved_time_ratio:.1f}"),
         plotly2fasthtml(speed_gauge),
         plotly2fasthtml(energy_gauge),
         hx_swap_oob="true",
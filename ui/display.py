@@ -1,21 +1,31 @@
 import asyncio
 import logging
-from datetime import datetime
+import time
+from dataclasses import dataclass, field
 
 from fasthtml.common import *
 from fh_plotly import plotly_headers
 
 import ui.state
-from ui.chart import SpeedCharts, EnergyCharts, DeltaCharts, SideCharts
+from ui.chart import SpeedCharts, EnergyCharts, DeltaCharts, SideCharts, ChartStreamScript, ChartAck, \
+    line_chart_series
+from ui.broadcast import Broadcaster, SessionChannel
 from ui.render import TrackView, TrackRenderScript, VehicleRenderScript
 from ui.state import create_simulation, ui_state
+from ui.stream import ChartStream
 
+logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger(__name__)
 
+VEHICLE_UPDATE_INTERVAL = 0.1
+FULL_UPDATE_INTERVAL = 1
+
 pico_amber = Link(rel="stylesheet", href="https://cdn.jsdelivr.net/npm/@picocss/pico@2/css/pico.pumpkin.min.css")
 custom_css = Link(rel="stylesheet", type="text/css", href="static/style.css")
+charts_js = Script(src="static/charts.js")
+track_js = Script(src="static/track.js")
 htmx_ws = Script(src="https://unpkg.com/htmx-ext-ws@2.0.0/ws.js")
-app = FastHTML(hdrs=(pico_amber, custom_css, htmx_ws, plotly_headers), debug=True)
+app = FastHTML(hdrs=(pico_amber, custom_css, htmx_ws, plotly_headers, charts_js, track_js), debug=True)
 route = app.route
 
 # Serve static files
@@ -41,9 +51,16 @@ def ControlBar():
               value=ui_state.ticks_per_second, hx_trigger="change", hx_put="/update-ticks-per-second"),
         _for='slider_ticks_per_second'
     )
+    switch_max_speed = Label(
+        Input(type="checkbox", role="switch", _id='switch_max_speed', name='max_speed', checked=ui_state.max_speed,
+              hx_trigger="change", hx_put="/update-max-speed", hx_vals='js:{max_speed: event.target.checked}'),
+        "Max Speed",
+        _for='switch_max_speed'
+    )
 
     return Div(
         start_button, pause_button, reset_button, step_button, slider_seconds_per_tick, slider_ticks_per_second,
+        switch_max_speed,
         hx_swap_oob="true",
         cls="controls",
         id="control-bar")
@@ -67,7 +84,7 @@ def SimulationUi():
 
 
 def Home():
-    main = Main(SimulationUi(), hx_ext="ws", ws_connect="/socket")
+    main = Main(SimulationUi(), Div(id="chart-stream"), ChartAck(), hx_ext="ws", ws_connect="/socket")
     footer = Footer(A("GitHub", href="https://github.com/joalder/energy-race-sim"))
     return Title("Energy Race Sim"), main, footer
 
@@ -77,118 +94,141 @@ def get():
     return Home()
 
 
-sessions: list = []
+@dataclass
+class ClientSession:
+    ws: object
+    channel: SessionChannel
+    chart_stream: ChartStream = field(default_factory=ChartStream)
 
 
-async def update_sessions(elements: list = None):
-    if elements is None:
-        elements = [TrackRenderScript(),
-                    VehicleRenderScript(),
-                    SideCharts(),
-                    SpeedCharts(),
-                    EnergyCharts(),
-                    DeltaCharts()]
+broadcaster = Broadcaster(to_xml)
+sessions: list[ClientSession] = []
 
-    for i, session in enumerate(sessions):
-        try:
-            # Somehow cannot send all of them together, so make a message out of each
-            # TODO: can we await all of them together?
-            for element in elements:
-                await session(element)
-        except:
-            log.exception(f"Failure on updating simulation for session {i}")
-            sessions.pop(i)
 
+def LineCharts():
+    return [SpeedCharts(), EnergyCharts(), DeltaCharts()]
 
-async def on_connect(send):
-    sessions.append(send)
 
+async def update_sessions(elements: list = None):
+    """
+    Queues the elements for all sessions and returns right away, see Broadcaster.
+
+    :param elements: to send to every session, defaults to everything including the line charts. These are
+    streamed to each session separately if ui_state.stream_charts is set.
+    """
+    sessions[:] = [session for session in sessions if not session.channel.closed]
 
-async def on_disconnect(send):
+    update_charts = elements is None
+    if elements is None:
+        elements = [VehicleRenderScript(),
+                    SideCharts()]
+        if not ui_state.stream_charts:
+            elements += LineCharts()
+
+    broadcaster.broadcast(elements)
+    if update_charts and ui_state.stream_charts:
+        for session in sessions:
+            broadcaster.send_to(session.channel, ChartStreamScript(session.chart_stream))
+
+
+async def on_connect(ws, send):
+    # the page might be older than the current history, start the stream from complete charts
+    session = ClientSession(ws, broadcaster.connect(send))
+    for element in LineCharts():
+        broadcaster.send_to(session.channel, element)
+    session.chart_stream.synced(line_chart_series())
+    sessions.append(session)
+
+
+async def on_disconnect(ws):
+    for session in sessions:
+        if session.ws is ws:
+            broadcaster.disconnect(session.channel)
+    sessions[:] = [session for session in sessions if session.ws is not ws]
     await update_sessions()
 
 
 @app.ws('/socket', conn=on_connect, disconn=on_disconnect)
-async def web_socket(msg: str, send):
-    pass
+async def web_socket(ws, ack: int = None):
+    if ack is None:
+        return
+    for session in sessions:
+        if session.ws is ws:
+            session.chart_stream.acknowledge(ack)
 
 
 async def background_task():
+    """
+    Sends the latest frame of the simulation runner: vehicle positions whenever there is a new one, everything else
+    at most every FULL_UPDATE_INTERVAL. Never ticks itself, so the event loop stays responsive.
+    """
+    vehicles_frame, full_update_frame, full_update_time = None, None, 0.0
     while True:
-        time_per_tick = 1 / ui_state.ticks_per_second
-        update_interval = 1
-        update_needed = False
-
-        start_time = datetime.now()
+        frame = ui_state.frame
+        now = time.monotonic()
 
-        for _ in range(ui_state.ticks_per_second):
-            if ui_state.simulation_running and not ui_state.simulation.is_done() and len(sessions) > 0:
-                update_needed = True
-                ui_state.simulation.tick(ui_state.seconds_per_tick)
-
-                # TODO: this does not seem to work: Update track and vehicle to get real smooth animation
-                await update_sessions([TrackRenderScript(), VehicleRenderScript()])
-
-                if ui_state.single_step:
-                    ui_state.simulation_running = False
-                    ui_state.single_step = False
-
-        if update_needed:
+        if frame is not full_update_frame and now - full_update_time >= FULL_UPDATE_INTERVAL:
+            vehicles_frame = full_update_frame = frame
+            full_update_time = now
             await update_sessions()
+        elif frame is not vehicles_frame:
+            vehicles_frame = frame
+            await update_sessions([VehicleRenderScript()])
 
-        time_used = datetime.now() - start_time
-
-        if time_used.total_seconds() < update_interval:
-            # refresh interval static 1 second for now
-            if time_used.total_seconds() > 0.001:
-                log.debug(f"Background task took {time_used.total_seconds():.3f}s")
-            await asyncio.sleep(update_interval - time_used.total_seconds())
-        else:
-            log.warning(f"Lagging in simulation. Background task took {time_used.total_seconds()}s")
-
-        # TODO: compensate lag and other overhead over time based on real time measurements
+        await asyncio.sleep(VEHICLE_UPDATE_INTERVAL)
 
 
+ui_state.runner.start()
 background_task_coroutine = asyncio.create_task(background_task())
 
 
 @route('/run')
 async def put(session):
-    ui_state.simulation_running = True
+    await asyncio.wrap_future(ui_state.runner.run())
     add_toast(session, "Simulation started")
     await update_sessions()
 
 
 @route('/step')
 async def put(session):
-    ui_state.simulation_running = True
-    ui_state.single_step = True
+    await asyncio.wrap_future(ui_state.runner.step())
     add_toast(session, "Simulating 1 step")
     await update_sessions()
 
 
 @route('/pause')
 async def put(session):
-    ui_state.simulation_running = False
+    await asyncio.wrap_future(ui_state.runner.pause())
     add_toast(session, "Simulation paused")
     await update_sessions()
 
 
 @route("/reset")
 async def put(session):
-    ui_state.simulation_running = False
     ui_state.simulation = create_simulation()
+    await asyncio.wrap_future(ui_state.runner.replace(ui_state.simulation))
     add_toast(session, "Simulation reset")
+    # the only time the static track layer needs to be drawn again
+    await update_sessions([TrackRenderScript()])
     await update_sessions()
 
 
 @route("/update-seconds-per-tick")
 async def put(seconds_per_tick: int):
     ui.state.ui_state.seconds_per_tick = seconds_per_tick
+    ui_state.runner.configure(seconds_per_tick=seconds_per_tick)
     return ControlBar()
 
 
 @route("/update-ticks-per-second")
 async def put(ticks_per_second: int):
     ui.state.ui_state.ticks_per_second = ticks_per_second
+    ui_state.runner.configure(ticks_per_second=ticks_per_second)
+    return ControlBar()
+
+
+@route("/update-max-speed")
+async def put(max_speed: bool):
+    ui.state.ui_state.max_speed = max_speed
+    ui_state.runner.configure(max_speed=max_speed)
     return ControlBar()
@@ -1,10 +1,13 @@
+import json
 import logging
 import math
 from dataclasses import dataclass
+from functools import lru_cache
 
 from fasthtml import Div, Canvas, Script
 
-from simulation.tile import StraightTile, CornerTile, Direction
+from simulation.position import Position
+from simulation.tile import StraightTile, CornerTile, PolylineTile, Direction
 from simulation.track import Track
 from simulation.vehicle import Vehicle
 from ui.state import ui_state
@@ -40,6 +43,8 @@ class TrackRendererCanvas:
                 script += self._generate_straight_line(tile)
             elif isinstance(tile, CornerTile):
                 script += self._generate_corner(tile)
+            elif isinstance(tile, PolylineTile):
+                script += self._generate_polyline(tile)
 
         script += """
         console.log('Track rendered');
@@ -105,6 +110,36 @@ class TrackRendererCanvas:
             ctx.stroke();
             """ + self._generate_debug_points(points, 'red', 'green')
 
+    def _generate_polyline(self, tile: PolylineTile):
+        table = tile.arc_length_table()
+        left, right = [], []
+        for x, y, orientation in zip(table.x.tolist(), table.y.tolist(), table.orientations.tolist()):
+            center = Position(x, y, 0, orientation)
+            left.append(center.translate(tile.width / 2, -90))
+            right.append(center.translate(tile.width / 2, 90))
+
+        def line_to(points):
+            return "".join(f"ctx.lineTo({point.x * self.render_scale}, {point.y * self.render_scale});"
+                           for point in points)
+
+        return f"""
+            // -- Polyline {len(tile.points)} points {tile.path_length()}m --
+            // Tarmac
+            ctx.fillStyle = '{self.track_color}';
+            ctx.beginPath();
+            {line_to(left)}
+            {line_to(reversed(right))}
+            ctx.fill();
+
+            // Track limit lines
+            ctx.beginPath();
+            {line_to(left)}
+            ctx.stroke();
+            ctx.beginPath();
+            {line_to(right)}
+            ctx.stroke();
+            """ + self._generate_debug_points(tile.get_defining_points(), 'purple', 'yellow')
+
     def _generate_debug_points(self, points, start_color: str, end_color: str):
         return f"""
             ctx.fillStyle = '{start_color}';
@@ -124,39 +159,35 @@ class TrackRendererCanvas:
             """ if self.render_debug_points else ""
 
 
-@dataclass
-class VehicleRendererCanvas:
-    vehicle: Vehicle
-    render_scale: float = 1
-
-    def generate_js(self, canvas_id="track-canvas"):
-        location = self.vehicle.location.get_absolute_position()
-
-        script = f"""
-            var canvas = document.getElementById('{canvas_id}');
-            var ctx = canvas.getContext('2d');
-            
-            ctx.fillStyle = '{self.vehicle.color}';
-            ctx.beginPath();
-            ctx.arc({location.x * self.render_scale}, {location.y * self.render_scale}, 3, 0, 2 * Math.PI);
-            ctx.fill();
-            """
+@lru_cache(maxsize=16)
+def track_script(track: Track, render_scale: float) -> str:
+    """
+    The track never changes, so the script drawing it is generated only once per track and scale
+    """
+    return TrackRendererCanvas(track, render_scale=render_scale).generate_js()
 
-        script += """
-            console.log('Vehicle rendered');
-            """
 
-        return script
+def vehicle_positions(vehicles: list[Vehicle], render_scale: float = 1) -> list[dict]:
+    """
+    :return: canvas position and color of each vehicle, all the overlay needs to draw them
+    """
+    positions = []
+    for vehicle in vehicles:
+        location = vehicle.location.get_absolute_position()
+        positions.append(dict(x=round(location.x * render_scale, 1), y=round(location.y * render_scale, 1),
+                              color=vehicle.color))
+    return positions
 
 
 def TrackView():
     """
-    Create a canvas element for the track, replacing this via htmx seems to cause trouble,
-    content vanishes after settling 🤷 Only swap the render scripts and reset before drawing.
+    Two stacked canvases, the track is drawn once on the lower one and only the vehicle overlay is redrawn on updates.
+    Replacing the canvases via htmx seems to cause trouble, content vanishes after settling 🤷 Only swap the render
+    scripts and reset before drawing.
     """
-    # TODO: create 2nd canvas for vehicle overlay to only redraw vehicles on update
     return Div(
         Canvas(id="track-canvas", width="600", height="600"),
+        Canvas(id="vehicle-canvas", width="600", height="600"),
         TrackRenderScript(),
         VehicleRenderScript(),
         cls="track-view",
@@ -166,17 +197,14 @@ def TrackView():
 def TrackRenderScript():
     # TODO: make render scale based on track size/layout
     return Div(
-        Script(TrackRendererCanvas(ui_state.simulation.environment.track,
-                                   render_scale=ui_state.render_scale).generate_js()),
+        Script(track_script(ui_state.simulation.environment.track, ui_state.render_scale)),
         hx_swap_oob="true",
         id="track-render")
 
 
 def VehicleRenderScript():
+    positions = vehicle_positions(ui_state.frame.vehicles, ui_state.render_scale)
     return Div(
-        *[
-            Script(VehicleRendererCanvas(vehicle, render_scale=ui_state.render_scale).generate_js())
-            for vehicle in ui_state.simulation.vehicles
-        ],
+        Script(f"drawVehicles({json.dumps(positions)});"),
         hx_swap_oob="true",
         id="vehicle-render")
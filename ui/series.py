@@ -0,0 +1,178 @@
+import itertools
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from simulation.history import VehicleHistory
+
+DEFAULT_MAX_POINTS = 1000
+
+# extracts the values of one vehicle for the given rows of the history
+Extractor = Callable[[VehicleHistory, int, slice], np.ndarray]
+
+# unique over all downsamplers, so a cursor never matches the buckets of a replaced series
+_revisions = itertools.count()
+
+
+def history_field(name: str) -> Extractor:
+    return lambda history, vehicle_index, rows: history.column(name, vehicle_index)[rows]
+
+
+@dataclass(frozen=True)
+class SeriesCursor:
+    """
+    Up to where a client has received a downsampled series: revision and number of its completed buckets and the
+    number of points of these buckets.
+    """
+    revision: int = -1
+    buckets: int = 0
+    points: int = 0
+
+
+class MinMaxDownsampler:
+    """
+    Incremental level of detail for a line chart: points are collected in buckets of equal size and only the minimum
+    and maximum of each bucket are kept, so peaks stay visible. Whenever there are more buckets than the point budget
+    allows, neighbouring buckets are merged and the bucket size doubles. Appending only processes the new points.
+
+    Completed buckets never change until the next merge, which changes the revision. This allows to send only the
+    points of new buckets to clients which already have the previous ones.
+    """
+
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS):
+        self.max_buckets = max(max_points // 2 - 1, 1)
+        self.bucket_size = 1
+        self.revision = next(_revisions)
+        self.count = 0
+        # one row per completed bucket: x / y of its minimum, x / y of its maximum
+        self.buckets = np.empty((0, 4), dtype=np.float64)
+        self._pending_x = np.empty(0, dtype=np.float64)
+        self._pending_y = np.empty(0, dtype=np.float64)
+
+    def extend(self, x: np.ndarray, y: np.ndarray):
+        self.count += len(x)
+        x = np.concatenate((self._pending_x, x))
+        y = np.concatenate((self._pending_y, y))
+
+        complete = len(x) // self.bucket_size * self.bucket_size
+        if complete:
+            self._add_buckets(x[:complete], y[:complete])
+        self._pending_x, self._pending_y = x[complete:], y[complete:]
+
+    def _add_buckets(self, x: np.ndarray, y: np.ndarray):
+        x = x.reshape(-1, self.bucket_size)
+        y = y.reshape(-1, self.bucket_size)
+        rows = np.arange(len(x))
+        minimum, maximum = np.argmin(y, axis=1), np.argmax(y, axis=1)
+
+        buckets = np.column_stack((x[rows, minimum], y[rows, minimum], x[rows, maximum], y[rows, maximum]))
+        self.buckets = np.concatenate((self.buckets, buckets))
+
+        while len(self.buckets) > self.max_buckets:
+            self._merge_buckets()
+
+    def _merge_buckets(self):
+        """
+        Merges pairs of buckets, an odd last bucket stays as it is.
+        """
+        even = len(self.buckets) // 2 * 2
+        pairs = self.buckets[:even].reshape(-1, 2, 4)
+        first, second = pairs[:, 0], pairs[:, 1]
+
+        merged = np.empty((len(pairs), 4), dtype=np.float64)
+        merged[:, :2] = np.where((first[:, 1] <= second[:, 1])[:, None], first[:, :2], second[:, :2])
+        merged[:, 2:] = np.where((first[:, 3] >= second[:, 3])[:, None], first[:, 2:], second[:, 2:])
+
+        self.buckets = np.concatenate((merged, self.buckets[even:]))
+        self.bucket_size *= 2
+        self.revision = next(_revisions)
+
+    def points(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: x / y of the downsampled points in order of x, at most about max_points
+        """
+        buckets = self.buckets
+        if len(self._pending_x):
+            minimum, maximum = np.argmin(self._pending_y), np.argmax(self._pending_y)
+            pending = [self._pending_x[minimum], self._pending_y[minimum], self._pending_x[maximum],
+                       self._pending_y[maximum]]
+            buckets = np.concatenate((buckets, [pending]))
+
+        return points_of(buckets)
+
+    def points_since(self, cursor: SeriesCursor) -> tuple[int, np.ndarray, np.ndarray, SeriesCursor]:
+        """
+        Points of the completed buckets a client with the given cursor does not have yet. If the buckets have been
+        merged since, these are all of them. Points of the incomplete last bucket are left out, they follow as soon as
+        the bucket is complete.
+
+        :return: tuple of number of points to keep from before / new x / new y / cursor including the new points
+        """
+        if cursor.revision == self.revision:
+            start, buckets = cursor.points, self.buckets[cursor.buckets:]
+        else:
+            start, buckets = 0, self.buckets
+
+        x, y = points_of(buckets)
+        return start, x, y, SeriesCursor(self.revision, len(self.buckets), start + len(x))
+
+    def cursor(self) -> SeriesCursor:
+        """
+        :return: cursor of a client which has all points of the completed buckets
+        """
+        return self.points_since(SeriesCursor())[3]
+
+
+def points_of(buckets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: x / y of the minimum and maximum of each bucket in order of x, without duplicates if both are the same
+    """
+    minimum_first = buckets[:, 0] <= buckets[:, 2]
+    first = np.where(minimum_first[:, None], buckets[:, :2], buckets[:, 2:])
+    second = np.where(minimum_first[:, None], buckets[:, 2:], buckets[:, :2])
+
+    points = np.stack((first, second), axis=1).reshape(-1, 2)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1::2] = buckets[:, 0] != buckets[:, 2]
+    return points[keep, 0], points[keep, 1]
+
+
+class HistorySeries:
+    """
+    Downsampled series of one value per vehicle over the time of a simulation. Each update only reads the ticks
+    recorded since the previous one, it starts over if the simulation and thus its history has been replaced or if
+    the history replaced an entry which may have been read already.
+    """
+
+    def __init__(self, extractor: Extractor, max_points: int = DEFAULT_MAX_POINTS):
+        self.extractor = extractor
+        self.max_points = max_points
+        self.history: VehicleHistory = None
+        self.downsamplers: list[MinMaxDownsampler] = []
+        self.synced = 0
+        self.revision = 0
+
+    def update(self, history: VehicleHistory, length: int = None):
+        """
+        :param length: number of history entries to read, e.g. those of a published frame while the simulation
+        keeps appending in another thread. Defaults to all.
+        """
+        length = len(history) if length is None else length
+        if history is not self.history or length < self.synced or history.revision != self.revision:
+            self.history = history
+            self.downsamplers = [MinMaxDownsampler(self.max_points) for _ in history.vehicles]
+            self.synced = 0
+            self.revision = history.revision
+
+        rows = slice(self.synced, length)
+        if rows.start == rows.stop:
+            return
+
+        times = history.times[rows]
+        for vehicle_index, downsampler in enumerate(self.downsamplers):
+            downsampler.extend(times, self.extractor(history, vehicle_index, rows))
+        self.synced = rows.stop
+
+    def points(self, vehicle_index: int) -> tuple[np.ndarray, np.ndarray]:
+        return self.downsamplers[vehicle_index].points()
@@ -0,0 +1,25 @@
+// Applies a streamed update of the line charts, see ui/stream.py: each trace is cut to the points the server
+// expects the client to have and extended with the new ones. Acknowledged once all charts have been updated.
+function extendCharts(update) {
+    let applied = true;
+    for (const [chartId, chart] of Object.entries(update.charts)) {
+        const element = document.getElementById(chartId);
+        if (!element || !element.data) {
+            applied = false;
+            continue;
+        }
+
+        const traces = chart.start.map((start, trace) => {
+            const data = element.data[trace];
+            data.x = Array.from(data.x || []).slice(0, start);
+            data.y = Array.from(data.y || []).slice(0, start);
+            return trace;
+        });
+        Plotly.extendTraces(element, {x: chart.x, y: chart.y}, traces);
+    }
+
+    if (applied) {
+        document.getElementById('chart-ack-update').value = update.update;
+        htmx.trigger('#chart-ack', 'chart-ack');
+    }
+}
@@ -0,0 +1,13 @@
+// Draws the vehicles on the overlay canvas above the static track, see ui/render.py
+function drawVehicles(vehicles) {
+    const canvas = document.getElementById('vehicle-canvas');
+    const ctx = canvas.getContext('2d');
+
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    for (const vehicle of vehicles) {
+        ctx.fillStyle = vehicle.color;
+        ctx.beginPath();
+        ctx.arc(vehicle.x, vehicle.y, 3, 0, 2 * Math.PI);
+        ctx.fill();
+    }
+}
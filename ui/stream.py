@@ -0,0 +1,70 @@
+import itertools
+
+from ui.series import HistorySeries, SeriesCursor
+
+# updates remembered until acknowledged, acknowledging one of the dropped older ones has no effect
+MAX_UNACKED_UPDATES = 100
+
+
+class ChartStream:
+    """
+    Streamed chart updates of a single client. Every update contains only the points the client did not acknowledge
+    yet, the client truncates its traces to the given start and extends them with the new points. An update which
+    gets lost or is acknowledged late is therefore covered by the next one.
+    """
+
+    def __init__(self):
+        self.acknowledged: dict[str, list[SeriesCursor]] = {}
+        self.sent: dict[int, dict[str, list[SeriesCursor]]] = {}
+        self._update_ids = itertools.count(1)
+
+    def update(self, charts: dict[str, HistorySeries]) -> dict | None:
+        """
+        :param charts: series by chart id, each already updated with the latest history
+        :return: JSON ready update with the new points per chart and trace, None if the client is up-to-date
+        """
+        update_id = next(self._update_ids)
+        changes, cursors = {}, {}
+        for chart_id, series in charts.items():
+            acknowledged = self.acknowledged.get(chart_id, [])
+            starts, xs, ys, chart_cursors = [], [], [], []
+            for vehicle_index, downsampler in enumerate(series.downsamplers):
+                cursor = acknowledged[vehicle_index] if vehicle_index < len(acknowledged) else SeriesCursor()
+                start, x, y, cursor_after = downsampler.points_since(cursor)
+                starts.append(start)
+                xs.append(x)
+                ys.append(y)
+                chart_cursors.append(cursor_after)
+
+            cursors[chart_id] = chart_cursors
+            if chart_cursors != acknowledged:
+                changes[chart_id] = {
+                    "start": starts,
+                    "x": [(x * 1000).tolist() for x in xs],  # milliseconds for the date axis
+                    "y": [y.tolist() for y in ys],
+                }
+
+        if not changes:
+            return None
+
+        self.sent[update_id] = cursors
+        if len(self.sent) > MAX_UNACKED_UPDATES:
+            del self.sent[next(iter(self.sent))]
+        return {"update": update_id, "charts": changes}
+
+    def acknowledge(self, update_id: int):
+        cursors = self.sent.pop(update_id, None)
+        if cursors is None:
+            return
+
+        self.acknowledged.update(cursors)
+        for outdated in [sent_id for sent_id in self.sent if sent_id < update_id]:
+            del self.sent[outdated]
+
+    def synced(self, charts: dict[str, HistorySeries]):
+        """
+        The client received the complete charts, e.g. on connect, continue from there.
+        """
+        self.acknowledged = {chart_id: [downsampler.cursor() for downsampler in series.downsamplers]
+                             for chart_id, series in charts.items()}
+        self.sent.clear()